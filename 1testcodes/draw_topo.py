@@ -1,103 +1,322 @@
 import json
 import time
+import asyncio
 import random
 import os
 from pyvis.network import Network
+from topo_stream import iter_topology
+from topo_viewer import write_viewer, write_topology_data
+from topo_live import serve_changes
 
 # --- 配置区 ---
 JSON_FILE = 'topology.json'
 HTML_FILE = 'topology_monitor.html'
-REFRESH_INTERVAL = 5  # 秒
+REFRESH_INTERVAL = 5  # 秒 (模拟变化的周期，也是页面加载补丁文件的周期)
+OUTPUT_MODE = 'html'  # 'html': 独立的 pyvis 页面; 'compact': topology_view/viewer.html + 数据文件; 'live': 本地服务实时推送变化
+VIEW_DIR = 'topology_view'
+COMPRESS_DATA = False  # compact 模式下使用 gzip 数据 (需通过 HTTP 访问 viewer.html?data=topology_data.json.gz)
 
 def simulate_network_changes():
-    """模拟随机的网络接口状态变化并更新 JSON 文件"""
+    """模拟随机的网络接口状态变化并更新 JSON 文件，返回 (设备, 接口, 状态)；文件不存在时返回 None"""
     if not os.path.exists(JSON_FILE):
         print(f"错误: 找不到 {JSON_FILE}。请确保文件存在。")
-        return False
+        return None
 
     with open(JSON_FILE, 'r', encoding='utf-8') as f:
         data = json.load(f)
 
     # 随机选择一个路由器和接口进行状态翻转
     node = random.choice(data['nodes'])
+    change = ()
     if node['interfaces']:
         intf = random.choice(node['interfaces'])
         # 随机切换状态 (80% 几率 Up, 20% 几率 Down，模拟真实稳定性)
         intf['status'] = "up" if random.random() > 0.2 else "down"
+        change = (node['id'], intf['name'], intf['status'])
 
     with open(JSON_FILE, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=4)
-    return True
+    return change
 
-def generate_visual_topo():
-    """读取 JSON 并生成带自动刷新标签的 HTML"""
-    with open(JSON_FILE, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+# 颜色定义
+COLOR_UP, COLOR_DOWN = "#2ecc71", "#e74c3c"
+LINE_NORMAL, LINE_DOWN = "#2980b9", "#95a5a6"
+ROUTER_ICON = "https://img.icons8.com/fluency/96/server.png"
+PHYSICS_OPTIONS = {"physics": {"barnesHut": {"gravitationalConstant": -4000, "springLength": 220}}}
+
+DEFAULT_INTF = {"status": "up", "ip": "N/A", "mask": "N/A"}
+
+def _point(node_id, intf_name, info):
+    """接口点：颜色与提示随接口状态变化"""
+    return {"id": f"{node_id}_{intf_name}_pt", "label": " ", "title": f"{intf_name}\n{info['ip']}\n{info['status'].upper()}",
+            "shape": 'dot', "size": 7, "color": COLOR_UP if info['status'] == 'up' else COLOR_DOWN}
+
+def _link_edge(s_pt, d_pt, network, s_info, d_info):
+    """链路线条：任一端接口 down 时变灰并显示为虚线"""
+    is_down = (s_info['status'] == 'down' or d_info['status'] == 'down')
+    return {"id": f"{s_pt}|{d_pt}", "from": s_pt, "to": d_pt, "label": network,
+            "color": LINE_DOWN if is_down else LINE_NORMAL, "width": 4, "length": 300, "dashes": is_down}
+
+class TopologyGraph:
+    """
+    拓扑图结构缓存：(设备, 接口) 索引与全部节点 / 边只构建一次 (records 为 iter_topology() 产出的记录流)，
+    之后接口状态变化时只重新生成该接口的点和它所在链路的边
+    nodes / edges 为 {id: vis 元素}；元素变化时整体替换为新字典，不在原字典上修改
+    """
+
+    def __init__(self, records=None):
+        self.nodes, self.edges = {}, {}
+        self.intf_index = {}       # (设备, 接口) -> 接口数据
+        self.endpoint_links = {}   # (设备, 接口) -> [链路记录]
+        self.structure = None      # 设备与链路 (不含接口状态)，用于判断是否需要整体重建
+        if records is not None:
+            self.build(records)
+
+    @staticmethod
+    def _read(records):
+        """读出设备、接口与链路；链路可以先于设备出现"""
+        node_ids, intf_index, links = [], {}, []
+        for kind, item in records:
+            if kind == 'node':
+                node_ids.append(item['id'])
+                for intf in item.get('interfaces', []):
+                    intf_index[(item['id'], intf['name'])] = intf
+            elif kind == 'link':
+                links.append(item)
+        return node_ids, intf_index, links
+
+    @staticmethod
+    def _structure(node_ids, intf_index, links):
+        interfaces = {key: tuple(sorted((k, str(v)) for k, v in intf.items() if k != 'status'))
+                      for key, intf in intf_index.items()}
+        return node_ids, interfaces, [(link['source'], link['target'], link['network']) for link in links]
+
+    def build(self, records):
+        """整体构建节点 / 边"""
+        node_ids, intf_index, links = self._read(records)
+        self._build(node_ids, intf_index, links)
+
+    def _build(self, node_ids, intf_index, links):
+        nodes, edges = {}, {}
+        endpoint_links = {}
+        for n_id in node_ids:
+            # 添加节点
+            nodes[n_id] = {"id": n_id, "label": n_id, "shape": 'image', "image": ROUTER_ICON, "size": 40}
+        for link in links:
+            # 添加链路与接口点
+            src_node, src_intf = link['source'].split(':')
+            dst_node, dst_intf = link['target'].split(':')
+            s_info = intf_index.get((src_node, src_intf), DEFAULT_INTF)
+            d_info = intf_index.get((dst_node, dst_intf), DEFAULT_INTF)
+            s_point, d_point = _point(src_node, src_intf, s_info), _point(dst_node, dst_intf, d_info)
+            nodes[s_point['id']] = s_point
+            nodes[d_point['id']] = d_point
+            edges[f"{src_node}|{s_point['id']}"] = {"id": f"{src_node}|{s_point['id']}", "from": src_node, "to": s_point['id'],
+                                                    "color": '#bdc3c7', "length": 12, "springConstant": 0.6}
+            edges[f"{dst_node}|{d_point['id']}"] = {"id": f"{dst_node}|{d_point['id']}", "from": dst_node, "to": d_point['id'],
+                                                    "color": '#bdc3c7', "length": 12, "springConstant": 0.6}
+            edge = _link_edge(s_point['id'], d_point['id'], link['network'], s_info, d_info)
+            edges[edge['id']] = edge
+            endpoint_links.setdefault((src_node, src_intf), []).append(link)
+            endpoint_links.setdefault((dst_node, dst_intf), []).append(link)
+        self.nodes, self.edges = nodes, edges
+        self.intf_index = {key: dict(intf) for key, intf in intf_index.items()}  # 与调用方的记录分离
+        self.endpoint_links = endpoint_links
+        self.structure = self._structure(node_ids, intf_index, links)
+
+    def set_status(self, node_id, intf_name, status):
+        """
+        修改单个接口的状态，只重新生成受影响的元素
+        返回 (变化的节点 ID 列表, 变化的边 ID 列表)
+        """
+        key = (node_id, intf_name)
+        info = dict(self.intf_index.get(key, DEFAULT_INTF))
+        if info['status'] == status:
+            return [], []
+        info['status'] = status
+        self.intf_index[key] = info
+        changed_nodes, changed_edges = [], []
+        links = self.endpoint_links.get(key, [])
+        if links:
+            point = _point(node_id, intf_name, info)
+            self.nodes[point['id']] = point
+            changed_nodes.append(point['id'])
+        for link in links:
+            src_node, src_intf = link['source'].split(':')
+            dst_node, dst_intf = link['target'].split(':')
+            edge = _link_edge(f"{src_node}_{src_intf}_pt", f"{dst_node}_{dst_intf}_pt", link['network'],
+                              self.intf_index.get((src_node, src_intf), DEFAULT_INTF),
+                              self.intf_index.get((dst_node, dst_intf), DEFAULT_INTF))
+            if edge != self.edges.get(edge['id']):
+                self.edges[edge['id']] = edge
+                changed_edges.append(edge['id'])
+        return changed_nodes, changed_edges
+
+    def sync(self, records):
+        """
+        与新读入的记录同步：设备 / 链路 / 接口地址有变化 (或尚未构建) 时整体重建并返回 None，
+        否则只更新状态变化的接口，返回 (变化的节点 ID 列表, 变化的边 ID 列表)
+        """
+        node_ids, intf_index, links = self._read(records)
+        if self.structure is None or self._structure(node_ids, intf_index, links) != self.structure:
+            self._build(node_ids, intf_index, links)
+            return None
+        changed_nodes, changed_edges = [], []
+        for key, intf in intf_index.items():
+            status = intf.get('status', DEFAULT_INTF['status'])
+            if status != self.intf_index[key].get('status', DEFAULT_INTF['status']):
+                n, e = self.set_status(key[0], key[1], status)
+                changed_nodes.extend(n)
+                changed_edges.extend(e)
+        return changed_nodes, changed_edges
+
+def build_elements(records):
+    """把拓扑记录转换为 vis 节点 / 边列表，pyvis 页面与紧凑输出共用"""
+    graph = TopologyGraph(records)
+    return list(graph.nodes.values()), list(graph.edges.values())
+
+PATCH_SCRIPT = """
+<script type="text/javascript">
+  // 增量补丁：定时加载补丁文件 (JSONP，file:// 直接打开即可)，在原有 DataSet 上更新，保留布局
+  var PAGE_BUILD = %(build)s, patchSeq = -1;
+  function applyTopologyPatch(patch) {
+    if (patch.build !== PAGE_BUILD) { location.reload(); return; }  // 拓扑结构已变化，整页重新加载
+    if (patch.seq <= patchSeq) { return; }
+    patchSeq = patch.seq;
+    nodes.update(patch.nodes);
+    edges.update(patch.edges);
+  }
+  function loadPatch() {
+    var s = document.createElement("script");
+    s.src = %(src)s + "?t=" + Date.now();
+    s.onload = s.onerror = function () { s.remove(); };
+    document.body.appendChild(s);
+  }
+  setInterval(loadPatch, %(interval)d);
+</script>
+"""
+
+class PyvisPage:
+    """
+    pyvis 页面缓存：整页 HTML 只在结构变化时生成 (pyvis 添加每条边都要扫描已有节点 / 边)；
+    接口状态变化时只写出一个小的补丁文件 (<页面名>.patch.js)，页面定时加载补丁并原地更新
+    补丁中是自上次整页生成以来变化过的元素的最新状态，大小与变化量成正比；
+    变化过的元素超过全部元素的 COMPACT_RATIO 时改为重新生成整页
+    """
+    COMPACT_RATIO = 0.25
+
+    def __init__(self, html_file, refresh):
+        self.html_file = html_file
+        self.patch_file = os.path.splitext(html_file)[0] + ".patch.js"
+        self.refresh = refresh
+        self.build = None
+        self.seq = 0
+        self.patch_nodes, self.patch_edges = {}, {}
+
+    def render(self, graph, changed=None):
+        """changed 为 TopologyGraph.sync() / set_status() 的返回值，None 表示整体重建"""
+        if self.build is not None and changed is not None:
+            for n_id in changed[0]:
+                self.patch_nodes[n_id] = graph.nodes[n_id]
+            for e_id in changed[1]:
+                self.patch_edges[e_id] = graph.edges[e_id]
+            total = len(graph.nodes) + len(graph.edges)
+            if len(self.patch_nodes) + len(self.patch_edges) <= total * self.COMPACT_RATIO:
+                self.seq += 1
+                self._write_patch()
+                return
+        self._write_page(graph)
+
+    def _write_page(self, graph):
+        net = Network(height="800px", width="100%", bgcolor="#ffffff", font_color="black")
+        for node in graph.nodes.values():
+            node = dict(node)
+            net.add_node(node.pop('id'), **node)
+        for edge in graph.edges.values():
+            edge = dict(edge)
+            net.add_edge(edge.pop('from'), edge.pop('to'), **edge)
+        net.set_options(json.dumps(PHYSICS_OPTIONS))
+
+        self.build = f"{os.getpid()}-{time.time_ns()}"
+        self.seq = 0
+        self.patch_nodes, self.patch_edges = {}, {}
+        # 注入补丁加载脚本 (代替整页刷新的 Meta 标签)
+        script = PATCH_SCRIPT % {"build": json.dumps(self.build),
+                                 "src": json.dumps(os.path.basename(self.patch_file)),
+                                 "interval": int(self.refresh * 1000)}
+        html_content = net.generate_html()
+        html_content = html_content.replace("</body>", script + "</body>", 1)
+        _replace_text(self.html_file, html_content)
+        self._write_patch()  # 已打开的旧页面读到新的 build 后整页重新加载
+
+    def _write_patch(self):
+        patch = {"build": self.build, "seq": self.seq,
+                 "nodes": list(self.patch_nodes.values()), "edges": list(self.patch_edges.values())}
+        _replace_text(self.patch_file, f"applyTopologyPatch({json.dumps(patch, ensure_ascii=False)});\n")
+
+def _replace_text(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)  # 原子替换，浏览器不会读到写了一半的文件
+
+GRAPH = TopologyGraph()  # 节点 / 边与接口索引，在各周期之间保留
+PAGE = PyvisPage(HTML_FILE, REFRESH_INTERVAL)
+
+def apply_change(change=None):
+    """
+    change 为 (设备, 接口, 状态) 时只更新该接口涉及的元素，否则流式读取 JSON 同步
+    返回 (节点, 边, 变化)，变化为 None 表示整体重建
+    """
+    if change and GRAPH.structure is not None:
+        changed = GRAPH.set_status(*change)
+    else:
+        changed = GRAPH.sync(iter_topology(JSON_FILE))
+    return GRAPH.nodes, GRAPH.edges, changed
+
+def generate_visual_topo(changed=None):
+    """生成 pyvis 页面；changed 不为 None 时只写出变化元素的补丁文件，页面定时加载并原地更新"""
+    if OUTPUT_MODE == 'compact':
+        return generate_compact_topo()
+    PAGE.render(GRAPH, changed)
+
+def generate_compact_topo(graph=None, out_dir=VIEW_DIR, compress=COMPRESS_DATA):
+    """紧凑输出：viewer.html 只写一次，每次变化只重写数据文件，页面按 ?refresh= 原地更新而不整页重载"""
+    graph = GRAPH if graph is None else graph
+    write_viewer(out_dir)
+    write_topology_data(out_dir, list(graph.nodes.values()), list(graph.edges.values()), PHYSICS_OPTIONS,
+                        compress=compress)
 
-    net = Network(height="800px", width="100%", bgcolor="#ffffff", font_color="black")
-    router_icon = "https://img.icons8.com/fluency/96/server.png" 
-    
-    # 颜色定义
-    COLOR_UP, COLOR_DOWN = "#2ecc71", "#e74c3c"
-    LINE_NORMAL, LINE_DOWN = "#2980b9", "#95a5a6"
-
-    # 添加节点
-    for node in data['nodes']:
-        net.add_node(node['id'], label=node['id'], shape='image', image=router_icon, size=40)
-
-    # 添加链路与接口点
-    for link in data['links']:
-        src_node, src_intf = link['source'].split(':')
-        dst_node, dst_intf = link['target'].split(':')
-        
-        # 查找接口详细数据
-        def find_intf(r_id, i_name):
-            for n in data['nodes']:
-                if n['id'] == r_id:
-                    for i in n['interfaces']:
-                        if i['name'] == i_name: return i
-            return {"status": "up", "ip": "N/A", "mask": "N/A"}
-
-        s_info, d_info = find_intf(src_node, src_intf), find_intf(dst_node, dst_intf)
-        s_pt, d_pt = f"{src_node}_{src_intf}_pt", f"{dst_node}_{dst_intf}_pt"
-
-        # 接口点逻辑
-        net.add_node(s_pt, label=" ", title=f"{src_intf}\n{s_info['ip']}\n{s_info['status'].upper()}",
-                     shape='dot', size=7, color=COLOR_UP if s_info['status'] == 'up' else COLOR_DOWN)
-        net.add_node(d_pt, label=" ", title=f"{dst_intf}\n{d_info['ip']}\n{d_info['status'].upper()}",
-                     shape='dot', size=7, color=COLOR_UP if d_info['status'] == 'up' else COLOR_DOWN)
-
-        # 线条逻辑
-        is_down = (s_info['status'] == 'down' or d_info['status'] == 'down')
-        net.add_edge(src_node, s_pt, color='#bdc3c7', length=12, springConstant=0.6)
-        net.add_edge(dst_node, d_pt, color='#bdc3c7', length=12, springConstant=0.6)
-        net.add_edge(s_pt, d_pt, label=link['network'], color=LINE_DOWN if is_down else LINE_NORMAL, 
-                     width=4, length=300, dashes=is_down)
-
-    net.set_options('{"physics": {"barnesHut": {"gravitationalConstant": -4000, "springLength": 220}}}')
-    
-    # 保存并注入刷新脚本
-    net.save_graph(HTML_FILE)
-    
-    with open(HTML_FILE, 'r+', encoding='utf-8') as f:
-        html_content = f.read()
-        # 注入 Meta 刷新标签
-        refresh_meta = f'\n<meta http-equiv="refresh" content="{REFRESH_INTERVAL}">\n'
-        if "<head>" in html_content:
-            new_content = html_content.replace("<head>", "<head>" + refresh_meta)
-            f.seek(0)
-            f.write(new_content)
-            f.truncate()
+def simulated_changes():
+    """live 模式的变化来源：启动时产出一次 None (下发初始拓扑)，之后每个周期模拟一次状态变化"""
+    yield None
+    while True:
+        time.sleep(REFRESH_INTERVAL)
+        change = simulate_network_changes()
+        if change:
+            yield change
 
 # --- 主循环 ---
 if __name__ == "__main__":
-    print(f"🚀 实时监控已启动。请在浏览器中打开: {HTML_FILE}")
+    if OUTPUT_MODE == 'live':
+        print("🚀 实时监控已启动 (状态变化通过本地服务推送到页面)。")
+    elif OUTPUT_MODE == 'compact':
+        print(f"🚀 实时监控已启动。请在浏览器中打开: {VIEW_DIR}/viewer.html?refresh={REFRESH_INTERVAL}")
+    else:
+        print(f"🚀 实时监控已启动。请在浏览器中打开: {HTML_FILE}")
     print("按 Ctrl+C 停止监控。")
     try:
-        while True:
-            if simulate_network_changes():
-                generate_visual_topo()
-                print(f"[{time.strftime('%H:%M:%S')}] 状态已更新，页面将在下一周期刷新...")
-            time.sleep(REFRESH_INTERVAL)
+        if OUTPUT_MODE == 'live':
+            asyncio.run(serve_changes(simulated_changes(), apply_change, options=PHYSICS_OPTIONS))
+        else:
+            while True:
+                change = simulate_network_changes()
+                if change is not None:
+                    changed = apply_change(change)[2]
+                    # 只有元素确实变化时才写出页面
+                    if changed is None or changed[0] or changed[1]:
+                        generate_visual_topo(changed)
+                        print(f"[{time.strftime('%H:%M:%S')}] 状态已更新，页面将在下一周期加载变化...")
+                time.sleep(REFRESH_INTERVAL)
     except KeyboardInterrupt:
         print("\n🛑 监控已停止。")
\ No newline at end of file
@@ -0,0 +1,162 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import hashlib
+import ctypes
+import ctypes.util
+
+# 文件变化监听：Linux 上使用 inotify (ctypes 调用 libc，不依赖第三方库)，其他系统退回 stat 轮询
+# - inotify 监听文件所在目录 (编辑器 "写临时文件再改名" 的保存方式也能捕获)，事件到达后立即处理
+# - 轮询只比较 (inode, 大小, 修改时间)，不读取文件内容
+# - 只有 stat 信息变化时才计算一次 MD5，内容未变 (如 touch) 不会触发重新渲染
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_CREATE | IN_MODIFY | IN_ATTRIB
+_EVENT = struct.Struct("iIII")  # struct inotify_event: wd, mask, cookie, len (其后为 len 字节的文件名)
+HASH_CHUNK = 1 << 20
+SETTLE_DELAY = 0.05  # 收到事件后等待写入结束的时间 (秒)，合并同一次保存产生的多个事件
+# 只有这两种事件表示目标文件写入完成 / 被替换，即使 stat 信息未变也需要重新计算 MD5；
+# 其他事件 (IN_MODIFY / IN_ATTRIB 等) 只触发一次 stat 比较
+COMPLETE_MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+
+
+def file_signature(path):
+    """(inode, 大小, 修改时间 ns)，文件不存在时返回 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def file_hash(path):
+    """分块计算文件的 MD5，文件不存在时返回 None"""
+    md5 = hashlib.md5()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                md5.update(chunk)
+    except OSError:
+        return None
+    return md5.hexdigest()
+
+
+class _Inotify:
+    """对单个目录的 inotify 监听；wait() 阻塞到目录中出现与 name 相关的事件或超时"""
+
+    def __init__(self, directory, name):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"无法监听目录: {directory}")
+        self.name = os.fsencode(name)
+
+    def _drain(self):
+        """读出当前全部事件，返回目标文件上各事件掩码的并集 (没有相关事件时为 0)"""
+        mask = 0
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return mask
+                raise
+            pos = 0
+            while pos + _EVENT.size <= len(data):
+                _, event, _, length = _EVENT.unpack_from(data, pos)
+                name = data[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b"\0")
+                if name == self.name:
+                    mask |= event
+                pos += _EVENT.size + length
+
+    def wait(self, timeout):
+        """返回目标文件上的事件掩码，超时返回 0"""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return 0
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            mask = self._drain() if ready else 0
+            if mask:
+                # 一次保存会产生多个事件 (创建 / 修改 / 关闭)，稍等片刻一并读出
+                time.sleep(SETTLE_DELAY)
+                return mask | self._drain()
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """
+    监听单个文件的内容变化
+    for _ in FileWatcher(path).changes(): ...   每次内容变化 (包括首次出现) 时产出一次
+    interval: 轮询间隔 (stat 模式)，inotify 模式下作为兜底检查的间隔
+    """
+
+    def __init__(self, path, interval=2, use_inotify=True):
+        self.path = os.path.abspath(path)
+        self.interval = interval
+        self.signature = None
+        self.digest = None
+        self._inotify = None
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self._inotify = _Inotify(os.path.dirname(self.path), os.path.basename(self.path))
+            except (OSError, AttributeError):
+                self._inotify = None  # 库中没有 inotify 接口或监听数已达上限，退回轮询
+
+    @property
+    def mode(self):
+        return "inotify" if self._inotify is not None else "stat"
+
+    def check(self, force=False):
+        """
+        stat 信息变化时再计算 MD5，内容确实变化返回 True
+        force: 目标文件写入完成 / 被替换 (COMPLETE_MASK) 时即使 stat 信息相同也计算 MD5
+               (时间戳精度较粗的文件系统上连续写入)
+        """
+        signature = file_signature(self.path)
+        if signature == self.signature and not force:
+            return False
+        self.signature = signature
+        digest = file_hash(self.path) if signature is not None else None
+        if digest == self.digest:
+            return False
+        self.digest = digest
+        return True
+
+    def wait(self):
+        """阻塞到下一次可能的变化 (inotify 事件) 或下一个检查周期，返回目标文件上的 inotify 事件掩码"""
+        if self._inotify is not None:
+            # 兜底间隔放宽：inotify 收不到事件的情况 (如网络文件系统) 仍能被发现
+            return self._inotify.wait(max(self.interval, 1) * 5)
+        time.sleep(self.interval)
+        return 0
+
+    def changes(self):
+        """文件内容变化时产出当前 MD5 (文件被删除时为 None)；启动时文件已存在也会产出一次"""
+        mask = 0
+        while True:
+            if self.check(force=bool(mask & COMPLETE_MASK)):
+                yield self.digest
+            mask = self.wait()
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
@@ -1,98 +1,72 @@
-import json
 import time
-import hashlib
-import os
-from pyvis.network import Network
+import asyncio
+from draw_topo import TopologyGraph, PyvisPage, PHYSICS_OPTIONS, generate_compact_topo
+from file_watcher import FileWatcher
+from topo_live import serve_changes
+from topo_stream import iter_topology
 
 # --- 配置区 ---
 JSON_FILE = 'topology.json'
 HTML_FILE = 'topology_monitor.html'
-CHECK_INTERVAL = 2  # 检查文件是否有变动的频率（秒）
-REFRESH_RATE = 5    # 浏览器端自动刷新的频率（秒）
+CHECK_INTERVAL = 2  # 无 inotify 时检查文件 stat 信息的频率（秒）；有 inotify 时变化立即处理
+REFRESH_RATE = 5    # 浏览器端加载补丁文件 / 数据文件的频率（秒）
+OUTPUT_MODE = 'html'  # 'html': 独立的 pyvis 页面; 'compact': topology_view/viewer.html + 数据文件; 'live': 本地服务实时推送变化
+VIEW_DIR = 'topology_view'
+COMPRESS_DATA = False  # compact 模式下使用 gzip 数据 (需通过 HTTP 访问 viewer.html?data=topology_data.json.gz)
 
-def get_file_hash(file_path):
-    """计算文件的 MD5 值，用于判断内容是否有变化"""
-    if not os.path.exists(file_path):
-        return None
-    with open(file_path, 'rb') as f:
-        return hashlib.md5(f.read()).hexdigest()
+GRAPH = TopologyGraph()  # 节点 / 边与 (设备, 接口) 索引，在各周期之间保留
+PAGE = PyvisPage(HTML_FILE, REFRESH_RATE)
+
+def load_changes(_=None):
+    """
+    流式读取 JSON 并与缓存的拓扑图同步，返回 (节点, 边, 变化)
+    只有接口状态变化时，变化为 (节点 ID 列表, 边 ID 列表)；首次读取或结构变化时为 None (整体重建)
+    """
+    changed = GRAPH.sync(iter_topology(JSON_FILE))
+    return GRAPH.nodes, GRAPH.edges, changed
 
 def generate_visual_topo():
-    """读取 JSON 并生成带自动刷新标签的 HTML"""
+    """
+    读取 JSON 并更新页面：只有状态变化时只写出变化元素的补丁文件，HTML 本身不重写
+    JSON 文件是唯一的数据来源，每次变化仍需完整读取一遍 (流式，不整体载入)
+    """
     print(f"[{time.strftime('%H:%M:%S')}] 检测到状态变化，正在更新拓扑图...")
     
     try:
-        with open(JSON_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        _, _, changed = load_changes()
     except Exception as e:
         print(f"读取 JSON 失败: {e}")
         return
+    if changed is not None and not (changed[0] or changed[1]):
+        return  # 文件有变化，但没有影响图上的元素
 
-    net = Network(height="800px", width="100%", bgcolor="#ffffff", font_color="black")
-    router_icon = "https://img.icons8.com/fluency/96/server.png" 
-    
-    COLOR_UP, COLOR_DOWN = "#2ecc71", "#e74c3c"
-    LINE_NORMAL, LINE_DOWN = "#2980b9", "#95a5a6"
-
-    # 添加节点
-    for node in data['nodes']:
-        net.add_node(node['id'], label=node['id'], shape='image', image=router_icon, size=40)
-
-    # 添加链路与接口点
-    def find_intf(r_id, i_name):
-        for n in data['nodes']:
-            if n['id'] == r_id:
-                for i in n.get('interfaces', []):
-                    if i['name'] == i_name: return i
-        return {"status": "up", "ip": "N/A", "mask": "N/A"}
-
-    for link in data['links']:
-        src_node, src_intf = link['source'].split(':')
-        dst_node, dst_intf = link['target'].split(':')
-        s_info, d_info = find_intf(src_node, src_intf), find_intf(dst_node, dst_intf)
-        s_pt, d_pt = f"{src_node}_{src_intf}_pt", f"{dst_node}_{dst_intf}_pt"
+    if OUTPUT_MODE == 'compact':
+        return generate_compact_topo(GRAPH, VIEW_DIR, COMPRESS_DATA)
 
-        # 接口点 (根据 JSON 里的 status 决定红/绿)
-        net.add_node(s_pt, label=" ", title=f"{src_intf}\n{s_info['ip']}\n{s_info['status'].upper()}",
-                     shape='dot', size=7, color=COLOR_UP if s_info['status'] == 'up' else COLOR_DOWN)
-        net.add_node(d_pt, label=" ", title=f"{dst_intf}\n{d_info['ip']}\n{d_info['status'].upper()}",
-                     shape='dot', size=7, color=COLOR_UP if d_info['status'] == 'up' else COLOR_DOWN)
-
-        # 连线
-        is_down = (s_info['status'] == 'down' or d_info['status'] == 'down')
-        net.add_edge(src_node, s_pt, color='#bdc3c7', length=12, springConstant=0.6)
-        net.add_edge(dst_node, d_pt, color='#bdc3c7', length=12, springConstant=0.6)
-        net.add_edge(s_pt, d_pt, label=link['network'], color=LINE_DOWN if is_down else LINE_NORMAL, 
-                     width=4, length=300, dashes=is_down)
-
-    net.set_options('{"physics": {"barnesHut": {"gravitationalConstant": -4000, "springLength": 220}}}')
-    
-    net.save_graph(HTML_FILE)
-    
-    # 注入 Meta 刷新标签
-    with open(HTML_FILE, 'r+', encoding='utf-8') as f:
-        html_content = f.read()
-        refresh_meta = f'\n<meta http-equiv="refresh" content="{REFRESH_RATE}">\n'
-        if "<head>" in html_content and refresh_meta not in html_content:
-            new_content = html_content.replace("<head>", "<head>" + refresh_meta)
-            f.seek(0); f.write(new_content); f.truncate()
+    PAGE.render(GRAPH, changed)
 
 # --- 主循环：监听文件变化 ---
 if __name__ == "__main__":
     print(f"📡 实时监听模式已启动。正在监听 {JSON_FILE}...")
-    print(f"请在浏览器打开: {HTML_FILE}")
+    if OUTPUT_MODE == 'compact':
+        print(f"请在浏览器打开: {VIEW_DIR}/viewer.html?refresh={REFRESH_RATE}")
+    elif OUTPUT_MODE == 'live':
+        pass  # 地址由 serve_changes 打印
+    else:
+        print(f"请在浏览器打开: {HTML_FILE}")
     
-    last_hash = None
+    watcher = FileWatcher(JSON_FILE, CHECK_INTERVAL)
+    print(f"变化检测方式: {watcher.mode}")
     
     try:
-        while True:
-            current_hash = get_file_hash(JSON_FILE)
-            
-            # 只有当文件内容发生变化时，才重新渲染
-            if current_hash != last_hash:
+        # 只有当文件内容发生变化时，才重新渲染 (stat 信息变化后才计算 MD5)
+        if OUTPUT_MODE == 'live':
+            # 页面只下发一次，之后只推送状态变化的节点 / 边
+            asyncio.run(serve_changes(watcher.changes(), load_changes, options=PHYSICS_OPTIONS))
+        else:
+            for _ in watcher.changes():
                 generate_visual_topo()
-                last_hash = current_hash
-            
-            time.sleep(CHECK_INTERVAL) # 每2秒检查一次文件指纹
     except KeyboardInterrupt:
-        print("\n监听已停止。")
\ No newline at end of file
+        print("\n监听已停止。")
+    finally:
+        watcher.close()
\ No newline at end of file
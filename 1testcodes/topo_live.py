@@ -0,0 +1,275 @@
+import json
+import asyncio
+import threading
+from topo_viewer import columns  # 快照的列式编码与紧凑查看器的数据文件相同
+
+# 实时推送：本地 asyncio HTTP 服务，页面只下发一次，之后通过 SSE (Server-Sent Events) 推送变化
+# - GET /        查看器页面 (vis-network)，连接 /events 后收到一次完整快照
+# - GET /events  SSE 流："snapshot" 为完整的节点 / 边，"delta" 只包含状态变化的节点 / 边 (及变化的字段)
+# 浏览器在原有 DataSet 上原地更新，布局与物理模拟状态保持不变，不再整页刷新
+LIVE_HOST = "127.0.0.1"
+LIVE_PORT = 8765
+KEEPALIVE = 15        # 无数据时发送 SSE 注释的间隔 (秒)，防止代理断开空闲连接
+CLIENT_BACKLOG = 64   # 每个客户端最多积压的推送数，超过后改为下发一次完整快照
+
+LIVE_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Topology Live</title>
+<script src="https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/vis-network.min.js"></script>
+<style>html, body { margin: 0; height: 100%; } #mynetwork { width: 100%; height: 100%; }
+#status { position: fixed; top: 6px; right: 10px; font: 12px sans-serif; color: #7f8c8d; }</style>
+</head>
+<body>
+<div id="mynetwork"></div>
+<div id="status">connecting...</div>
+<script type="text/javascript">
+  var nodes = new vis.DataSet([]), edges = new vis.DataSet([]);
+  var network = null;
+  var status = document.getElementById("status");
+
+  function expand(fields, rows) {
+    return rows.map(function (row) {
+      var item = {};
+      for (var i = 0; i < fields.length; i++) {
+        if (row[i] !== null && row[i] !== undefined) { item[fields[i]] = row[i]; }
+      }
+      return item;
+    });
+  }
+  function sync(dataset, items) {
+    var keep = {};
+    items.forEach(function (item) { keep[item.id] = true; });
+    dataset.remove(dataset.getIds({filter: function (item) { return !keep[item.id]; }}));
+    dataset.update(items);
+  }
+  function apply(dataset, change) {
+    if (change.remove.length) { dataset.remove(change.remove); }
+    if (change.update.length) { dataset.update(change.update); }
+  }
+  var source = new EventSource("/events");
+  source.addEventListener("snapshot", function (e) {
+    var data = JSON.parse(e.data);
+    sync(nodes, expand(data.node_fields, data.nodes));
+    sync(edges, expand(data.edge_fields, data.edges));
+    if (network === null) {
+      network = new vis.Network(document.getElementById("mynetwork"), {nodes: nodes, edges: edges}, data.options || {});
+    }
+    status.textContent = "live";
+  });
+  source.addEventListener("delta", function (e) {
+    var data = JSON.parse(e.data);
+    apply(nodes, data.nodes);
+    apply(edges, data.edges);
+    status.textContent = "live, updated " + new Date().toLocaleTimeString();
+  });
+  source.onerror = function () { status.textContent = "reconnecting..."; };
+</script>
+</body>
+</html>
+"""
+
+
+def _index(items):
+    return {item['id']: item for item in items}
+
+
+def _diff(old, new):
+    """两个 {id: 元素} 之间的差异：新增的元素整体下发，已有的元素只下发变化的字段"""
+    update, remove = [], [key for key in old if key not in new]
+    for key, item in new.items():
+        before = old.get(key)
+        if before is None:
+            update.append(item)
+        elif before != item:
+            if any(k not in item for k in before):
+                update.append(item)  # 有字段被删除时整体替换
+            else:
+                changed = {k: v for k, v in item.items() if before.get(k) != v}
+                changed['id'] = key
+                update.append(changed)
+    return {"update": update, "remove": remove}
+
+
+def diff_elements(old_nodes, old_edges, nodes, edges):
+    """两次拓扑元素之间的差异，没有变化时返回 None；参数为 {id: 元素} 字典"""
+    delta = {"nodes": _diff(old_nodes, nodes), "edges": _diff(old_edges, edges)}
+    if any(delta[kind]["update"] or delta[kind]["remove"] for kind in ("nodes", "edges")):
+        return delta
+    return None
+
+
+def _event(name, payload):
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    return f"event: {name}\ndata: {data}\n\n".encode('utf-8')
+
+
+class LiveServer:
+    """
+    在 asyncio 事件循环中运行的推送服务
+    await server.start(); server.publish(nodes, edges)  # 每次拓扑变化后调用，只推送差异
+    """
+
+    def __init__(self, host=LIVE_HOST, port=LIVE_PORT, options=None):
+        self.host = host
+        self.port = port
+        self.options = options or {}
+        self.nodes = {}
+        self.edges = {}
+        self.clients = set()
+        self._server = None
+        self._page = LIVE_HTML.encode('utf-8')
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        return self
+
+    async def close(self):
+        for queue in self.clients:
+            while not queue.empty():  # 积压已满的客户端也要能收到结束标记
+                queue.get_nowait()
+            queue.put_nowait(None)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def snapshot(self):
+        node_fields, node_rows = columns(self.nodes.values())
+        edge_fields, edge_rows = columns(self.edges.values())
+        return _event("snapshot", {"node_fields": node_fields, "nodes": node_rows,
+                                   "edge_fields": edge_fields, "edges": edge_rows, "options": self.options})
+
+    def publish(self, nodes, edges, changed=None):
+        """
+        更新当前拓扑并把差异推送给所有客户端，返回差异 (无变化时为 None)
+        nodes / edges: 元素列表或 {id: 元素}
+        changed: (节点 ID 列表, 边 ID 列表) 时只比较这些元素 (见 draw_topo.TopologyGraph)，
+                 None 时与上一次的完整拓扑逐个比较
+        """
+        nodes = nodes if isinstance(nodes, dict) else _index(nodes)
+        edges = edges if isinstance(edges, dict) else _index(edges)
+        if changed is None:
+            delta = diff_elements(self.nodes, self.edges, nodes, edges)
+            self.nodes, self.edges = dict(nodes), dict(edges)
+        else:
+            node_ids, edge_ids = changed
+            delta = diff_elements({k: self.nodes[k] for k in node_ids if k in self.nodes},
+                                  {k: self.edges[k] for k in edge_ids if k in self.edges},
+                                  {k: nodes[k] for k in node_ids}, {k: edges[k] for k in edge_ids})
+            self.nodes.update((k, nodes[k]) for k in node_ids)
+            self.edges.update((k, edges[k]) for k in edge_ids)
+        if delta is None:
+            return None
+        message = _event("delta", delta)
+        for queue in self.clients:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # 客户端跟不上：丢弃积压的差异，改为下发一次完整快照
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(b"snapshot")
+        return delta
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await reader.readline()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # 忽略请求头
+            parts = request.decode('latin-1').split()
+            path = parts[1].split('?')[0] if len(parts) >= 2 else ""
+            if path == "/events":
+                await self._stream(writer)
+            elif path in ("/", "/index.html"):
+                self._respond(writer, b"200 OK", "text/html; charset=utf-8", self._page)
+            else:
+                self._respond(writer, b"404 Not Found", "text/plain; charset=utf-8", b"not found")
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, writer, status, content_type, body):
+        writer.write(b"HTTP/1.1 " + status + b"\r\n" +
+                     f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                     f"Cache-Control: no-cache\r\nConnection: close\r\n\r\n".encode('latin-1') + body)
+
+    async def _stream(self, writer):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+        queue = asyncio.Queue(CLIENT_BACKLOG)
+        self.clients.add(queue)
+        try:
+            writer.write(self.snapshot())
+            await writer.drain()
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), KEEPALIVE)
+                except asyncio.TimeoutError:
+                    message = b": keepalive\n\n"
+                if message is None:
+                    return
+                writer.write(self.snapshot() if message == b"snapshot" else message)
+                await writer.drain()
+        finally:
+            self.clients.discard(queue)
+
+
+def _next_in_thread(loop, iterator, default):
+    """
+    在守护线程中取迭代器的下一个值，返回 asyncio Future
+    迭代器可能长时间阻塞 (如 FileWatcher 等待 inotify 事件)：守护线程不会在退出时被等待，
+    Ctrl+C 可以立即结束程序；放在默认线程池中则 asyncio.run() 退出时要等它返回
+    """
+    future = loop.create_future()
+
+    def settle(method, value):
+        if not future.done():  # 事件循环已取消等待时丢弃结果
+            method(value)
+
+    def run():
+        try:
+            value = next(iterator, default)
+        except BaseException as e:
+            loop.call_soon_threadsafe(settle, future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(settle, future.set_result, value)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+async def serve_changes(changes, load_elements, options=None, host=LIVE_HOST, port=LIVE_PORT):
+    """
+    changes: 阻塞的迭代器 (如 FileWatcher.changes())，每产出一个值调用一次 load_elements(值) 并推送差异
+    load_elements 返回 (节点, 边, 变化)，变化的含义同 LiveServer.publish() 的 changed
+    迭代器在守护线程中运行，load_elements 在线程池中运行，均不阻塞事件循环
+    """
+    server = await LiveServer(host, port, options).start()
+    print(f"请在浏览器打开: {server.url}")
+    loop = asyncio.get_running_loop()
+    changes = iter(changes)
+    done = object()
+    try:
+        while True:
+            value = await _next_in_thread(loop, changes, done)
+            if value is done:
+                break
+            try:
+                nodes, edges, changed = await loop.run_in_executor(None, load_elements, value)
+            except Exception as e:
+                print(f"读取 JSON 失败: {e}")
+                continue
+            delta = server.publish(nodes, edges, changed)
+            if delta is not None:
+                print(f"推送变化: 节点 {len(delta['nodes']['update']) + len(delta['nodes']['remove'])} 个, "
+                      f"边 {len(delta['edges']['update']) + len(delta['edges']['remove'])} 条, "
+                      f"客户端 {len(server.clients)} 个")
+    finally:
+        await server.close()
@@ -0,0 +1,94 @@
+import json
+
+# 拓扑 JSON 的流式读取：按块读入，nodes / links 数组中的记录解析一条产出一条，内存只与单条记录有关
+# (1testcodes 中的脚本独立运行，不依赖 2proj 的目录结构；实现同 2proj/utils/json_stream.py 的 builtin 后端)
+STREAM_SECTIONS = ("nodes", "links")
+CHUNK_SIZE = 1 << 16
+_DELIMITERS = " \t\r\n,]}:"
+
+
+def iter_topology(path):
+    """
+    逐条读取拓扑文件，按文件中的顺序产出：
+      ("node", 设备字典) / ("link", 链路字典) / ("meta", (顶层键, 值))
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        yield from _StreamReader(f).iter_topology()
+
+
+class _StreamReader:
+    """标准库实现的流式解析：只在顶层对象和 nodes / links 数组这两层手工扫描，记录本身交给 raw_decode"""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decode = json.JSONDecoder().raw_decode
+
+    def _fill(self):
+        if self.pos > self.chunk_size:  # 丢弃已解析的部分，缓冲区大小与单条记录相当
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        self.buf += chunk
+        return bool(chunk)
+
+    def _peek(self):
+        """跳过空白并返回下一个字符 (文件结束时返回空串)"""
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars):
+        ch = self._peek()
+        if ch not in chars or not ch:
+            raise ValueError(f"拓扑文件格式错误: 期望 {chars!r}，实际为 {ch!r}")
+        self.pos += 1
+        return ch
+
+    def _value(self):
+        """解码下一个完整的 JSON 值；缓冲区中不完整时继续读入"""
+        self._peek()
+        while True:
+            try:
+                value, end = self.decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof or not self._fill():
+                    raise
+                continue
+            # 数字可能在缓冲区末尾被截断 (如 "-0." 只解出 -0)：值后面紧跟的不是分隔符时继续读入再解码
+            if self.eof or (end < len(self.buf) and self.buf[end] in _DELIMITERS) or not self._fill():
+                self.pos = end
+                return value
+
+    def iter_topology(self):
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key in STREAM_SECTIONS and self._peek() == "[":
+                self.pos += 1
+                kind = key[:-1]
+                if self._peek() == "]":
+                    self.pos += 1
+                else:
+                    while True:
+                        yield kind, self._value()
+                        if self._expect(",]") == "]":
+                            break
+            else:
+                yield "meta", (key, self._value())
+            if self._expect(",}") == "}":
+                return
@@ -0,0 +1,127 @@
+import gzip
+import json
+import os
+
+VIEWER_NAME = "viewer.html"
+DATA_JS_NAME = "topology_data.js"
+DATA_GZ_NAME = "topology_data.json.gz"
+
+# 静态查看器页面：只写一次，拓扑数据通过单独的数据文件加载
+# (1testcodes 中的脚本独立运行，不依赖 2proj 的目录结构，页面与数据格式同 2proj/utils/viewer.py)
+# - 默认加载 topology_data.js (JSONP 形式，file:// 直接打开即可)
+# - ?data=topology_data.json.gz 时通过 fetch + DecompressionStream 加载压缩数据 (需通过 HTTP 访问)
+# - ?refresh=5 时每 5 秒重新加载数据，并在原有画布上增量更新节点 / 边，保留当前布局
+VIEWER_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Topology Viewer</title>
+<script src="https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/vis-network.min.js"></script>
+<style>html, body { margin: 0; height: 100%; } #mynetwork { width: 100%; height: 100%; }</style>
+</head>
+<body>
+<div id="mynetwork"></div>
+<script type="text/javascript">
+  var params = new URLSearchParams(location.search);
+  var dataSrc = params.get("data") || "topology_data.js";
+  var refresh = parseFloat(params.get("refresh") || "0");
+  var nodes = new vis.DataSet([]), edges = new vis.DataSet([]);
+  var network = null;
+
+  function expand(fields, rows) {
+    return rows.map(function (row) {
+      var item = {};
+      for (var i = 0; i < fields.length; i++) {
+        if (row[i] !== null && row[i] !== undefined) { item[fields[i]] = row[i]; }
+      }
+      return item;
+    });
+  }
+  function sync(dataset, items) {
+    var keep = {};
+    items.forEach(function (item) { keep[item.id] = true; });
+    dataset.remove(dataset.getIds({filter: function (item) { return !keep[item.id]; }}));
+    dataset.update(items);
+  }
+  function renderTopology(data) {
+    sync(nodes, expand(data.node_fields, data.nodes));
+    sync(edges, expand(data.edge_fields, data.edges));
+    if (network === null) {
+      network = new vis.Network(document.getElementById("mynetwork"), {nodes: nodes, edges: edges}, data.options || {});
+    }
+  }
+  function loadData() {
+    if (/\\.js$/.test(dataSrc)) {
+      var s = document.createElement("script");
+      s.src = dataSrc + "?t=" + Date.now();
+      s.onload = function () { s.remove(); };
+      document.body.appendChild(s);
+    } else {
+      fetch(dataSrc, {cache: "no-store"}).then(function (resp) {
+        var body = /\\.gz$/.test(dataSrc) ? resp.body.pipeThrough(new DecompressionStream("gzip")) : resp.body;
+        return new Response(body).json();
+      }).then(renderTopology);
+    }
+  }
+  loadData();
+  if (refresh > 0) { setInterval(loadData, refresh * 1000); }
+</script>
+</body>
+</html>
+"""
+
+
+def columns(items):
+    """把字典列表转换为 字段表 + 行数组，省去每条记录重复的键名"""
+    fields = []
+    seen = set()
+    for item in items:
+        for key in item:
+            if key not in seen:
+                seen.add(key)
+                fields.append(key)
+    return fields, [[item.get(key) for key in fields] for item in items]
+
+
+def _replace_file(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)  # 原子替换，浏览器不会读到写了一半的文件
+
+
+def write_viewer(out_dir):
+    """写入静态查看器页面；内容未变化时不重写，浏览器缓存可以一直命中"""
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    path = os.path.join(out_dir, VIEWER_NAME)
+    content = VIEWER_HTML.encode('utf-8')
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == content:
+                return path
+    _replace_file(path, content)
+    return path
+
+
+def write_topology_data(out_dir, nodes, edges, options=None, compress=False):
+    """
+    写入紧凑的拓扑数据文件，返回文件路径
+    compress=False: topology_data.js (renderTopology({...}) 形式)
+    compress=True:  topology_data.json.gz (查看器需加 ?data=topology_data.json.gz)
+    """
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    node_fields, node_rows = columns(nodes)
+    edge_fields, edge_rows = columns(edges)
+    payload = json.dumps({"node_fields": node_fields, "nodes": node_rows,
+                          "edge_fields": edge_fields, "edges": edge_rows,
+                          "options": options or {}},
+                         ensure_ascii=False, separators=(',', ':'))
+    if compress:
+        path = os.path.join(out_dir, DATA_GZ_NAME)
+        _replace_file(path, gzip.compress(payload.encode('utf-8'), compresslevel=6, mtime=0))
+    else:
+        path = os.path.join(out_dir, DATA_JS_NAME)
+        _replace_file(path, f"renderTopology({payload});\n".encode('utf-8'))
+    return path
@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from utils.pipeline import TopologyPipeline
+from utils.profiling import StageProfiler
+from utils.synthetic import SHAPES, synthetic_lines
+
+DEFAULT_SIZES = "10,100,1000,10000,100000"
+STAGES = ("parse", "validate", "allocate", "render", "generate", "save")
+# 10 万台 leaf-spine 约 40 万条链路，超过默认 172.16.0.0/12 的 /30 数量，基准测试使用更大的互联地址池
+BENCH_SUPERNET = "100.64.0.0/10"
+NOISE_FLOOR = 0.01  # 低于该耗时 (秒) 的阶段不参与回归判断，避免计时抖动误报
+
+
+def run_pipeline(shape, count, args, trace_memory):
+    """在临时目录中跑一遍完整流水线，返回 (链路数, {阶段: StageRecord})"""
+    work_dir = tempfile.mkdtemp(prefix="topo_bench_")
+    try:
+        pipeline = TopologyPipeline(os.path.join(work_dir, "topo.json"),
+                                    output_html=os.path.join(work_dir, "preview.html"),
+                                    config_dir=os.path.join(work_dir, "configs"),
+                                    layout=args.layout, render_cache=0,
+                                    profiler=StageProfiler(trace_memory=trace_memory))
+        steps = {
+            "parse": lambda: pipeline.parse(synthetic_lines(shape, count, seed=args.seed)),
+            "validate": pipeline.validate,
+            "allocate": lambda: pipeline.allocate(verbose=False, supernet=args.supernet, prefixlen=args.prefixlen),
+            "render": pipeline.render,
+            "generate": lambda: pipeline.generate(workers=args.workers),
+            "save": pipeline.save,
+        }
+        for stage in STAGES:
+            if stage == "render" and args.no_render:
+                continue
+            steps[stage]()
+        return pipeline.model.link_count, {record.stage: record for record in pipeline.profiler.records}
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run_case(shape, count, args):
+    """
+    单个用例：先跑一遍计时 (不开 tracemalloc，避免其开销扭曲耗时)，
+    再开启 tracemalloc 跑一遍记录各阶段峰值内存 (--no-memory 时跳过)
+    """
+    links, timings = run_pipeline(shape, count, args, trace_memory=False)
+    stages = {stage: {"seconds": round(r.wall, 4), "cpu": round(r.cpu, 4)} for stage, r in timings.items()}
+    if not args.no_memory:
+        _, traced = run_pipeline(shape, count, args, trace_memory=True)
+        for stage, record in traced.items():
+            stages[stage]["peak_kb"] = record.peak_kb
+    return {"shape": shape, "devices": count, "links": links, "stages": stages}
+
+
+def compare(results, baseline, threshold):
+    """与基准结果逐阶段对比，返回回归列表 [(形状, 设备数, 阶段, 指标, 基准值, 当前值), ...]"""
+    previous = {(r["shape"], r["devices"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\n{'形状':<9}{'设备数':>6}  {'阶段':<8}{'基准(s)':>10}{'当前(s)':>10}{'比值':>8}")
+    for result in results:
+        old = previous.get((result["shape"], result["devices"]))
+        if old is None:
+            continue
+        for stage, now in result["stages"].items():
+            before = old["stages"].get(stage)
+            if before is None:
+                continue
+            ratio = now["seconds"] / before["seconds"] if before["seconds"] else float('inf')
+            flag = ""
+            if before["seconds"] >= NOISE_FLOOR and ratio > threshold:
+                flag = "  [回归]"
+                regressions.append((result["shape"], result["devices"], stage, "seconds",
+                                    before["seconds"], now["seconds"]))
+            if before.get("peak_kb") and now.get("peak_kb", 0) > before["peak_kb"] * threshold:
+                flag += "  [内存回归]"
+                regressions.append((result["shape"], result["devices"], stage, "peak_kb",
+                                    before["peak_kb"], now["peak_kb"]))
+            print(f"{result['shape']:<11}{result['devices']:>9}  {stage:<10}"
+                  f"{before['seconds']:>10.3f}{now['seconds']:>10.3f}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="拓扑流水线基准测试：合成拓扑 -> 解析 / 校验 / 分配 / 渲染 / 生成 / 保存")
+    parser.add_argument('--shapes', default=",".join(SHAPES), help=f"拓扑形状，逗号分隔 (可选: {', '.join(SHAPES)})")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="设备数，逗号分隔")
+    parser.add_argument('--seed', type=int, default=0, help="合成拓扑的随机种子")
+    parser.add_argument('--layout', default='auto', choices=['physics', 'force', 'hierarchical', 'auto', 'clustered'],
+                        help="渲染布局 (physics 在大规模下极慢，默认 auto)")
+    parser.add_argument('--supernet', default=BENCH_SUPERNET, help="互联地址池")
+    parser.add_argument('--prefixlen', type=int, default=30, choices=[30, 31], help="互联网段前缀长度")
+    parser.add_argument('--workers', type=int, default=1, help="配置生成并行进程数 (子进程的内存不计入峰值)")
+    parser.add_argument('--no-render', action='store_true', help="跳过渲染阶段")
+    parser.add_argument('--no-memory', action='store_true', help="不记录峰值内存 (跳过 tracemalloc 那一遍，大规模时可节省大量时间)")
+    parser.add_argument('--output', default='benchmark_results.json', help="结果 JSON 文件")
+    parser.add_argument('--compare', metavar='BASELINE', help="与之前保存的结果对比，出现回归时退出码为 1")
+    parser.add_argument('--threshold', type=float, default=1.25, help="当前值超过基准值的该倍数即视为回归")
+    args = parser.parse_args()
+
+    shapes = [s.strip() for s in args.shapes.split(',') if s.strip()]
+    for shape in shapes:
+        if shape not in SHAPES:
+            parser.error(f"未知的拓扑形状: {shape}")
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+
+    results = []
+    for shape in shapes:
+        for count in sizes:
+            print(f">>> {shape} / {count} 台设备 ...", flush=True)
+            result = run_case(shape, count, args)
+            results.append(result)
+            summary = ", ".join(f"{stage} {v['seconds']:.3f}s" + (f"/{v['peak_kb'] / 1024:.1f}MB" if 'peak_kb' in v else "")
+                                for stage, v in result["stages"].items())
+            print(f"    链路 {result['links']} 条: {summary}")
+
+    report = {
+        "meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                 "platform": platform.platform(), "cpu_count": os.cpu_count(), "seed": args.seed,
+                 "layout": args.layout, "workers": args.workers, "supernet": args.supernet,
+                 "prefixlen": args.prefixlen, "memory": not args.no_memory},
+        "results": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"[成功] 结果已保存到 {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n>>> 发现 {len(regressions)} 项回归 (阈值 {args.threshold}x)")
+            sys.exit(1)
+        print("\n>>> 未发现回归")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,170 @@
-import os
-import json
 import sys
-from models.topology import TopologyModel
-from utils.renderer import TopologyRenderer
-from utils.ip_allocator import allocate_ips
-from utils.config_generator import generate_configs
+import argparse
+from utils.pipeline import TopologyPipeline
+from utils.profiling import StageProfiler, PROFILE_ENV, PROFILE_STAGE_ENV
+from utils.validator import has_errors, format_violations
+from utils.failure import format_impacts
+
+def iter_input_lines(source):
+    """逐行读取输入 (文件路径或 '-' 表示标准输入)，跳过空行，遇到 'done' 结束；不会一次性读入整个文件"""
+    f = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8')
+    try:
+        for line in f:
+            line = line.strip()
+            if line.lower() == 'done':
+                break
+            if line:
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def report_parse_errors(pipeline, limit=20):
+    errors = pipeline.parse_errors
+    if not errors:
+        return
+    print(f">>> 警告: {len(errors)} 行无法识别，已跳过:")
+    for error in errors[:limit]:
+        print(f"  {error}")
+    if len(errors) > limit:
+        print(f"  ... 其余 {len(errors) - limit} 行省略")
+    errors.clear()
+
+def report_violations(pipeline):
+    """打印校验结果，返回是否存在 error 级别的问题"""
+    violations = pipeline.violations
+    if violations:
+        print(">>> 拓扑校验: " + format_violations(violations))
+    return has_errors(violations)
+
+def report_spf(engine, limit=5):
+    summary = engine.summary()
+    print(f">>> SPF: 设备 {summary['devices']} 台, 链路 {summary['links']} 条 (断开 {summary['down_links']}), "
+          f"连通分量 {summary['components']} 个, 不可达设备对 {summary['unreachable_pairs']}, "
+          f"最大路径开销 {summary.get('max_cost', '-')}")
+    for group in engine.components()[1:limit + 1]:  # 第一个为最大的分量，其余为孤立部分
+        print(f"  [孤立] {len(group)} 台: {', '.join(group[:10])}{' ...' if len(group) > 10 else ''}")
+
+def run_batch(args):
+    """无交互批处理模式：解析 -> 分配 -> 渲染 -> 生成 -> 保存，全程无提示"""
+    pipeline = TopologyPipeline(args.json, project_name="Network_Lab", layout=args.layout, group_by=args.group_by,
+                                compact_dir=args.compact, compress=args.gzip,
+                                view=args.view, render_cache=args.render_cache,
+                                profiler=StageProfiler.from_env(args.profile, args.profile_stage),
+                                json_backend=args.json_backend, db_path=args.db)
+    if args.append and pipeline.has_saved():
+        pipeline.load()
+
+    nodes, links = pipeline.parse(iter_input_lines(args.batch))
+    print(f">>> 解析完成: 设备 {nodes} 台, 链路 {links} 条")
+    report_parse_errors(pipeline)
+
+    pipeline.validate()
+    if report_violations(pipeline) and not args.skip_validation:
+        print("[失败] 拓扑校验未通过，未分配地址也未生成配置 (可使用 --skip-validation 跳过校验)。")
+        sys.exit(1)
+
+    stats = pipeline.allocate(verbose=args.verbose)
+    print(f">>> 地址分配: 新分配 {stats['allocated']} 条链路, {stats['loopbacks']} 个 Loopback, 释放 {stats['released']} 条链路")
+
+    if args.spf:
+        report_spf(pipeline.spf(workers=args.workers))
+    if args.what_if:
+        print(">>> 单点故障分析: " + format_impacts(pipeline.what_if(workers=args.workers), limit=10))
+
+    if not args.no_render:
+        pipeline.render()
+
+    pipeline.generate(workers=args.workers, incremental=not args.full, delta=args.delta,
+                      bundle=args.bundle)
+    pipeline.save()
+    if args.db and args.export_json:
+        pipeline.store.export_json(args.json)
+        print(f">>> 已导出 JSON: {args.json}")
+
+    print("\n========== 各阶段统计 ==========")
+    print(pipeline.stage_report())
 
 def main():
-    json_path = 'data/current_topo.json'
+    parser = argparse.ArgumentParser(description="自动化网络设计与配置系统")
+    parser.add_argument('--batch', metavar='FILE', help="批处理模式：从文件 (或 '-' 表示标准输入) 读取设备与连接，不再交互确认")
+    parser.add_argument('--json', default='data/current_topo.json', help="拓扑文件路径")
+    parser.add_argument('--append', action='store_true', help="批处理时在已有拓扑基础上追加")
+    parser.add_argument('--no-render', action='store_true', help="批处理时跳过拓扑图渲染")
+    parser.add_argument('--layout', default='physics', choices=['physics', 'force', 'hierarchical', 'auto', 'clustered'],
+                        help="拓扑图布局：physics 为浏览器端物理引擎，force/hierarchical/auto 为 Python 端预计算坐标，"
+                             "clustered 为按需展开的分组视图 (大拓扑推荐 auto 或 clustered)")
+    parser.add_argument('--group-by', default='site', choices=['site', 'brand', 'community'],
+                        help="clustered 视图的分组方式")
+    parser.add_argument('--compact', metavar='DIR',
+                        help="紧凑输出：在 DIR 中生成静态 viewer.html 与拓扑数据文件，重新渲染时只重写数据文件")
+    parser.add_argument('--gzip', action='store_true', help="紧凑输出时使用 gzip 压缩数据 (需通过 HTTP 打开 viewer.html?data=topology_data.json.gz)")
+    parser.add_argument('--view', default='logical', choices=['logical', 'physical'],
+                        help="链路标注：logical 显示接口 IP 与子网，physical 只显示接口名")
+    parser.add_argument('--render-cache', type=int, default=4, metavar='N',
+                        help="渲染缓存保留最近 N 个结果，拓扑未变化时跳过重新渲染 (0 表示关闭)")
+    parser.add_argument('--workers', type=int, default=1, help="配置生成并行进程数 (0 表示全部 CPU 核心)")
+    parser.add_argument('--full', action='store_true', help="全量重新生成配置 (默认增量)")
+    parser.add_argument('--delta', action='store_true',
+                        help="同时输出与上一版配置的差异命令 (configs/delta/，Cisco/Arista 用 no，Palo Alto 用 delete)")
+    parser.add_argument('--bundle', action='store_true',
+                        help="所有设备配置写入单个 configs/configs.bundle (带索引，可按设备读取)，不再逐台生成文件")
+    parser.add_argument('--verbose', action='store_true', help="批处理时逐条打印地址分配结果")
+    parser.add_argument('--spf', action='store_true',
+                        help="批处理时分配地址后计算全部设备的最短路径，报告可达性 (并行进程数同 --workers)")
+    parser.add_argument('--what-if', action='store_true',
+                        help="批处理时依次模拟每条链路 / 每台设备故障，报告失联与绕远的设备对 (并行进程数同 --workers)")
+    parser.add_argument('--skip-validation', action='store_true', help="批处理时校验发现错误也继续执行后续阶段")
+    parser.add_argument('--db', metavar='FILE',
+                        help="拓扑与租约保存在 SQLite 文件中，每次只写入改动 (数据库为空时先导入 --json 指定的文件)")
+    parser.add_argument('--export-json', action='store_true', help="使用 --db 时，批处理结束后把数据库导出为 --json 文件")
+    parser.add_argument('--json-backend', default='auto', choices=['auto', 'builtin', 'ijson', 'orjson'],
+                        help="加载拓扑的 JSON 解析后端：builtin/ijson 逐条流式解析，orjson 整文件解析 (更快但更占内存)")
+    parser.add_argument('--profile', action='store_true',
+                        help=f"记录各阶段的内存占用 (tracemalloc) 并在结束时打印统计表，也可设置环境变量 {PROFILE_ENV}=1")
+    parser.add_argument('--profile-stage', choices=['load', 'parse', 'validate', 'allocate', 'spf', 'what_if', 'render', 'generate', 'save'],
+                        help=f"对指定阶段启用 cProfile，结果写入 profile_<阶段>.prof，也可设置环境变量 {PROFILE_STAGE_ENV}")
+    args = parser.parse_args()
+
+    if args.batch:
+        run_batch(args)
+        return
+
+    json_path = args.json
+    state_path = args.db or json_path
     use_existing = False
 
     print("========================================")
     print("       自动化网络设计与配置系统 V2.0    ")
     print("========================================")
 
+    # 初始化流水线：整个流程共用一份内存中的拓扑，结束或退出时统一写盘
+    pipeline = TopologyPipeline(json_path, project_name="Network_Lab", layout=args.layout, group_by=args.group_by,
+                                compact_dir=args.compact, compress=args.gzip,
+                                view=args.view, render_cache=args.render_cache,
+                                profiler=StageProfiler.from_env(args.profile, args.profile_stage),
+                                json_backend=args.json_backend, db_path=args.db)
+
     # --- 逻辑 1: 检测已存在的拓扑文件 ---
-    if os.path.exists(json_path):
-        choice = input(f"检测到已存在的拓扑文件 '{json_path}'，是否直接调用？(y/n): ").lower()
+    if pipeline.has_saved():
+        choice = input(f"检测到已存在的拓扑文件 '{state_path}'，是否直接调用？(y/n): ").lower()
         if choice == 'y':
             use_existing = True
             print(">>> 已加载现有拓扑数据。")
 
-    # 初始化模型（无论是否使用旧文件，都需要初始化以供后续流程使用）
-    topo_model = TopologyModel(project_name="Network_Lab")
-    renderer = TopologyRenderer(json_path)
+    if use_existing:
+        pipeline.load()
+
+    try:
+        run_stages(pipeline, use_existing, args)
+    finally:
+        if pipeline.save():
+            print(f">>> 拓扑数据已保存到 {state_path}")
+        if pipeline.profiler.enabled:
+            print("\n========== 各阶段统计 ==========")
+            print(pipeline.stage_report())
 
+def run_stages(pipeline, use_existing, args):
     # --- 逻辑 2: 批量输入阶段 ---
     if not use_existing:
         print("\n[步骤 1] 请输入设备信息和连接关系 (支持多行批量粘贴):")
@@ -35,7 +175,7 @@ def main():
         print("R1:Gi0/1 连接 SW3:Et1")
         print("------------------------------------------------")
         print(">>> 请开始输入/粘贴内容，最后输入 'done' 并回车结束输入:")
-        
+
         raw_lines = []
         while True:
             line = input().strip()
@@ -46,33 +186,15 @@ def main():
 
         # 批量处理所有行
         print(f"\n>>> 正在解析 {len(raw_lines)} 条数据...")
-        for user_input in raw_lines:
-            # 增强版解析逻辑：支持多种连接符
-            if any(sep in user_input for sep in ["连接", "-", "<->", " to "]):
-                temp_input = user_input.replace("连接", "-").replace("<->", "-").replace(" to ", "-")
-                parts = temp_input.split("-")
-                if len(parts) == 2:
-                    topo_model.add_link({
-                        "source": parts[0].strip(),
-                        "target": parts[1].strip(),
-                        "network": "TBD"
-                    })
-            else:
-                # 处理节点
-                parts = user_input.split(",")
-                if len(parts) == 3:
-                    topo_model.add_node({
-                        "id": parts[0].strip(),
-                        "brand": parts[1].strip(),
-                        "type": parts[2].strip()
-                    })
-        
-        topo_model.save_to_json(json_path)
-        print(">>> 数据解析完成并已保存。")
+        pipeline.parse(raw_lines)
+        report_parse_errors(pipeline)
+        print(">>> 数据解析完成。")
+    pipeline.validate()
+    report_violations(pipeline)
 
     # --- 逻辑 3: 第一次确认（物理连接） ---
     print("\n[步骤 2] 正在生成初步拓扑预览 (物理连接)...")
-    renderer.render()
+    pipeline.render(view="physical")
     print(">>> 物理拓扑已生成。请刷新浏览器查看 topology_preview.html。")
 
     while True:
@@ -81,25 +203,35 @@ def main():
             break
         elif choice1 == 'add':
             print("请继续输入连接信息 (输入 'done' 重新渲染):")
+            extra_lines = []
             while True:
                 line = input("> ").strip()
                 if line.lower() == 'done':
-                    # 重新保存并渲染
-                    # 注意：如果是加载的旧文件，这里需要重新获取 topo_model 的上下文
-                    # 简化处理：建议重新运行脚本来修改已存在的复杂拓扑
-                    renderer.render()
                     break
-                topo_model.parse_and_add(line) # 假设模型层有此方法，否则按上面的逻辑添加
+                extra_lines.append(line)
+            # 新增内容直接加入内存模型 (新建或已加载的拓扑均可)，然后重新渲染
+            pipeline.parse(extra_lines)
+            report_parse_errors(pipeline)
+            pipeline.validate()
+            report_violations(pipeline)
+            if pipeline.render(view="physical"):
+                print(">>> 拓扑未变化，沿用上一次的渲染结果。")
         else:
             print("程序已退出。")
             return
 
+    if has_errors(pipeline.violations):
+        choice = input("\n[?] 拓扑校验存在错误，仍要继续分配 IP 并生成配置吗？(y/n): ").lower()
+        if choice != 'y':
+            print("程序已退出。")
+            return
+
     # --- 逻辑 4: IP 分配与第二次确认（逻辑地址） ---
-    print("\n[步骤 3] 正在按照 192.168.x.y/30 规则分配 IP 地址和 Loopback...")
-    allocate_ips(json_path)
-    
+    print("\n[步骤 3] 正在从地址池分配互联 IP 地址 (/30) 和 Loopback...")
+    pipeline.allocate()
+
     print("\n[步骤 4] 正在更新拓扑图 (加入 IP 信息)...")
-    renderer.render()
+    pipeline.render()
     print(">>> 逻辑拓扑已更新！请再次刷新浏览器查看接口 IP 和 子网标注。")
 
     while True:
@@ -112,7 +244,8 @@ def main():
 
     # --- 逻辑 5: 生成配置 ---
     print("\n[步骤 5] 正在生成各厂商初始化配置 (.txt)...")
-    generate_configs(json_path)
+    pipeline.generate(workers=args.workers, incremental=not args.full, delta=args.delta,
+                      bundle=args.bundle)
 
     print("\n========================================")
     print("           任务全部完成！               ")
@@ -122,4 +255,4 @@ def main():
     print("========================================\n")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
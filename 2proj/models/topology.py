@@ -1,21 +1,263 @@
-import json
+from array import array
+from utils.json_stream import iter_topology, write_topology
+
+
+def split_endpoint(endpoint):
+    """将 'R1:Gi0/0' 拆分为 ('R1', 'Gi0/0')，没有接口部分时接口为空字符串"""
+    node_id, _, intf = endpoint.partition(':')
+    return node_id.strip(), intf.strip()
+
+
+class Node:
+    """设备记录：固定字段放在 __slots__ 中，其余字段原样保存在 extra 里"""
+    __slots__ = ("id", "brand", "type", "loopback", "extra")
+
+    _KNOWN = ("id", "brand", "type", "loopback")
+
+    def __init__(self, node_id, brand=None, n_type=None, extra=None, loopback=None):
+        self.id = node_id
+        self.brand = brand
+        self.type = n_type
+        self.loopback = loopback
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, info):
+        extra = {k: v for k, v in info.items() if k not in cls._KNOWN}
+        return cls(info["id"], info.get("brand"), info.get("type"), extra or None, info.get("loopback"))
+
+    def to_dict(self):
+        d = {"id": self.id}
+        if self.brand is not None:
+            d["brand"] = self.brand
+        if self.type is not None:
+            d["type"] = self.type
+        if self.loopback is not None:
+            d["loopback"] = self.loopback
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+
+class Link:
+    """链路记录：端点在加载时拆分一次，后续无需再做字符串切分"""
+    __slots__ = ("source", "target", "src_node", "src_intf", "dst_node", "dst_intf",
+                 "network", "source_ip", "target_ip", "extra")
+
+    _KNOWN = ("source", "target", "network", "source_ip", "target_ip")
+
+    def __init__(self, source, target, network="TBD", source_ip=None, target_ip=None, extra=None):
+        self.source = source
+        self.target = target
+        self.src_node, self.src_intf = split_endpoint(source)
+        self.dst_node, self.dst_intf = split_endpoint(target)
+        self.network = network
+        self.source_ip = source_ip
+        self.target_ip = target_ip
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, info):
+        extra = {k: v for k, v in info.items() if k not in cls._KNOWN}
+        return cls(info["source"], info["target"], info.get("network", "TBD"),
+                   info.get("source_ip"), info.get("target_ip"), extra or None)
+
+    def to_dict(self):
+        d = {"source": self.source, "target": self.target, "network": self.network}
+        if self.source_ip is not None:
+            d["source_ip"] = self.source_ip
+        if self.target_ip is not None:
+            d["target_ip"] = self.target_ip
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def side_of(self, node_id):
+        """返回 (本端接口, 对端完整端点, 本端 IP)，node_id 必须是该链路的一端"""
+        if self.src_node == node_id:
+            return self.src_intf, self.target, self.source_ip
+        return self.dst_intf, self.source, self.target_ip
+
+
+class Interface:
+    """接口索引项：记录接口被哪条链路占用，以及节点中声明的接口数据（如有）"""
+    __slots__ = ("node", "name", "link_id", "info")
+
+    def __init__(self, node, name, link_id=-1, info=None):
+        self.node = node
+        self.name = name
+        self.link_id = link_id
+        self.info = info
+
 
 class TopologyModel:
+    """
+    拓扑数据模型
+    - nodes:      设备 ID -> Node
+    - links:      链路 ID (列表下标) -> Link，删除的链路以 None 占位，保证 ID 稳定
+    - adjacency:  设备 ID -> 关联链路 ID 数组 (按链路加入顺序)
+    - interfaces: (设备 ID, 接口名) -> Interface
+    changed_* 记录自上次加载 / 保存以来改动过的设备、链路与接口，供 SQLite 存储只写入变化部分
+    """
+
     def __init__(self, project_name):
-        self.data = {
-            "topology_name": project_name,
-            "nodes": [],
-            "links": []
-        }
+        self.topology_name = project_name
+        self.meta = {}  # 其他顶层字段 (如 version / ospf_config)，保存时原样写回
+        self.nodes = {}
+        self.links = []
+        self.adjacency = {}
+        self.interfaces = {}
+        self._link_count = 0
+        self.changed_nodes = set()
+        self.changed_links = set()
+        self.changed_interfaces = set()
 
+    # ---------- 构建 ----------
     def add_node(self, node_info):
-        if node_info:
-            self.data["nodes"].append(node_info)
+        if not node_info:
+            return None
+        node = node_info if isinstance(node_info, Node) else Node.from_dict(node_info)
+        self.nodes[node.id] = node
+        self.adjacency.setdefault(node.id, array('l'))
+        self.changed_nodes.add(node.id)
+        # 索引节点中声明的接口 (1testcodes 中的 interfaces 列表格式)
+        for intf in (node.extra or {}).get("interfaces", []):
+            key = (node.id, intf.get("name"))
+            self.changed_interfaces.add(key)
+            entry = self.interfaces.get(key)
+            if entry is None:
+                self.interfaces[key] = Interface(node.id, key[1], info=intf)
+            else:
+                entry.info = intf
+        return node
 
     def add_link(self, link_info):
-        if link_info:
-            self.data["links"].append(link_info)
+        if not link_info:
+            return None
+        link = link_info if isinstance(link_info, Link) else Link.from_dict(link_info)
+        link_id = len(self.links)
+        self.links.append(link)
+        self._link_count += 1
+        self.changed_links.add(link_id)
+
+        self.adjacency.setdefault(link.src_node, array('l')).append(link_id)
+        if link.dst_node != link.src_node:
+            self.adjacency.setdefault(link.dst_node, array('l')).append(link_id)
+
+        for n_id, intf in ((link.src_node, link.src_intf), (link.dst_node, link.dst_intf)):
+            if not intf:
+                continue
+            self.changed_interfaces.add((n_id, intf))
+            entry = self.interfaces.get((n_id, intf))
+            if entry is None:
+                self.interfaces[(n_id, intf)] = Interface(n_id, intf, link_id)
+            elif entry.link_id < 0:
+                entry.link_id = link_id
+        return link_id
+
+    def remove_link(self, link_id):
+        link = self.links[link_id]
+        if link is None:
+            return None
+        self.links[link_id] = None
+        self._link_count -= 1
+        self.changed_links.add(link_id)
+        for n_id, intf in ((link.src_node, link.src_intf), (link.dst_node, link.dst_intf)):
+            ids = self.adjacency.get(n_id)
+            if ids is not None and link_id in ids:
+                ids.remove(link_id)
+            entry = self.interfaces.get((n_id, intf))
+            self.changed_interfaces.add((n_id, intf))
+            if entry is not None and entry.link_id == link_id:
+                if entry.info is None:
+                    del self.interfaces[(n_id, intf)]
+                else:
+                    entry.link_id = -1
+        return link
+
+    # ---------- 改动记录 ----------
+    def touch_node(self, node_id):
+        """设备字段被直接修改后调用 (如地址分配写入 loopback)"""
+        self.changed_nodes.add(node_id)
+
+    def touch_link(self, link_id):
+        """链路字段被直接修改后调用 (如地址分配写入 network / IP)"""
+        self.changed_links.add(link_id)
+
+    def has_changes(self):
+        return bool(self.changed_nodes or self.changed_links or self.changed_interfaces)
+
+    def clear_changes(self):
+        self.changed_nodes.clear()
+        self.changed_links.clear()
+        self.changed_interfaces.clear()
+
+    # ---------- 查询 ----------
+    def iter_links(self):
+        """按加入顺序遍历 (链路 ID, Link)，跳过已删除的链路"""
+        for link_id, link in enumerate(self.links):
+            if link is not None:
+                yield link_id, link
+
+    def links_of(self, node_id):
+        """返回与设备直接相连的链路列表，复杂度 O(度数)"""
+        links = self.links
+        return [links[i] for i in self.adjacency.get(node_id, ())]
+
+    def get_interface(self, node_id, intf_name):
+        return self.interfaces.get((node_id, intf_name))
+
+    @property
+    def link_count(self):
+        return self._link_count
+
+    # ---------- 序列化 ----------
+    @classmethod
+    def from_dict(cls, data):
+        model = cls(data.get("topology_name", ""))
+        model.meta = {k: v for k, v in data.items() if k not in ("topology_name", "nodes", "links")}
+        for node in data.get("nodes", []):
+            model.add_node(node)
+        for link in data.get("links", []):
+            model.add_link(link)
+        model.clear_changes()
+        return model
+
+    @classmethod
+    def from_records(cls, records, project_name=""):
+        """
+        由 iter_topology() 产出的记录逐条构建模型，内存中只保留模型本身与当前这一条记录
+        链路先于设备出现时同样可以处理 (add_link 会为未声明的设备建立邻接项)
+        """
+        model = cls(project_name)
+        for kind, item in records:
+            if kind == "node":
+                model.add_node(item)
+            elif kind == "link":
+                model.add_link(item)
+            elif item[0] == "topology_name":
+                model.topology_name = item[1]
+            elif item[0] not in ("nodes", "links"):
+                model.meta[item[0]] = item[1]
+        model.clear_changes()
+        return model
+
+    @classmethod
+    def load_from_json(cls, filename="data/current_topo.json", backend="auto"):
+        """流式读取拓扑文件 (backend 见 utils.json_stream.BACKENDS)"""
+        return cls.from_records(iter_topology(filename, backend))
+
+    def to_dict(self):
+        data = {"topology_name": self.topology_name}
+        data.update(self.meta)
+        data["nodes"] = [n.to_dict() for n in self.nodes.values()]
+        data["links"] = [l.to_dict() for _, l in self.iter_links()]
+        return data
 
     def save_to_json(self, filename="data/current_topo.json"):
+        """逐条写出，输出与 json.dump(self.to_dict(), indent=4) 相同，但不会先构建整个文档"""
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
\ No newline at end of file
+            write_topology(f, self.topology_name, self.meta,
+                           (n.to_dict() for n in self.nodes.values()),
+                           (l.to_dict() for _, l in self.iter_links()))
+        self.clear_changes()
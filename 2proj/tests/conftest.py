@@ -0,0 +1,81 @@
+import os
+import sys
+import random
+import pytest
+
+# 测试与脚本一样以 2proj 为根目录导入 (from utils.x import ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.topology import Link
+from utils.pipeline import TopologyPipeline
+from utils.synthetic import synthetic_lines
+from utils.ip_allocator import IPAllocator
+
+
+def _brute_force(model, failed_links=(), removed_node=None, default_cost=1):
+    """
+    Floyd-Warshall 全源最短路径，作为 SPF / 故障分析的对照：{(源, 目的): 开销}，不可达的设备对不出现
+    开销只取链路记录中的 cost，status 为 down 的链路与 failed_links 中的链路视为断开
+    """
+    ids = [n for n in model.nodes if n != removed_node]
+    inf = float("inf")
+    dist = {(a, b): (0 if a == b else inf) for a in ids for b in ids}
+    for link_id, link in model.iter_links():
+        extra = link.extra or {}
+        u, v = link.src_node, link.dst_node
+        if link_id in failed_links or str(extra.get("status", "up")).lower() == "down":
+            continue
+        if u == v or (u, v) not in dist:
+            continue
+        cost = max(1, int(extra.get("cost") or default_cost))
+        dist[u, v] = min(dist[u, v], cost)
+        dist[v, u] = min(dist[v, u], cost)
+    for k in ids:
+        for a in ids:
+            dak = dist[a, k]
+            if dak == inf:
+                continue
+            for b in ids:
+                if dak + dist[k, b] < dist[a, b]:
+                    dist[a, b] = dak + dist[k, b]
+    return {pair: d for pair, d in dist.items() if d != inf}
+
+
+@pytest.fixture
+def brute_force():
+    return _brute_force
+
+
+def _synthetic_model(shape="mesh", count=120, seed=1, allocate=False, **settings):
+    """synthetic_lines() 生成的拓扑模型；allocate=True 时再按 settings 分配地址 (不读写租约文件)"""
+    pipeline = TopologyPipeline("unused.json")
+    pipeline.parse(synthetic_lines(shape, count, seed))
+    if allocate:
+        IPAllocator(**settings).sync(pipeline.model, verbose=False)
+    return pipeline.model
+
+
+@pytest.fixture
+def synthetic_model():
+    return _synthetic_model
+
+
+def _spf_model(shape, count, seed, costs=True, down=0.1):
+    """合成拓扑，链路随机开销 / 随机断开，另加一条自环与一条指向未声明设备的链路 (均不进入 SPF 图)"""
+    model = _synthetic_model(shape, count, seed)
+    first = next(iter(model.nodes))
+    model.add_link(Link(f"{first}:lo1", f"{first}:lo2"))
+    model.add_link(Link(f"{first}:x1", "GHOST:x1"))
+    rng = random.Random(seed)
+    for _, link in model.iter_links():
+        extra = {}
+        if costs:
+            extra["cost"] = rng.randint(1, 9)
+        if rng.random() < down:
+            extra["status"] = "down"
+        link.extra = extra or None
+    return model
+
+
+@pytest.fixture
+def spf_model():
+    return _spf_model
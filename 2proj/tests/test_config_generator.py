@@ -0,0 +1,86 @@
+import os
+from utils.config_generator import generate_configs_from_model, load_manifest, DELTA_DIR
+from utils.config_bundle import open_bundle
+
+
+def _read_tree(root):
+    """{相对路径: 文件内容 (bytes)}"""
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            with open(path, 'rb') as f:
+                files[os.path.relpath(path, root)] = f.read()
+    return files
+
+
+def test_parallel_output_is_byte_identical(tmp_path, synthetic_model):
+    model = synthetic_model("mesh", 80, seed=2, allocate=True)
+    serial, parallel = str(tmp_path / "serial"), str(tmp_path / "parallel")
+    generate_configs_from_model(model, workers=1, out_dir=serial)
+    generate_configs_from_model(model, workers=3, chunksize=7, out_dir=parallel)
+    files = _read_tree(serial)
+    assert len(files) == len(model.nodes) + 1  # 每台设备一个配置 + 清单
+    assert _read_tree(parallel) == files
+
+
+def test_parallel_incremental_delta_is_byte_identical(tmp_path, synthetic_model):
+    """增量 + 差异模式：修改部分设备后，串行与并行重写的设备、差异文件与配置内容一致"""
+    model = synthetic_model("mesh", 80, seed=2, allocate=True)
+    results = []
+    for name, workers in (("serial", 1), ("parallel", 3)):
+        out_dir = str(tmp_path / name)
+        generate_configs_from_model(model, workers=workers, out_dir=out_dir)
+        results.append((out_dir, workers))
+    for link_id in range(0, len(model.links), 9):
+        model.remove_link(link_id)
+    reports = [generate_configs_from_model(model, workers=workers, chunksize=3, out_dir=out_dir, incremental=True,
+                                           delta=True) for out_dir, workers in results]
+    assert reports[0] == reports[1] and reports[0]["written"] and reports[0]["delta_lines"]
+    assert _read_tree(results[0][0]) == _read_tree(results[1][0])
+
+
+def _bundle_contents(out_dir):
+    with open_bundle(out_dir) as reader:
+        return {f"{name}.txt": reader.read_bytes(name) for name in reader.names()}
+
+
+def test_bundle_matches_per_file_output(tmp_path, synthetic_model):
+    """打包模式与逐文件模式的配置逐字节一致，增量 (未变化的设备从旧包复制) 与差异结果也一致"""
+    model = synthetic_model("mesh", 80, seed=2, allocate=True)
+    files_dir, bundle_dir = str(tmp_path / "files"), str(tmp_path / "bundle")
+    generate_configs_from_model(model, out_dir=files_dir)
+    generate_configs_from_model(model, workers=2, out_dir=bundle_dir, bundle=True)
+    configs = {k: v for k, v in _read_tree(files_dir).items() if k.endswith(".txt")}
+    assert _bundle_contents(bundle_dir) == configs
+
+    for link_id in range(1, len(model.links), 7):
+        model.remove_link(link_id)
+    reports = [generate_configs_from_model(model, out_dir=out_dir, incremental=True, delta=True, bundle=bundle)
+               for out_dir, bundle in ((files_dir, False), (bundle_dir, True))]
+    assert reports[0] == reports[1] and reports[0]["unchanged"]
+    files, bundled = _read_tree(files_dir), _read_tree(bundle_dir)
+    assert _bundle_contents(bundle_dir) == {k: v for k, v in files.items() if os.sep not in k and k.endswith(".txt")}
+    delta = lambda tree: {k: v for k, v in tree.items() if k.startswith(DELTA_DIR + os.sep)}
+    assert delta(bundled) == delta(files) and delta(files)
+
+
+def test_full_run_removes_deleted_devices(tmp_path, synthetic_model):
+    """非增量的完整生成同样要清理两次生成之间被删除的设备 (配置文件、清单与配置包中的条目)"""
+    model = synthetic_model("mesh", 40, seed=2, allocate=True)
+    files_dir, bundle_dir = str(tmp_path / "files"), str(tmp_path / "bundle")
+    generate_configs_from_model(model, out_dir=files_dir)
+    generate_configs_from_model(model, out_dir=bundle_dir, bundle=True)
+
+    gone = sorted(model.nodes)[:3]
+    for n_id in gone:
+        for link_id in [link_id for link_id, link in model.iter_links() if n_id in (link.src_node, link.dst_node)]:
+            model.remove_link(link_id)
+        del model.nodes[n_id]
+    reports = [generate_configs_from_model(model, out_dir=out_dir, bundle=bundle)
+               for out_dir, bundle in ((files_dir, False), (bundle_dir, True))]
+    assert sorted(reports[0]["removed"]) == sorted(reports[1]["removed"]) == gone
+    expected = {f"{n_id}.txt" for n_id in model.nodes}
+    assert {k for k in _read_tree(files_dir) if k.endswith(".txt")} == expected
+    assert set(load_manifest(files_dir)) == set(load_manifest(bundle_dir)) == set(model.nodes)
+    assert set(_bundle_contents(bundle_dir)) == expected
@@ -0,0 +1,49 @@
+import pytest
+from utils.spf import SPFEngine
+from utils.failure import FailureAnalyzer, LINK, DEVICE
+
+
+def _expected(brute_force, model, baseline, failed_links=(), removed_node=None):
+    """按故障后的拓扑重新计算全部设备对，返回 (失联对数, 绕远对数, 最大增幅)"""
+    after = brute_force(model, failed_links, removed_node)
+    lost = longer = max_increase = 0
+    for (src, dst), old in baseline.items():
+        if removed_node in (src, dst):
+            continue
+        new = after.get((src, dst))
+        if new is None:
+            lost += 1
+        elif new > old:
+            longer += 1
+            max_increase = max(max_increase, new - old)
+    return lost, longer, max_increase
+
+
+@pytest.mark.parametrize("shape, count, costs", [("mesh", 30, True), ("ring", 16, True), ("hub-spoke", 60, False)])
+def test_scenarios_match_brute_force(brute_force, spf_model, shape, count, costs):
+    """每个单点故障场景的统计与 "删除后整体重算" 的结果一致"""
+    model = spf_model(shape, count, seed=count, costs=costs)
+    impacts = FailureAnalyzer(SPFEngine(model)).analyze()
+    baseline = brute_force(model)
+
+    by_subject = {(impact.kind, impact.subject): impact for impact in impacts}
+    engine = SPFEngine(model)
+    expected_links = [link_id for link_id, (forward, _) in engine.link_edges.items() if engine.costs[forward] >= 0]
+    assert len(impacts) == len(expected_links) + len(model.nodes)
+    for link_id in expected_links:
+        link = model.links[link_id]
+        impact = by_subject[LINK, f"{link.source} <-> {link.target}"]
+        assert (impact.pairs_lost, impact.pairs_longer, impact.max_increase) == \
+            _expected(brute_force, model, baseline, failed_links={link_id})
+    for n_id in model.nodes:
+        impact = by_subject[DEVICE, n_id]
+        assert (impact.pairs_lost, impact.pairs_longer, impact.max_increase) == \
+            _expected(brute_force, model, baseline, removed_node=n_id)
+
+
+def test_parallel_matches_serial(spf_model):
+    model = spf_model("mesh", 40, seed=11)
+    serial = FailureAnalyzer(SPFEngine(model)).analyze(workers=1)
+    parallel = FailureAnalyzer(SPFEngine(model)).analyze(workers=2, chunksize=5)
+    key = lambda impact: (impact.kind, impact.subject)
+    assert sorted(serial, key=key) == sorted(parallel, key=key)
@@ -0,0 +1,129 @@
+import random
+import ipaddress
+import pytest
+from models.topology import Link
+from utils.ip_allocator import AddressPool, AddressPoolExhausted, IPAllocator
+
+
+def _overlaps(blocks):
+    """blocks: [(起始地址, 大小)]，返回是否存在重叠"""
+    blocks = sorted(blocks)
+    return any(a + size > b for (a, size), (b, _) in zip(blocks, blocks[1:]))
+
+
+def test_pool_random_allocate_release_never_overlaps():
+    """随机的分配 / 释放 / 预留序列：已占用的块始终对齐、在超网内且互不重叠，全部释放后合并回整个超网"""
+    rng = random.Random(7)
+    pool = AddressPool("10.0.0.0/22")
+    used = {}
+    for _ in range(3000):
+        if used and rng.random() < 0.4:
+            address = rng.choice(list(used))
+            pool.release(address, used.pop(address))
+            continue
+        prefixlen = rng.choice((30, 30, 31, 32, 28))
+        if rng.random() < 0.2:
+            size = 1 << (32 - prefixlen)
+            address = pool.base + rng.randrange(0, 1 << 10, size)
+            try:
+                pool.reserve(address, prefixlen)
+            except AddressPoolExhausted:
+                assert any(a < address + size and address < a + (1 << (32 - p)) for a, p in used.items())
+                continue
+        else:
+            try:
+                address = pool.allocate(prefixlen)
+            except AddressPoolExhausted:
+                continue
+        assert address % (1 << (32 - prefixlen)) == 0
+        assert pool.base <= address and address + (1 << (32 - prefixlen)) <= pool.base + (1 << 10)
+        used[address] = prefixlen
+        assert not _overlaps([(a, 1 << (32 - p)) for a, p in used.items()])
+    for address, prefixlen in used.items():
+        pool.release(address, prefixlen)
+    assert pool.state() == AddressPool("10.0.0.0/22").state()
+
+
+def test_pool_exhaustion_and_double_reserve():
+    pool = AddressPool("192.168.0.0/29")
+    first, second = pool.allocate(30), pool.allocate(30)
+    assert {first, second} == {pool.base, pool.base + 4}
+    with pytest.raises(AddressPoolExhausted):
+        pool.allocate(30)
+    with pytest.raises(AddressPoolExhausted):
+        pool.reserve(first, 30)
+    with pytest.raises(ValueError):
+        pool.reserve(pool.base + 2, 30)  # 未对齐
+
+
+def test_sync_leases_are_unique(synthetic_model):
+    """每条链路 / 每台设备各有一个租约，互联网段与 Loopback 互不重复，接口地址落在所属网段内"""
+    model = synthetic_model()
+    allocator = IPAllocator(supernet="172.16.0.0/20", prefixlen=30, loopback_supernet="10.0.0.0/24")
+    stats = allocator.sync(model, verbose=False)
+    assert stats["allocated"] == model.link_count
+    assert stats["loopbacks"] == len(model.nodes)
+
+    networks = [ipaddress.IPv4Network(link.network) for _, link in model.iter_links()]
+    assert len(set(networks)) == len(networks)
+    assert not _overlaps([(int(n.network_address), n.num_addresses) for n in networks])
+    for _, link in model.iter_links():
+        net = ipaddress.IPv4Network(link.network)
+        hosts = {ipaddress.IPv4Address(link.source_ip), ipaddress.IPv4Address(link.target_ip)}
+        assert len(hosts) == 2 and all(ip in net and ip not in (net.network_address, net.broadcast_address)
+                                       for ip in hosts)
+    loopbacks = [node.loopback for node in model.nodes.values()]
+    assert len(set(loopbacks)) == len(loopbacks)
+    assert "10.0.0.0" not in loopbacks
+
+    assert not allocator.sync(model, verbose=False)["changed"]
+
+
+def test_sync_reuses_released_networks_without_collision(synthetic_model):
+    """删除链路后释放的网段可被新链路复用，但不会与仍在使用的网段重复"""
+    model = synthetic_model("ring", 60)
+    # 64 个 /31：60 条链路之后只剩 4 个空闲网段，新增的 20 条链路必须复用释放的网段
+    allocator = IPAllocator(supernet="172.16.0.0/25", prefixlen=31)
+    allocator.sync(model, verbose=False)
+    for link_id in range(0, len(model.links), 3):
+        model.remove_link(link_id)
+    stats = allocator.sync(model, verbose=False)
+    assert stats["released"] == len(range(0, len(model.links), 3))
+    for i in range(20):
+        model.add_link(Link(f"S0-R{i}:new{i}", f"S0-R{i + 1}:new{i}"))
+    stats = allocator.sync(model, verbose=False)
+    assert stats["allocated"] == 20
+    networks = [link.network for _, link in model.iter_links()]
+    assert len(set(networks)) == len(networks) == len(allocator.link_leases)
+
+
+def test_lease_file_round_trip(tmp_path, synthetic_model):
+    """租约文件保存后重新加载：租约与空闲表一致，已有链路不重新分配，新增链路不与已保存的网段冲突"""
+    lease_path = str(tmp_path / "topo.leases.json")
+    settings = {"supernet": "172.16.0.0/20", "prefixlen": 30}
+    model = synthetic_model()
+    allocator = IPAllocator(**settings)
+    allocator.sync(model, verbose=False)
+    allocator.save(lease_path)
+    assert not allocator.changed_leases
+
+    restored = IPAllocator.load(lease_path, **settings)
+    assert restored.state() == allocator.state()
+    assert not restored.sync(model, verbose=False)["changed"]
+
+    for i in range(10):
+        model.add_link(Link(f"S0-R{i}:extra", f"S1-R{i + 64}:extra"))
+    stats = restored.sync(model, verbose=False)
+    assert stats["allocated"] == 10
+    assert {("link", f"S0-R{i}:extra|S1-R{i + 64}:extra") for i in range(10)} <= restored.changed_leases
+    networks = list(restored.link_leases.values())
+    assert len(set(networks)) == len(networks)
+
+
+def test_lease_file_with_other_settings_is_ignored(tmp_path, synthetic_model):
+    lease_path = str(tmp_path / "topo.leases.json")
+    allocator = IPAllocator(prefixlen=30)
+    allocator.sync(synthetic_model(count=20), verbose=False)
+    allocator.save(lease_path)
+    restored = IPAllocator.load(lease_path, prefixlen=31)
+    assert not restored.link_leases and not restored.loopback_leases
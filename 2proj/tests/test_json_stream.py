@@ -0,0 +1,67 @@
+import io
+import json
+import pytest
+from utils import json_stream
+from utils.json_stream import iter_topology, write_topology, _StreamReader, _iter_document
+
+DOCUMENT = {
+    "topology_name": "Lab \"测试\"",
+    "version": 2,
+    "nodes": [
+        {"id": "R1", "brand": "cisco", "loopback": "10.0.0.1", "cost": -0.5e-3, "tags": []},
+        {"id": "Ré2\\x", "extra": {"interfaces": [{"name": "Gi0/0", "cost": 12345678901234}]}},
+        {"id": "SW1", "flags": [True, False, None], "ratio": 1.25, "note": "line\nbreak ☃"},
+    ],
+    "ospf_config": {"area": 0, "nested": [[1, 2], [-3.0e10]]},
+    "links": [
+        {"source": "R1:g0", "target": "SW1:e1", "network": "172.16.0.0/30", "cost": 10},
+        {"source": "Ré2\\x:Gi0/0", "target": "R1:g1", "network": "TBD"},
+    ],
+    "empty": {},
+}
+
+
+def _stream(text, chunk_size):
+    return list(_StreamReader(io.StringIO(text), chunk_size).iter_topology())
+
+
+@pytest.mark.parametrize("indent", [None, 4])
+def test_every_chunk_boundary_matches_json_load(indent):
+    """任意块大小下 (记录、字符串转义、数字都可能在块边界被截断) 结果与 json.load 一致"""
+    text = json.dumps(DOCUMENT, indent=indent, ensure_ascii=False)
+    expected = list(_iter_document(json.loads(text)))
+    for chunk_size in range(1, 40):
+        assert _stream(text, chunk_size) == expected, chunk_size
+
+
+def test_numbers_split_at_buffer_end():
+    """数字恰好位于缓冲区末尾 (如 "-0." 之后才读入 "5") 时继续读入，不会提前截断"""
+    text = '{"nodes": [-0.5, 123456, 1e-7, 0], "links": []}'
+    for chunk_size in range(1, len(text)):
+        assert _stream(text, chunk_size) == [("node", -0.5), ("node", 123456), ("node", 1e-7), ("node", 0)]
+
+
+def test_empty_and_malformed_documents():
+    assert _stream("{}", 1) == []
+    assert _stream('{"nodes": [], "links": []}', 3) == []
+    for text in ('[]', '{"nodes": [1 2]}', '{"nodes": [1,'):
+        with pytest.raises(ValueError):
+            _stream(text, 4)
+
+
+@pytest.mark.parametrize("backend", ["builtin", "ijson", "orjson"])
+def test_backends_agree(tmp_path, backend):
+    if backend in ("ijson", "orjson") and getattr(json_stream, backend) is None:
+        pytest.skip(f"未安装 {backend}")
+    path = tmp_path / "topo.json"
+    path.write_text(json.dumps(DOCUMENT, indent=4, ensure_ascii=False), encoding="utf-8")
+    assert list(iter_topology(str(path), backend)) == list(_iter_document(DOCUMENT))
+
+
+@pytest.mark.parametrize("nodes, links", [(DOCUMENT["nodes"], DOCUMENT["links"]), ([], []), ([{"id": "R1"}], [])])
+def test_write_topology_matches_json_dump(nodes, links):
+    meta = {"version": 2, "ospf_config": DOCUMENT["ospf_config"], "empty": {}}
+    document = {"topology_name": DOCUMENT["topology_name"], **meta, "nodes": nodes, "links": links}
+    out = io.StringIO()
+    write_topology(out, document["topology_name"], meta, iter(nodes), iter(links))
+    assert out.getvalue() == json.dumps(document, indent=4, ensure_ascii=False)
@@ -0,0 +1,72 @@
+import pytest
+from utils.parser import InputParser, NodeRecord, LinkRecord, ParseError
+
+
+def _records(lines, strict=False):
+    parser = InputParser(strict=strict)
+    return list(parser.iter_records(lines)), parser.errors
+
+
+@pytest.mark.parametrize("line, source, target", [
+    ("R1:Gi0/0 连接 R2:Gi0/1", "R1:Gi0/0", "R2:Gi0/1"),
+    ("R1:Gi0/0连接R2:Gi0/1", "R1:Gi0/0", "R2:Gi0/1"),
+    ("R1:G0/1 connect R2:G0/1", "R1:G0/1", "R2:G0/1"),
+    ("R1:G0/1 CONNECT R2:G0/1", "R1:G0/1", "R2:G0/1"),
+    ("R1:G0/1 to R2:G0/1", "R1:G0/1", "R2:G0/1"),
+    ("R1:G0/1 - R2:G0/1", "R1:G0/1", "R2:G0/1"),
+    ("R1:G0/1-R2:G0/1", "R1:G0/1", "R2:G0/1"),
+    ("R1:G0/1 <-> R2:G0/1", "R1:G0/1", "R2:G0/1"),
+    ("  S0-LEAF4:ethernet1/2 <-> core.sw_1:Gi0/0.100  ", "S0-LEAF4:ethernet1/2", "core.sw_1:Gi0/0.100"),
+    ("FW1:Port-channel1 - R2:Po1", "FW1:Port-channel1", "R2:Po1"),
+])
+def test_valid_links(line, source, target):
+    records, errors = _records([line])
+    assert records == [LinkRecord(1, source, target)] and not errors
+    assert InputParser.parse_link_info(line) == {"source": source, "target": target, "network": "TBD"}
+
+
+@pytest.mark.parametrize("line", [
+    "R1:Gi0/0->R2:Gi0/1",      # '->' 不是连接符，不能把 '>R2' 当作设备名
+    "R1:Gi0/0 <- R2:Gi0/1",
+    "R1:Gi0/0 => R2:Gi0/1",
+    "R1 连接 R2",               # 缺少接口
+    "R1:Gi0/0 连接",
+    "R1:Gi0/0 R2:Gi0/1",       # 缺少连接符
+    "R#1:Gi0/0 - R2:Gi0/1",
+    "R1:Gi0/0 - R2:Gi 0/1",
+    "R1:Gi0/0 - R2:Gi0/1 - R3:Gi0/2",
+])
+def test_malformed_links(line):
+    records, errors = _records([line])
+    assert records == [] and len(errors) == 1 and errors[0].lineno == 1
+    assert InputParser.parse_link_info(line) is None
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("R1, Cisco, Router", ("R1", "Cisco", "Router")),
+    ("R1,Cisco,Router", ("R1", "Cisco", "Router")),
+    ("  core.sw-1 ,  Arista ,  Core Switch  ", ("core.sw-1", "Arista", "Core Switch")),
+])
+def test_valid_nodes(line, expected):
+    records, errors = _records([line])
+    assert records == [NodeRecord(1, *expected)] and not errors
+    assert InputParser.parse_device_info(line) == {"id": expected[0], "brand": expected[1].lower(),
+                                                   "type": expected[2].lower()}
+
+
+@pytest.mark.parametrize("line", ["R1, Cisco", "R1, Cisco, Router, Extra", "R 1, Cisco, Router", "R1>, Cisco, Router",
+                                  ", Cisco, Router"])
+def test_malformed_nodes(line):
+    records, errors = _records([line])
+    assert records == [] and len(errors) == 1
+    assert InputParser.parse_device_info(line) is None
+
+
+def test_comments_blank_lines_and_line_numbers():
+    lines = ["# 拓扑", "", "R1, Cisco, Router", "bad line", "R1:g0 - R2:g0"]
+    records, errors = _records(lines)
+    assert records == [NodeRecord(3, "R1", "Cisco", "Router"), LinkRecord(5, "R1:g0", "R2:g0")]
+    assert [e.lineno for e in errors] == [4]
+    with pytest.raises(ParseError) as info:
+        _records(lines, strict=True)
+    assert info.value.lineno == 4
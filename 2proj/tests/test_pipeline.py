@@ -0,0 +1,18 @@
+from utils.pipeline import TopologyPipeline
+from utils.validator import DUPLICATE_NODE
+
+
+def test_duplicates_across_batches_and_loaded_topology(tmp_path):
+    """重复声明的设备无论在同一批、之后的 'add' 批次还是已保存的拓扑中，都会被报告 (每个 ID 一次)"""
+    json_path = str(tmp_path / "topo.json")
+    pipeline = TopologyPipeline(json_path)
+    pipeline.parse(["R1, Cisco, Router", "R2, Cisco, Router", "R1, Arista, Switch"])
+    pipeline.parse(["R2, Cisco, Router", "R1, Cisco, Router", "R3, Cisco, Router"])
+    assert pipeline.duplicate_nodes == ["R1", "R2"]
+    assert sorted(v.subject for v in pipeline.validate() if v.code == DUPLICATE_NODE) == ["R1", "R2"]
+    pipeline.save()
+
+    reloaded = TopologyPipeline(json_path)
+    reloaded.load()
+    reloaded.parse(["R4, Cisco, Router", "R3, Arista, Router"])
+    assert reloaded.duplicate_nodes == ["R3"]
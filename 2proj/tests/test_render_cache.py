@@ -0,0 +1,52 @@
+import os
+from utils.render_cache import RenderCache
+from utils.renderer import TopologyRenderer
+
+
+def _renderer(tmp_path):
+    return TopologyRenderer("unused.json", layout="hierarchical", cache_dir=str(tmp_path / "cache"))
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_unchanged_output_is_skipped(synthetic_model, tmp_path):
+    model = synthetic_model("mesh", 40, seed=6)
+    output = str(tmp_path / "view.html")
+    _renderer(tmp_path).render_model(model, output)
+    renderer = _renderer(tmp_path)
+    assert renderer.render_model(model, output) == [output] and renderer.last_cached
+
+
+def test_overwritten_output_is_restored(synthetic_model, tmp_path):
+    """输出文件在两次渲染之间被改写 (或删除) 时不能跳过，需要恢复为缓存中的内容"""
+    model = synthetic_model("mesh", 40, seed=6)
+    output = str(tmp_path / "view.html")
+    _renderer(tmp_path).render_model(model, output)
+    expected = _read(output)
+
+    with open(output, "w", encoding="utf-8") as f:
+        f.write("<html>其他渲染结果</html>")
+    _renderer(tmp_path).render_model(model, output)
+    assert _read(output) == expected
+
+    os.remove(output)
+    _renderer(tmp_path).render_model(model, output)
+    assert _read(output) == expected
+
+
+def test_same_size_rewrite_is_detected(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    output = str(tmp_path / "out.js")
+    with open(output, "w") as f:
+        f.write("a")
+    cache.store("k", output, [output])
+    assert cache.restore("k", output)
+    with open(output, "w") as f:
+        f.write("b")
+    stat = os.stat(output)
+    os.utime(output, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))  # 修改时间粒度较粗的文件系统上也能区分
+    assert RenderCache(str(tmp_path / "cache")).restore("k", output)
+    assert _read(output) == "a"
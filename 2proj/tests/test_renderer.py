@@ -0,0 +1,36 @@
+import json
+from models.topology import Node
+from utils.renderer import TopologyRenderer
+
+
+def _payload(html):
+    """取出单文件页面内联的 renderTopology(...) 数据"""
+    start = html.rindex("renderTopology(") + len("renderTopology(")
+    return json.loads(html[start:html.index(");\n</script>", start)].replace("<\\/", "</"))
+
+
+def test_precomputed_page_inlines_data(synthetic_model, tmp_path):
+    model = synthetic_model("mesh", 60, seed=3)
+    model.add_node(Node("</script><b>", "cisco", "router"))
+    output = str(tmp_path / "view.html")
+    assert TopologyRenderer("unused.json", layout="hierarchical", cache_size=0).render_model(model, output) == [output]
+    with open(output, encoding="utf-8") as f:
+        html = f.read()
+    assert "</script><b>" not in html
+    data = _payload(html)
+    ids = {row[data["node_fields"].index("id")] for row in data["nodes"]}
+    assert set(model.nodes) <= ids and data["options"]["physics"] == {"enabled": False}
+
+
+def test_clustered_page_includes_cluster_script(synthetic_model, tmp_path):
+    model = synthetic_model("mesh", 80, seed=5)
+    output = str(tmp_path / "clustered.html")
+    written = TopologyRenderer("unused.json", layout="clustered", group_by="brand",
+                               cache_size=0).render_clustered(model, output)
+    with open(output, encoding="utf-8") as f:
+        html = f.read()
+    data = _payload(html)
+    assert len(data["nodes"]) == len(written) - 1 and data["options"]["physics"] == {"enabled": False}
+    # 展开脚本在数据之后，此时 network 已由 renderTopology 创建
+    assert html.index('var clusterDir = "clustered_clusters"') > html.rindex("renderTopology(")
+    assert html.count("</body>") == 1
@@ -0,0 +1,73 @@
+import random
+import pytest
+from utils.spf import SPFEngine
+
+
+def _distances(engine):
+    result = {}
+    for src in engine.ids:
+        for dst in engine.ids:
+            d = engine.distance(src, dst)
+            if d is not None:
+                result[src, dst] = d
+    return result
+
+
+def _path_cost(engine, path):
+    """沿路径逐跳取最小的有效开销，路径上不存在的边返回 None"""
+    total = 0
+    for a, b in zip(path, path[1:]):
+        s = engine.index[a]
+        hops = [engine.costs[e] for e in range(engine.offsets[s], engine.offsets[s + 1])
+                if engine.ids[engine.targets[e]] == b and engine.costs[e] >= 0]
+        if not hops:
+            return None
+        total += min(hops)
+    return total
+
+
+@pytest.mark.parametrize("shape, count, costs", [("mesh", 40, True), ("ring", 30, True), ("hub-spoke", 60, False),
+                                                 ("leaf-spine", 30, False)])
+def test_distances_match_brute_force(brute_force, spf_model, shape, count, costs):
+    model = spf_model(shape, count, seed=count, costs=costs)
+    engine = SPFEngine(model)
+    expected = brute_force(model)
+    assert _distances(engine) == expected
+    for (src, dst), d in expected.items():
+        path = engine.path(src, dst)
+        assert path[0] == src and path[-1] == dst and _path_cost(engine, path) == d
+    reachable = {(a, b) for a in engine.ids for b in engine.ids if engine.reachable(a, b)}
+    assert reachable == set(expected)
+
+
+@pytest.mark.parametrize("costs", [True, False])
+def test_update_link_matches_rebuild(brute_force, spf_model, costs):
+    """逐条断开 / 恢复链路或修改开销后的增量结果与按新状态重新计算的结果一致"""
+    model = spf_model("mesh", 35, seed=3, costs=costs, down=0)
+    engine = SPFEngine(model)
+    engine.run_all()
+    rng = random.Random(5)
+    link_ids = list(engine.link_edges)
+    for _ in range(25):
+        link_id = rng.choice(link_ids)
+        link = model.links[link_id]
+        action = rng.random()
+        if action < 0.4:
+            engine.update_link(link_id, up=False)
+            link.extra = dict(link.extra or {}, status="down")
+        elif action < 0.7:
+            cost = rng.randint(1, 4)
+            engine.update_link(link_id, cost=cost)
+            link.extra = dict(link.extra or {}, cost=cost, status="up")
+        else:
+            engine.update_link(link_id, up=True)
+            link.extra = dict(link.extra or {}, status="up", cost=engine.link_costs[link_id][0])
+        assert _distances(engine) == brute_force(model)
+
+
+def test_parallel_run_all_matches_serial(spf_model):
+    model = spf_model("mesh", 40, seed=9)
+    serial, parallel = SPFEngine(model), SPFEngine(model)
+    serial.run_all(workers=1)
+    parallel.run_all(workers=2, chunksize=7)
+    assert serial._results == parallel._results
@@ -0,0 +1,59 @@
+from utils.pipeline import TopologyPipeline
+
+LINES = [
+    "R1, Cisco, Router",
+    "R2, Cisco, Router",
+    "SW1, Arista, Switch",
+    "R1:g0 <-> R2:g0",
+    "R2:g1 <-> SW1:e1",
+    "SW1:e2 <-> R1:g2",
+]
+
+
+def _leases(allocator):
+    return dict(allocator.link_leases), dict(allocator.loopback_leases)
+
+
+def test_first_import_persists_leases(tmp_path):
+    """首次导入后数据库即为租约来源：换一个不存在的 --json 再运行也不会重新分配"""
+    json_path = str(tmp_path / "topo.json")
+    pipeline = TopologyPipeline(json_path)
+    pipeline.parse(LINES)
+    pipeline.allocate(verbose=False)
+    pipeline.save()
+    expected = _leases(pipeline.allocator)
+
+    db_path = str(tmp_path / "topo.db")
+    imported = TopologyPipeline(json_path, db_path=db_path)
+    imported.load()
+    stats = imported.allocate(verbose=False)
+    assert stats["allocated"] == 0 and stats["loopbacks"] == 0
+    imported.save()  # 没有改动，不会写入
+    imported.store.close()
+
+    reopened = TopologyPipeline(str(tmp_path / "other.json"), db_path=db_path)
+    reopened.load()
+    stats = reopened.allocate(verbose=False)
+    assert stats["allocated"] == 0 and stats["loopbacks"] == 0
+    assert _leases(reopened.allocator) == expected
+    reopened.store.close()
+
+
+def test_lease_changes_round_trip(tmp_path):
+    """增量保存的租约变化 (新增 / 释放) 重新打开数据库后保持一致"""
+    db_path = str(tmp_path / "topo.db")
+    pipeline = TopologyPipeline(str(tmp_path / "topo.json"), db_path=db_path)
+    pipeline.parse(LINES)
+    pipeline.allocate(verbose=False)
+    pipeline.save()
+    pipeline.parse(["R3, Cisco, Router", "R3:g0 <-> R1:g3"])
+    pipeline.model.remove_link(0)
+    pipeline.allocate(verbose=False)
+    pipeline.save()
+    expected = _leases(pipeline.allocator)
+    pipeline.store.close()
+
+    reopened = TopologyPipeline(str(tmp_path / "topo.json"), db_path=db_path)
+    reopened.load()
+    assert _leases(reopened.store.load_allocator()) == expected
+    reopened.store.close()
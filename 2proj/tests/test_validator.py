@@ -0,0 +1,80 @@
+import pytest
+from models.topology import TopologyModel, Node, Link
+from utils.validator import (validate_model, validate_records, has_errors, DUPLICATE_NODE, UNKNOWN_DEVICE,
+                             DUPLICATE_INTERFACE, SELF_LINK, INVALID_ADDRESS, ADDRESS_OVERLAP, DUPLICATE_IP,
+                             IP_OUTSIDE_NETWORK)
+
+
+def _model(nodes, links):
+    model = TopologyModel("test")
+    for node in nodes:
+        model.add_node(node if isinstance(node, Node) else Node(node))
+    for link in links:
+        model.add_link(link)
+    return model
+
+
+def _codes(violations):
+    return sorted((v.code, v.subject) for v in violations)
+
+
+def test_allocated_topology_is_clean(synthetic_model):
+    for prefixlen in (30, 31):
+        model = synthetic_model("mesh", 150, seed=4, allocate=True, prefixlen=prefixlen)
+        assert validate_model(model) == []
+
+
+def test_duplicate_nodes():
+    records = [("node", {"id": "R1"}), ("node", {"id": "R2"}), ("node", {"id": "R1"})]
+    assert _codes(validate_records(records)) == [(DUPLICATE_NODE, "R1")]
+    found = validate_model(_model(["R1"], []), duplicate_nodes=["R1"])
+    assert _codes(found) == [(DUPLICATE_NODE, "R1")] and not has_errors(found)
+
+
+def test_unknown_devices_and_self_links():
+    found = validate_model(_model(["R1", "R2"], [Link("R1:g0", "R3:g0"), Link("R2:g1", "R2:g2"),
+                                                 Link("R4:g0", "R4:g1")]))
+    assert _codes(found) == [(SELF_LINK, "R2:g1 <-> R2:g2"), (SELF_LINK, "R4:g0 <-> R4:g1"),
+                             (UNKNOWN_DEVICE, "R3"), (UNKNOWN_DEVICE, "R4")]
+
+
+def test_duplicate_interfaces():
+    found = validate_model(_model(["R1", "R2", "R3"], [Link("R1:g0", "R2:g0"), Link("R1:g0", "R3:g0"),
+                                                       Link("R3:g1", "R2:g0")]))
+    assert _codes(found) == [(DUPLICATE_INTERFACE, "R1:g0"), (DUPLICATE_INTERFACE, "R2:g0")]
+
+
+@pytest.mark.parametrize("network", ["10.0.0.1/30", "10.0.0.0/33", "10.0.0/30", "10.0.0.0", "300.0.0.0/30",
+                                     "10.0.0.0/3x"])
+def test_invalid_prefixes(network):
+    found = validate_model(_model(["R1", "R2"], [Link("R1:g0", "R2:g0", network)]))
+    assert _codes(found) == [(INVALID_ADDRESS, "链路 R1:g0 <-> R2:g0")]
+
+
+def test_invalid_loopback():
+    found = validate_model(_model([Node("R1", loopback="10.0.0.256")], []))
+    assert _codes(found) == [(INVALID_ADDRESS, "R1 Loopback")]
+
+
+def test_exact_and_nested_overlaps():
+    nodes = [Node("R1", loopback="10.0.0.1"), Node("R2", loopback="10.0.0.1"), Node("R3", loopback="172.16.0.5")]
+    links = [Link("R1:g0", "R2:g0", "172.16.0.0/30"),
+             Link("R1:g1", "R3:g1", "172.16.0.0/30"),    # 与上一条完全相同
+             Link("R2:g1", "R3:g0", "172.16.0.4/30"),    # 包含 R3 的 Loopback
+             Link("R1:g2", "R2:g2", "192.168.0.0/24"),
+             Link("R1:g3", "R3:g3", "192.168.0.64/30")]  # 位于上一条之内
+    found = validate_model(_model(nodes, links))
+    assert _codes(found) == [(ADDRESS_OVERLAP, "R2 Loopback"), (ADDRESS_OVERLAP, "R3 Loopback"),
+                             (ADDRESS_OVERLAP, "链路 R1:g1 <-> R3:g1"), (ADDRESS_OVERLAP, "链路 R1:g3 <-> R3:g3")]
+
+
+def test_host_addresses():
+    nodes = [Node("R1", loopback="10.0.0.1"), Node("R2"), Node("R3")]
+    links = [Link("R1:g0", "R2:g0", "172.16.0.0/30", "172.16.0.1", "172.16.0.2"),
+             Link("R2:g1", "R3:g1", "172.16.0.4/30", "172.16.0.1", "172.16.0.9"),
+             Link("R1:g1", "R3:g0", "172.16.0.8/31", "10.0.0.1", "bad")]
+    found = validate_model(_model(nodes, links))
+    assert _codes(found) == [(DUPLICATE_IP, "R1:g1"), (DUPLICATE_IP, "R2:g1"), (INVALID_ADDRESS, "R3:g0"),
+                             (IP_OUTSIDE_NETWORK, "R1:g1"), (IP_OUTSIDE_NETWORK, "R2:g1"),
+                             (IP_OUTSIDE_NETWORK, "R3:g1")]
+    assert has_errors(found)
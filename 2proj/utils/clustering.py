@@ -0,0 +1,147 @@
+import json
+import math
+import os
+import random
+from collections import Counter
+
+GROUP_MODES = ("site", "brand", "community")
+
+
+def label_propagation(model, iterations=10, seed=0):
+    """
+    标签传播社区发现，每轮 O(n + m)
+    每个设备采用邻居中出现次数最多的标签 (并列时取最小)，直到没有变化或达到轮数上限
+    返回 {设备 ID: 社区编号}
+    """
+    node_ids = list(model.adjacency)
+    labels = {n_id: i for i, n_id in enumerate(node_ids)}
+    order = node_ids[:]
+    random.Random(seed).shuffle(order)
+    links = model.links
+    for _ in range(iterations):
+        changed = False
+        for n_id in order:
+            counts = Counter()
+            for link_id in model.adjacency[n_id]:
+                link = links[link_id]
+                peer = link.dst_node if link.src_node == n_id else link.src_node
+                if peer != n_id:
+                    counts[labels[peer]] += 1
+            if not counts:
+                continue
+            best = max(counts.values())
+            label = min(l for l, c in counts.items() if c == best)
+            if label != labels[n_id]:
+                labels[n_id] = label
+                changed = True
+        if not changed:
+            break
+    # 重新编号为 0..k-1
+    remap = {}
+    return {n_id: remap.setdefault(label, len(remap)) for n_id, label in labels.items()}
+
+
+def group_nodes(model, by="site"):
+    """
+    按站点 / 品牌 / 图社区对设备分组，返回 {设备 ID: 分组名}
+    site: 使用节点的 site 字段，缺省时取设备 ID 中 '-' 之前的部分 (如 BJ-R1 -> BJ)
+    """
+    if by not in GROUP_MODES:
+        raise ValueError(f"未知的分组方式: {by}")
+    if by == "community":
+        return {n_id: f"C{c}" for n_id, c in label_propagation(model).items()}
+    groups = {}
+    for n_id in model.adjacency:
+        node = model.nodes.get(n_id)
+        if by == "brand":
+            key = str(node.brand or 'unknown') if node else 'unknown'
+        else:
+            site = (node.extra or {}).get("site") if node else None
+            key = site or (n_id.split('-', 1)[0] if '-' in n_id else 'default')
+        groups[n_id] = key
+    return groups
+
+
+def write_cluster_data(data_dir, cluster_idx, payload):
+    """每个分组单独一个 .js 数据文件，页面展开该分组时才通过 <script> 加载 (file:// 下同样可用)"""
+    path = os.path.join(data_dir, f"{cluster_idx}.js")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"loadClusterData({cluster_idx},")
+        json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+        f.write(");\n")
+    return path
+
+
+def super_node_size(count):
+    return 20 + 6 * math.log2(max(count, 1))
+
+
+# 分组视图页面中的展开 / 折叠逻辑 (由 viewer.write_page 追加在内联数据之后)
+# 双击分组节点：加载该分组的数据文件并展开；双击已展开分组中的设备：折叠回分组节点
+CLUSTER_SCRIPT = """
+<script type="text/javascript">
+  var clusterDir = %(data_dir)s;
+  var clusterData = {};
+  var expanded = {};
+  var pending = {};
+  function clusterNodeId(c) { return "cluster:" + c; }
+  function loadClusterData(c, data) {
+    clusterData[c] = data;
+    delete pending[c];
+    expandCluster(c);
+  }
+  function refreshExternal() {
+    edges.remove(edges.getIds({filter: function (e) { return e.ext; }}));
+    var added = {};
+    for (var c in expanded) {
+      clusterData[c].external.forEach(function (e) {
+        if (added[e[0]]) { return; }
+        added[e[0]] = true;
+        edges.add({id: "x" + e[0], from: e[1], to: expanded[e[3]] ? e[2] : clusterNodeId(e[3]),
+                   title: e[4], color: "#bdc3c7", width: 1.5, ext: true});
+      });
+    }
+    edges.update(edges.get({filter: function (e) { return e.agg; }}).map(function (e) {
+      return {id: e.id, hidden: !!(expanded[e.a] || expanded[e.b])};
+    }));
+  }
+  function expandCluster(c) {
+    var data = clusterData[c];
+    var cid = clusterNodeId(c);
+    var center = network.getPositions([cid])[cid] || {x: 0, y: 0};
+    expanded[c] = true;
+    nodes.remove(cid);
+    nodes.add(data.nodes.map(function (n) {
+      return Object.assign({}, n, {x: n.x + center.x, y: n.y + center.y, cluster: c, physics: false});
+    }));
+    edges.add(data.edges);
+    refreshExternal();
+  }
+  function collapseCluster(c) {
+    var data = clusterData[c];
+    var pos = network.getPositions(data.nodes.map(function (n) { return n.id; }));
+    var cx = 0, cy = 0, k = 0;
+    for (var id in pos) { cx += pos[id].x; cy += pos[id].y; k += 1; }
+    delete expanded[c];
+    edges.remove(data.edges.map(function (e) { return e.id; }));
+    nodes.remove(data.nodes.map(function (n) { return n.id; }));
+    nodes.add(Object.assign({}, data.super, {x: k ? cx / k : 0, y: k ? cy / k : 0}));
+    refreshExternal();
+  }
+  network.on("doubleClick", function (params) {
+    if (!params.nodes.length) { return; }
+    var node = nodes.get(params.nodes[0]);
+    if (node.cluster !== undefined && expanded[node.cluster]) {
+      collapseCluster(node.cluster);
+    } else if (node.clusterIndex !== undefined) {
+      var c = node.clusterIndex;
+      if (clusterData[c]) { expandCluster(c); return; }
+      if (pending[c]) { return; }
+      pending[c] = true;
+      var s = document.createElement("script");
+      s.src = clusterDir + "/" + c + ".js";
+      document.body.appendChild(s);
+    }
+  });
+</script>
+"""
@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import mmap
+import struct
+
+# 配置打包文件格式 (顺序写入一遍即可完成)：
+#   [MAGIC][设备 1 配置][设备 2 配置]...[索引 JSON {设备: [偏移, 长度]}][尾部: 索引偏移, 索引长度, MAGIC]
+# 读取时 mmap 整个文件，先读尾部定位索引，再按偏移直接切出单台设备的配置，不需要读入整个文件
+BUNDLE_NAME = "configs.bundle"
+MAGIC = b"TOPOCFG1"
+TRAILER = struct.Struct("<QQ8s")
+
+
+class BundleWriter:
+    """顺序写入配置包；先写临时文件，close() 时写入索引并原子替换目标文件"""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.index = {}
+        self._file = open(self.tmp_path, 'wb')
+        self._file.write(MAGIC)
+        self._offset = len(MAGIC)
+
+    def add(self, name, text):
+        self.add_bytes(name, text.encode('utf-8'))
+
+    def add_bytes(self, name, data):
+        self._file.write(data)
+        self.index[name] = [self._offset, len(data)]
+        self._offset += len(data)
+
+    def close(self):
+        if self._file is None:
+            return
+        index = json.dumps(self.index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self._file.write(index)
+        self._file.write(TRAILER.pack(self._offset, len(index), MAGIC))
+        self._file.close()
+        self._file = None
+        os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        """出错时丢弃临时文件，保留原来的配置包"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class BundleReader:
+    """通过 mmap 按需读取单台设备的配置"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # 空文件无法 mmap
+            self._file.close()
+            raise ValueError(f"无效的配置包: {path}")
+        if self._map[:len(MAGIC)] != MAGIC or len(self._map) < len(MAGIC) + TRAILER.size:
+            self.close()
+            raise ValueError(f"无效的配置包: {path}")
+        index_offset, index_length, magic = TRAILER.unpack(self._map[-TRAILER.size:])
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"配置包不完整: {path}")
+        self.index = json.loads(self._map[index_offset:index_offset + index_length].decode('utf-8'))
+
+    def names(self):
+        return list(self.index)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def read_bytes(self, name):
+        offset, length = self.index[name]
+        return self._map[offset:offset + length]
+
+    def read(self, name):
+        return self.read_bytes(name).decode('utf-8')
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_bundle(out_dir='configs'):
+    """打开 out_dir 中的配置包，不存在或已损坏时返回 None"""
+    path = os.path.join(out_dir, BUNDLE_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        return BundleReader(path)
+    except (OSError, ValueError):
+        return None
+
+
+if __name__ == "__main__":
+    # python utils/config_bundle.py configs/configs.bundle [设备 ID]
+    # 不带设备 ID 时列出包内所有设备
+    if len(sys.argv) < 2:
+        print("用法: python utils/config_bundle.py <配置包> [设备 ID]")
+        sys.exit(1)
+    with BundleReader(sys.argv[1]) as reader:
+        if len(sys.argv) > 2:
+            print(reader.read(sys.argv[2]))
+        else:
+            for name in reader.names():
+                print(name)
@@ -0,0 +1,140 @@
+# 两次生成之间的差异配置 (delta)
+# 按行比较、识别层级，只输出需要下发的命令：
+# - Cisco / Arista: 顶层命令与其缩进子命令视为一个块，块内增删以 "进入块 -> no/新增 -> exit" 输出
+# - Palo Alto: set 命令按路径比较，删除使用 delete，整个接口消失时只删除接口对象
+# 单值命令 (hostname、description、ip address 等) 被新值覆盖时不再输出 no / delete
+
+# 新值会直接覆盖旧值的命令前缀 (无需先 no)
+IOS_SINGLE_VALUE = ("hostname", "description", "ip address", "router-id", "clock timezone", "enable secret",
+                    "ip domain-name", "ip ssh version", "password")
+# 只能恢复默认、不能删除的物理接口 (逻辑接口可以 no interface)
+IOS_LOGICAL_INTERFACES = ("loopback", "tunnel", "vlan", "port-channel")
+# Palo Alto 中可以有多个值的属性 (set 只会追加，旧值必须显式 delete)
+PANOS_MULTI_VALUE = ("ip", "members")
+
+
+def _single_value_key(line):
+    text = line.strip()
+    for prefix in IOS_SINGLE_VALUE:
+        if text == prefix or text.startswith(prefix + " "):
+            return prefix
+    return None
+
+
+def _negate(line):
+    """no X <-> X，保留缩进"""
+    indent = line[:len(line) - len(line.lstrip())]
+    text = line.strip()
+    return indent + (text[3:] if text.startswith("no ") else "no " + text)
+
+
+def parse_ios_blocks(text):
+    """
+    解析为 {顶层命令: [子命令, ...]} (保持出现顺序)
+    以空格缩进的行属于上一个顶层命令，"exit" / "!" 结束当前块
+    """
+    blocks = {}
+    current = None
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        if line[0] == " " and current is not None:
+            blocks[current].append(line)
+        elif line.strip() in ("exit", "!"):
+            current = None
+        else:
+            current = line.strip()
+            blocks.setdefault(current, [])
+    return blocks
+
+
+def _removals(old_lines, new_lines):
+    """old 中有、new 中没有且未被新值覆盖的行，返回其否定形式"""
+    new_set = set(new_lines)
+    replaced = {_single_value_key(line) for line in new_lines} - {None}
+    return [_negate(line) for line in old_lines
+            if line not in new_set and _single_value_key(line) not in replaced]
+
+
+def _remove_block(parent):
+    if parent.startswith("interface "):
+        name = parent[len("interface "):]
+        if not name.lower().startswith(IOS_LOGICAL_INTERFACES):
+            return f"default {parent}"
+    return f"no {parent}"
+
+
+def ios_delta(old_text, new_text):
+    """Cisco / Arista 层级差异"""
+    old = parse_ios_blocks(old_text)
+    new = parse_ios_blocks(new_text)
+    removed, changed, added = [], [], []
+
+    # 已删除的顶层块 / 命令 (单值命令被覆盖的除外)
+    old_leaves = [p for p in old if p not in new and not old[p]]
+    removed.extend(_removals(old_leaves, [p for p in new if not new[p]]))
+    for parent, children in old.items():
+        if parent not in new and children:
+            removed.append(_remove_block(parent))
+
+    for parent, children in new.items():
+        if parent not in old:
+            if children:
+                added.extend([parent] + children + ["exit"])
+            else:
+                added.append(parent)
+            continue
+        # 块内子命令的增删
+        old_children = old[parent]
+        old_set = set(old_children)
+        lines = _removals(old_children, children) + [c for c in children if c not in old_set]
+        if lines:
+            changed.extend([parent] + lines + ["exit"])
+    return removed + changed + added
+
+
+def _panos_object(tokens):
+    """接口等对象的路径前缀，例如 network interface ethernet ethernet1/1"""
+    if tokens[1:4] == ["network", "interface", "ethernet"] and len(tokens) > 4:
+        return " ".join(tokens[1:5])
+    return None
+
+
+def panos_delta(old_text, new_text):
+    """Palo Alto set 命令差异"""
+    old_lines = [line.strip() for line in old_text.splitlines() if line.strip()]
+    new_lines = [line.strip() for line in new_text.splitlines() if line.strip()]
+    old_set, new_set = set(old_lines), set(new_lines)
+    new_objects = {_panos_object(line.split()) for line in new_lines}
+    new_paths = {tuple(line.split()[1:-1]) for line in new_lines}
+
+    deletes = []
+    deleted_objects = set()
+    for line in old_lines:
+        if line in new_set or not line.startswith("set "):
+            continue
+        tokens = line.split()
+        obj = _panos_object(tokens)
+        if obj is not None and obj not in new_objects:
+            if obj not in deleted_objects:  # 整个对象已不存在，删除对象本身即可
+                deleted_objects.add(obj)
+                deletes.append(f"delete {obj}")
+            continue
+        path = tuple(tokens[1:-1])
+        if path in new_paths and path and path[-1] not in PANOS_MULTI_VALUE:
+            continue  # 单值属性：新的 set 会直接覆盖
+        deletes.append("delete " + " ".join(tokens[1:]))
+    return deletes + [line for line in new_lines if line not in old_set]
+
+
+# 品牌 -> 差异算法
+DELTA_BUILDERS = {"cisco": ios_delta, "arista": ios_delta, "paloalto": panos_delta}
+
+
+def config_delta(brand, old_text, new_text):
+    """返回差异命令行列表；old_text 为 None (首次生成) 时返回全部配置行"""
+    if old_text is None:
+        return [line for line in new_text.splitlines() if line.strip()]
+    if old_text == new_text:
+        return []
+    return DELTA_BUILDERS.get(str(brand).lower(), ios_delta)(old_text, new_text)
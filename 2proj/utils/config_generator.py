@@ -1,131 +1,256 @@
-import json
 import os
 import re
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from models.topology import TopologyModel
+from utils.config_templates import get_template
+from utils.config_diff import config_delta
+from utils.config_bundle import BUNDLE_NAME, BundleWriter, open_bundle
 
-def generate_configs(json_path):
-    if not os.path.exists(json_path):
-        return
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+def prefix_to_mask(prefixlen):
+    """30 -> '255.255.255.252'"""
+    mask = (0xFFFFFFFF << (32 - prefixlen)) & 0xFFFFFFFF
+    return ".".join(str((mask >> shift) & 0xFF) for shift in (24, 16, 8, 0))
 
-    if not os.path.exists('configs'):
-        os.makedirs('configs')
+def network_prefixlen(network, default=30):
+    """从 '172.16.0.0/30' 中取前缀长度，网段未分配 (TBD) 时使用默认值"""
+    _, sep, plen = str(network).partition('/')
+    return int(plen) if sep and plen.isdigit() else default
 
-    nodes = data.get('nodes', [])
-    links = data.get('links', [])
+_MASKS = [prefix_to_mask(plen) for plen in range(33)]
 
-    for node in nodes:
-        n_id = node['id']
-        brand = node['brand'].lower()
-        n_type = node['type'].lower()
-        
+def build_device_config(n_id, brand, n_type, loopback, ports):
+    """
+    生成单台设备的配置文本
+    loopback: 已分配的 Loopback 地址，为空时按设备编号生成 (R1 -> 1.1.1.1)
+    ports: [(本端接口, 对端完整端点, 本端 IP, 前缀长度), ...]，按链路顺序排列
+    只依赖传入的参数，串行与并行模式共用此函数，保证输出逐字节一致
+    配置内容来自 config_templates 中按 品牌/角色 预编译的模板，这里只准备变量
+    """
+    if loopback:
+        loop_ip = loopback
+    else:
         # 获取设备编号用于 Loopback (例如 R1 -> 1)
-        n_num = re.search(r'\d+', n_id).group() if re.search(r'\d+', n_id) else "0"
+        n_num = re.search(r'\d+', n_id)
+        n_num = n_num.group() if n_num else "0"
         loop_ip = f"{n_num}.{n_num}.{n_num}.{n_num}"
-        
-        config = []
-
-        # ==========================================
-        # 1. 基础配置 & 管理加固 (Cisco/Arista)
-        # ==========================================
-        if brand in ['cisco', 'arista']:
-            config.extend([
-                f"hostname {n_id}",
-                "service password-encryption",
-                "enable secret Admin@1234",
-                "username admin privilege 15 secret Admin@1234",
-                # 时区设置 (PST UTC-8)
-                "clock timezone PST -8 0",
-                # 基础设施服务器
-                "ntp server 192.168.100.1",
-                "logging host 192.168.100.2",
-                "snmp-server community public RO",
-                "snmp-server host 192.168.100.3 version 2c public",
-                # SSH v2 配置
-                "ip domain-name lab.local",
-                "ip ssh version 2",
-                "line vty 0 15",
-                " password Admin@1234",
-                " login local",
-                " transport input ssh",  # 禁用 Telnet，只允许 SSH
-                "exit"
-            ])
-
-        # ==========================================
-        # 2. 接口配置 (含 IP、描述、启用)
-        # ==========================================
-        # 配置 Loopback 接口作为 Router-ID
-        if brand in ['cisco', 'arista']:
-            config.extend([
-                "interface Loopback0",
-                " description Router-ID_Loopback",
-                f" ip address {loop_ip} 255.255.255.255",
-                "exit"
-            ])
-
-        # 配置物理接口
-        node_links = [l for l in links if l['source'].startswith(n_id) or l['target'].startswith(n_id)]
-        for link in node_links:
-            is_src = link['source'].startswith(n_id)
-            local_intf = link['source'].split(':')[1] if is_src else link['target'].split(':')[1]
-            remote_full = link['target'] if is_src else link['source']
-            ip = link.get('source_ip', '0.0.0.0') if is_src else link.get('target_ip', '0.0.0.0')
-            
-            if brand in ['cisco', 'arista']:
-                config.extend([
-                    f"interface {local_intf}",
-                    f" description Connected_to_{remote_full.replace(':', '_')}", # 接口描述
-                    f" ip address {ip} 255.255.255.252",
-                    " no shutdown",
-                    "exit"
-                ])
-            elif brand == 'paloalto':
-                # Palo Alto 接口配置 (CLI)
-                config.extend([
-                    f"set network interface ethernet {local_intf} layer3 ip {ip}/30",
-                    f"set network interface ethernet {local_intf} comment Connected_to_{remote_full.replace(':', '_')}"
-                ])
-
-        # ==========================================
-        # 3. OSPF 路由配置 (Area 0)
-        # ==========================================
-        if "router" in n_type or "switch" in n_type:
-            if brand == 'cisco':
-                config.extend([
-                    "router ospf 1",
-                    f" router-id {loop_ip}",
-                    " network 0.0.0.0 255.255.255.255 area 0",
-                    "exit"
-                ])
-            elif brand == 'arista':
-                config.extend([
-                    "router ospf 1",
-                    f" router-id {loop_ip}",
-                    " network 0.0.0.0/0 area 0",
-                    "exit"
-                ])
-
-        # ==========================================
-        # 4. 防火墙特有配置 (Palo Alto)
-        # ==========================================
-        if brand == 'paloalto':
-            config.extend([
-                f"set deviceconfig system hostname {n_id}",
-                "set deviceconfig system timezone US/Pacific", # PST
-                "set deviceconfig system ntp-servers primary-ntp address 192.168.100.1",
-                "set mgt-config users admin password Admin@1234",
-                "set mgt-config users admin permissions role-based superuser yes",
-                # 安全策略: 允许内部到外部的 HTTP/HTTPS
-                "set rulebase security rules Trust-to-Untrust service [ service-http service-https ] action allow"
-            ])
-
-        # 写入文件
-        final_config_text = "\n".join(config)
-        
-        with open(f"configs/{n_id}.txt", 'w', encoding='utf-8') as cf:
-            cf.write(final_config_text)
-            
+
+    template = get_template(brand, n_type)
+    device = {"n_id": n_id, "loop_ip": loop_ip}
+    port_vars = [{"intf": local_intf, "remote": remote_full.replace(':', '_'), "ip": ip,
+                  "mask": _MASKS[plen], "plen": str(plen)}
+                 for local_intf, remote_full, ip, plen in ports]
+    return template.render(device, port_vars)
+
+# 配置模板版本号：修改 build_device_config 的输出格式后需要递增，使增量清单全部失效
+GENERATOR_VERSION = 1
+MANIFEST_NAME = ".manifest.json"
+REPORT_LIMIT = 20  # 增量模式下逐台列出的设备数上限
+DELTA_DIR = "delta"  # 差异配置子目录 (每次 delta 生成前清空，只保留最近一次的变更)
+
+def device_inputs_hash(node, links):
+    """对设备的输入 (节点记录 + 关联链路及其 IP) 做规范化哈希"""
+    payload = [GENERATOR_VERSION, node.to_dict(), [l.to_dict() for l in links]]
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def load_manifest(out_dir='configs'):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest.get('devices', {})
+
+def save_manifest(hashes, out_dir='configs'):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"version": GENERATOR_VERSION, "devices": hashes}, f, indent=1, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def device_jobs(model):
+    """将模型展开为每台设备的生成任务 (纯元组，便于跨进程传递)"""
+    for node in model.nodes.values():
+        n_id = node.id
+        # 通过邻接索引直接取本设备的链路 (按设备 ID 精确匹配，R1 不会再误匹配 R10)
+        ports = []
+        for link in model.links_of(n_id):
+            local_intf, remote_full, ip = link.side_of(n_id)
+            ports.append((local_intf, remote_full, ip or '0.0.0.0', network_prefixlen(link.network)))
+        yield n_id, node.brand or '', node.type or '', node.loopback, ports
+
+def _write_delta(out_dir, n_id, brand, old_text, new_text):
+    """把差异命令写入 <out_dir>/delta/<设备>.txt，返回差异行数 (无差异时不写文件)"""
+    lines = config_delta(brand, old_text, new_text)
+    if lines:
+        with open(os.path.join(out_dir, DELTA_DIR, f"{n_id}.txt"), 'w', encoding='utf-8') as df:
+            df.write("\n".join(lines))
+    return len(lines)
+
+def _write_device(job, out_dir='configs', delta=False):
+    """
+    写入单台设备的完整配置；delta=True 时先读取磁盘上的上一版配置，
+    把差异命令写入 <out_dir>/delta/<设备>.txt，返回差异行数 (无差异时不写文件)
+    """
+    n_id = job[0]
+    path = os.path.join(out_dir, f"{n_id}.txt")
+    final_config_text = build_device_config(*job)
+    delta_lines = 0
+    if delta:
+        old_text = None
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                old_text = f.read()
+        delta_lines = _write_delta(out_dir, n_id, job[1], old_text, final_config_text)
+    with open(path, 'w', encoding='utf-8') as cf:
+        cf.write(final_config_text)
+    return delta_lines
+
+def _write_chunk(jobs, out_dir, delta=False):
+    """子进程入口：一次处理一批设备，减少进程间通信次数"""
+    return [_write_device(job, out_dir, delta) for job in jobs]
+
+def _render_chunk(jobs):
+    """子进程入口 (打包模式)：只生成配置文本，由主进程顺序写入配置包"""
+    return [build_device_config(*job) for job in jobs]
+
+def _write_bundle(jobs, unchanged, old_bundle, out_dir, workers, chunksize, delta):
+    """
+    打包模式：所有设备配置顺序写入一个 configs.bundle (附偏移索引)，不再逐台创建文件
+    新生成的配置边生成边写入 (并行时按完成顺序逐批写入)，未变化的设备直接从旧包按字节复制
+    返回差异总行数
+    """
+    if not jobs and old_bundle is not None and len(old_bundle) == len(unchanged):
+        old_bundle.close()  # 没有任何变化，保留原包
+        return 0
+    writer = BundleWriter(os.path.join(out_dir, BUNDLE_NAME))
+    delta_lines = 0
+    try:
+        if workers <= 1 or len(jobs) <= 1:
+            batches = ([build_device_config(*job)] for job in jobs)
+            job_batches = ([job] for job in jobs)
+            pool = None
+        else:
+            if not chunksize:
+                chunksize = max(1, len(jobs) // (workers * 4))
+            chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+            pool = ProcessPoolExecutor(max_workers=workers)
+            batches = pool.map(_render_chunk, chunks)
+            job_batches = iter(chunks)
+        try:
+            for texts in batches:
+                for job, text in zip(next(job_batches), texts):
+                    n_id = job[0]
+                    if delta:
+                        old_text = old_bundle.read(n_id) if old_bundle is not None and n_id in old_bundle else None
+                        delta_lines += _write_delta(out_dir, n_id, job[1], old_text, text)
+                    writer.add(n_id, text)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        for n_id in unchanged:
+            writer.add_bytes(n_id, old_bundle.read_bytes(n_id))
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        if old_bundle is not None:
+            old_bundle.close()  # 替换前先释放旧包的 mmap (Windows 下被映射的文件无法替换)
+    writer.close()
+    return delta_lines
+
+def generate_configs(json_path, workers=1, chunksize=None, out_dir='configs', incremental=False, delta=False,
+                     bundle=False):
+    """
+    生成所有设备配置
+    workers:     并行进程数，1 为串行；None 或 0 表示使用全部 CPU 核心
+    chunksize:   每个子进程任务包含的设备数，默认按 workers 自动划分
+    incremental: 对比清单 (configs/.manifest.json) 中的输入哈希，只重写输入有变化的设备
+    delta:       与磁盘上的上一版配置比较，把需要下发的差异命令写入 configs/delta/ (按厂商生成 no / delete)
+    bundle:      所有配置写入单个 configs/configs.bundle (带偏移索引，可 mmap 按设备读取)，而不是每台一个文件
+    返回 {"written": [...], "unchanged": [...], "removed": [...], "delta_lines": 差异总行数}
+    """
+    if not os.path.exists(json_path):
+        return
+    model = TopologyModel.load_from_json(json_path)
+    return generate_configs_from_model(model, workers, chunksize, out_dir, incremental, delta, bundle)
+
+def generate_configs_from_model(model, workers=1, chunksize=None, out_dir='configs', incremental=False, delta=False,
+                                bundle=False):
+    """直接从内存中的拓扑模型生成配置，参数含义同 generate_configs"""
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    if delta:
+        delta_dir = os.path.join(out_dir, DELTA_DIR)
+        if not os.path.exists(delta_dir):
+            os.makedirs(delta_dir)
+        for stale in os.listdir(delta_dir):  # 只保留本次生成的差异
+            if stale.endswith(".txt"):
+                os.remove(os.path.join(delta_dir, stale))
+
+    # 清单记录了上一次生成的设备：增量模式用其中的哈希跳过未变化的设备，任何模式都用它找出已删除的设备
+    previous = load_manifest(out_dir)
+    old_hashes = previous if incremental else {}
+    # 打包模式下上一版配置从旧包中读取 (增量复制 / 差异比较)
+    old_bundle = open_bundle(out_dir) if bundle and (incremental or delta) else None
+    if bundle:
+        generated = lambda n_id: old_bundle is not None and n_id in old_bundle
+    else:
+        generated = lambda n_id: os.path.exists(os.path.join(out_dir, f"{n_id}.txt"))
+    new_hashes = {}
+    jobs, unchanged = [], []
+    for job in device_jobs(model):
+        n_id = job[0]
+        digest = device_inputs_hash(model.nodes[n_id], model.links_of(n_id))
+        new_hashes[n_id] = digest
+        if old_hashes.get(n_id) == digest and generated(n_id):
+            unchanged.append(n_id)
+        else:
+            jobs.append(job)
+
+    # 拓扑中已删除的设备：清理其旧配置
+    removed = [n_id for n_id in previous if n_id not in new_hashes]
+    for n_id in removed:
+        stale = os.path.join(out_dir, f"{n_id}.txt")
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    workers = workers or os.cpu_count() or 1
+
+    delta_lines = 0
+    if bundle:
+        delta_lines = _write_bundle(jobs, unchanged, old_bundle, out_dir, workers, chunksize, delta)
+    elif workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            delta_lines += _write_device(job, out_dir, delta)
+    else:
+        if not chunksize:
+            chunksize = max(1, len(jobs) // (workers * 4))
+        chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for counts in pool.map(_write_chunk, chunks, [out_dir] * len(chunks), [delta] * len(chunks)):
+                delta_lines += sum(counts)
+
+    save_manifest(new_hashes, out_dir)
+    written = [job[0] for job in jobs]
+    if incremental:
+        print(f">>> 增量生成: 重写 {len(written)} 台, 未变化 {len(unchanged)} 台, 删除 {len(removed)} 台")
+        for tag, devices in (("更新", written), ("删除", removed)):
+            for n_id in devices[:REPORT_LIMIT]:
+                print(f"  [{tag}] {n_id}")
+            if len(devices) > REPORT_LIMIT:
+                print(f"  [{tag}] ... 其余 {len(devices) - REPORT_LIMIT} 台省略")
+    elif removed:
+        print(f">>> 已清理 {len(removed)} 台拓扑中已删除设备的配置")
+    if delta:
+        print(f">>> 差异配置: 共 {delta_lines} 行，已写入 {os.path.join(out_dir, DELTA_DIR)}/")
     print(f">>> 已完成所有设备的初始化配置生成。")
+    return {"written": written, "unchanged": unchanged, "removed": removed, "delta_lines": delta_lines}
 
 if __name__ == "__main__":
-    generate_configs('data/current_topo.json')
\ No newline at end of file
+    generate_configs('data/current_topo.json')
@@ -0,0 +1,156 @@
+import string
+
+# ==========================================
+# 模板编译
+# ==========================================
+_FORMATTER = string.Formatter()
+
+
+def compile_template(lines):
+    """
+    把模板行 (含 {变量} 占位符) 编译为渲染函数 render(变量字典) -> 文本
+    解析只在编译时做一次：结果为 (字面量, 变量名) 列表，渲染时按顺序拼接，不再解析模板
+    变量值须为字符串；模板中的字面量花括号写作 {{ }}
+    """
+    parts = []
+    fields = set()
+    for literal, field, spec, conversion in _FORMATTER.parse("\n".join(lines)):
+        if literal:
+            parts.append((literal, None))
+        if field is None:
+            continue
+        if not field.isidentifier() or spec or conversion:
+            raise ValueError(f"模板变量只支持简单名称: {{{field}}}")
+        fields.add(field)
+        parts.append(("", field))
+    parts = tuple(parts)
+
+    def render(v):
+        return ''.join(literal if field is None else v[field] for literal, field in parts)
+
+    render.fields = frozenset(fields)
+    return render
+
+
+class DeviceTemplate:
+    """
+    单个 品牌/角色 的设备模板，分三段：
+    head (端口之前) / port (每个端口渲染一次) / tail (端口之后)
+    各段为空时不输出，段与段之间以换行连接
+    """
+
+    def __init__(self, head=(), port=(), tail=()):
+        self.head = compile_template(head) if head else None
+        self.port = compile_template(port) if port else None
+        self.tail = compile_template(tail) if tail else None
+
+    def render(self, device, ports):
+        """device: 设备级变量；ports: 每个端口的变量字典列表 (会与 device 合并)"""
+        blocks = []
+        if self.head is not None:
+            blocks.append(self.head(device))
+        if self.port is not None:
+            render_port = self.port
+            for port in ports:
+                blocks.append(render_port(dict(device, **port)))
+        if self.tail is not None:
+            blocks.append(self.tail(device))
+        return "\n".join(blocks)
+
+
+# ==========================================
+# 模板注册表
+# ==========================================
+ROLE_ROUTED = "routed"  # 路由器 / 交换机：启用 OSPF
+ROLE_OTHER = "other"
+TEMPLATES = {}          # (品牌, 角色) -> DeviceTemplate
+EMPTY_TEMPLATE = DeviceTemplate()  # 未知品牌：不输出任何配置
+
+
+def device_role(n_type):
+    n_type = n_type.lower()
+    return ROLE_ROUTED if "router" in n_type or "switch" in n_type else ROLE_OTHER
+
+
+def register_template(brand, role, head=(), port=(), tail=()):
+    """注册 品牌/角色 模板 (在模块加载时编译一次)；新增厂商只需再注册一组模板"""
+    TEMPLATES[(brand, role)] = DeviceTemplate(head, port, tail)
+
+
+def get_template(brand, n_type):
+    return TEMPLATES.get((brand.lower(), device_role(n_type)), EMPTY_TEMPLATE)
+
+
+# ==========================================
+# Cisco / Arista
+# ==========================================
+# 1. 基础配置 & 管理加固
+IOS_BASE = (
+    "hostname {n_id}",
+    "service password-encryption",
+    "enable secret Admin@1234",
+    "username admin privilege 15 secret Admin@1234",
+    "clock timezone PST -8 0",                           # 时区设置 (PST UTC-8)
+    "ntp server 192.168.100.1",                          # 基础设施服务器
+    "logging host 192.168.100.2",
+    "snmp-server community public RO",
+    "snmp-server host 192.168.100.3 version 2c public",
+    "ip domain-name lab.local",                          # SSH v2 配置
+    "ip ssh version 2",
+    "line vty 0 15",
+    " password Admin@1234",
+    " login local",
+    " transport input ssh",                              # 禁用 Telnet，只允许 SSH
+    "exit",
+    # 2. Loopback 接口作为 Router-ID
+    "interface Loopback0",
+    " description Router-ID_Loopback",
+    " ip address {loop_ip} 255.255.255.255",
+    "exit",
+)
+IOS_PORT = (
+    "interface {intf}",
+    " description Connected_to_{remote}",
+    " ip address {ip} {mask}",
+    " no shutdown",
+    "exit",
+)
+# 3. OSPF 路由配置 (Area 0)
+CISCO_OSPF = (
+    "router ospf 1",
+    " router-id {loop_ip}",
+    " network 0.0.0.0 255.255.255.255 area 0",
+    "exit",
+)
+ARISTA_OSPF = (
+    "router ospf 1",
+    " router-id {loop_ip}",
+    " network 0.0.0.0/0 area 0",
+    "exit",
+)
+
+register_template("cisco", ROLE_ROUTED, IOS_BASE, IOS_PORT, CISCO_OSPF)
+register_template("cisco", ROLE_OTHER, IOS_BASE, IOS_PORT)
+register_template("arista", ROLE_ROUTED, IOS_BASE, IOS_PORT, ARISTA_OSPF)
+register_template("arista", ROLE_OTHER, IOS_BASE, IOS_PORT)
+
+# ==========================================
+# Palo Alto (set 命令形式)
+# ==========================================
+PANOS_PORT = (
+    "set network interface ethernet {intf} layer3 ip {ip}/{plen}",
+    "set network interface ethernet {intf} comment Connected_to_{remote}",
+)
+# 4. 防火墙特有配置
+PANOS_SYSTEM = (
+    "set deviceconfig system hostname {n_id}",
+    "set deviceconfig system timezone US/Pacific",       # PST
+    "set deviceconfig system ntp-servers primary-ntp address 192.168.100.1",
+    "set mgt-config users admin password Admin@1234",
+    "set mgt-config users admin permissions role-based superuser yes",
+    # 安全策略: 允许内部到外部的 HTTP/HTTPS
+    "set rulebase security rules Trust-to-Untrust service [ service-http service-https ] action allow",
+)
+
+register_template("paloalto", ROLE_ROUTED, port=PANOS_PORT, tail=PANOS_SYSTEM)
+register_template("paloalto", ROLE_OTHER, port=PANOS_PORT, tail=PANOS_SYSTEM)
@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import time
+import heapq
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from utils.spf import SPFEngine, INF, DOWN
+
+# 单点故障 (what-if) 分析：依次断开每条链路 / 每台设备，统计失联与绕远的设备对
+# - 基线：全部源设备的最短路径树 (SPFEngine.run_all)
+# - 倒排索引：半边 -> 以它为树边的源设备；不在列表中的源，其最短路径树不受该故障影响，直接沿用基线
+# - 受影响的源只修复故障点下方的子树：子树外的距离不变，子树内的节点先从子树外的邻居取初值，
+#   再在子树内做一次 Dijkstra，代价与子树大小成正比而不是与整个拓扑成正比
+# - 各场景相互独立，按批分发到进程池，基线在每个子进程中只传递一次
+LINK = "link"
+DEVICE = "device"
+EXAMPLE_LIMIT = 5  # 每个场景保留的示例设备对数
+
+# pairs_lost / pairs_longer 为有序设备对 (源 -> 目的) 的数量，max_increase 为开销的最大增幅
+# examples: [(源, 目的, 原开销, 新开销 (失联为 None)), ...]
+Impact = namedtuple("Impact", "kind subject pairs_lost pairs_longer max_increase sources examples")
+
+_STATE = None  # 子进程中的基线数据 (见 _init_state)
+
+
+def _init_state(state):
+    global _STATE
+    _STATE = state
+
+
+def _subtree(roots, pred, offsets, targets):
+    """最短路径树中 roots 及其全部后代 (子节点 = 树边 pred[w] 由父节点出发的邻居)"""
+    nodes = list(roots)
+    for x in nodes:
+        for e in range(offsets[x], offsets[x + 1]):
+            if pred[targets[e]] == e:
+                nodes.append(targets[e])
+    return nodes
+
+
+def _repair(source, dist, pred, roots, failed, removed):
+    """
+    在故障 (failed 半边断开 / removed 设备移除) 后修复 source 的最短路径树，
+    返回 [(子树节点, 原开销, 新开销), ...]，只包含距离变化的节点
+    """
+    offsets, targets, costs, edge_reverse = _STATE[:4]
+    tree = _subtree(roots, pred, offsets, targets)
+    inside = set(tree)
+    new = {}
+    heap = []
+    # 子树内节点的初值：来自子树外 (距离不变) 的邻居
+    for w in tree:
+        best = INF
+        for e in range(offsets[w], offsets[w + 1]):
+            u = targets[e]
+            r = edge_reverse[e]  # u -> w
+            if u in inside or u == removed or r in failed or costs[r] == DOWN or dist[u] == INF:
+                continue
+            if dist[u] + costs[r] < best:
+                best = dist[u] + costs[r]
+        new[w] = best
+        if best != INF:
+            heap.append((best, w))
+    heapq.heapify(heap)
+    while heap:
+        d, w = heapq.heappop(heap)
+        if d > new[w]:
+            continue
+        for e in range(offsets[w], offsets[w + 1]):
+            x = targets[e]
+            c = costs[e]
+            if x not in inside or c == DOWN or e in failed:
+                continue
+            if d + c < new[x]:
+                new[x] = d + c
+                heapq.heappush(heap, (d + c, x))
+    return [(w, dist[w], new[w]) for w in tree if new[w] != dist[w]]
+
+
+def _run_scenario(scenario):
+    """scenario: (LINK, 链路 ID, (半边, 半边)) 或 (DEVICE, 设备下标, 出边半边列表)"""
+    offsets, targets, costs, edge_reverse, dists, preds, users = _STATE
+    kind, key, edges = scenario
+    if kind == LINK:
+        failed, removed = set(edges), -1
+    else:
+        failed, removed = set(edges) | {edge_reverse[e] for e in edges}, key
+    sources = set()
+    for e in edges:
+        sources.update(users[e])
+
+    lost = longer = max_increase = 0
+    lost_examples, longer_examples = [], []
+    for s in sorted(sources):
+        if s == removed:
+            continue
+        dist, pred = dists[s], preds[s]
+        roots = [targets[e] for e in edges if pred[targets[e]] == e]
+        for w, old, new in _repair(s, dist, pred, roots, failed, removed):
+            if new == INF:
+                lost += 1
+                if len(lost_examples) < EXAMPLE_LIMIT:
+                    lost_examples.append((s, w, old, None))
+            else:
+                longer += 1
+                max_increase = max(max_increase, new - old)
+                if len(longer_examples) < EXAMPLE_LIMIT:
+                    longer_examples.append((s, w, old, new))
+    examples = (lost_examples + longer_examples)[:EXAMPLE_LIMIT]
+    return kind, key, lost, longer, max_increase, len(sources), examples
+
+
+def _run_chunk(scenarios):
+    return [_run_scenario(s) for s in scenarios]
+
+
+class FailureAnalyzer:
+    """
+    基于 SPFEngine 基线的单点故障分析
+    analyze(links=True, devices=True, workers=1) 返回 Impact 列表 (按失联设备对数、绕远设备对数降序)
+    """
+
+    def __init__(self, engine, workers=1):
+        self.engine = engine
+        engine.run_all(workers)
+        # 倒排索引：半边 -> 以它为树边的源设备
+        self.users = [array('i') for _ in range(len(engine.targets))]
+        users = self.users
+        for s, (_, pred) in sorted(engine._results.items()):
+            for e in pred:
+                if e >= 0:
+                    users[e].append(s)
+
+    def _state(self):
+        engine = self.engine
+        n = len(engine.ids)
+        dists = [engine._results[s][0] for s in range(n)]
+        preds = [engine._results[s][1] for s in range(n)]
+        return (engine.offsets, engine.targets, engine.costs, engine.edge_reverse, dists, preds, self.users)
+
+    def scenarios(self, links=True, devices=True):
+        engine = self.engine
+        result = []
+        if links:
+            for link_id, (forward, backward) in engine.link_edges.items():
+                if engine.costs[forward] != DOWN:  # 已断开的链路不再作为场景
+                    result.append((LINK, link_id, (forward, backward)))
+        if devices:
+            for i in range(len(engine.ids)):
+                result.append((DEVICE, i, tuple(range(engine.offsets[i], engine.offsets[i + 1]))))
+        return result
+
+    def _impact(self, raw):
+        engine = self.engine
+        kind, key, lost, longer, max_increase, sources, examples = raw
+        if kind == LINK:
+            link = engine.model.links[key]
+            subject = f"{link.source} <-> {link.target}"
+        else:
+            subject = engine.ids[key]
+        examples = [(engine.ids[s], engine.ids[t], old, new) for s, t, old, new in examples]
+        return Impact(kind, subject, lost, longer, max_increase, sources, examples)
+
+    def analyze(self, links=True, devices=True, workers=1, chunksize=None):
+        """
+        运行全部单点故障场景
+        workers: 并行进程数，1 为串行；None 或 0 表示使用全部 CPU 核心
+        """
+        scenarios = self.scenarios(links, devices)
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(scenarios) <= 1:
+            _init_state(self._state())
+            try:
+                raw = [_run_scenario(s) for s in scenarios]
+            finally:
+                _init_state(None)
+        else:
+            if not chunksize:
+                chunksize = max(1, len(scenarios) // (workers * 8))
+            chunks = [scenarios[i:i + chunksize] for i in range(0, len(scenarios), chunksize)]
+            raw = []
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_state,
+                                     initargs=(self._state(),)) as pool:
+                for results in pool.map(_run_chunk, chunks):
+                    raw.extend(results)
+        impacts = [self._impact(r) for r in raw]
+        impacts.sort(key=lambda i: (i.pairs_lost, i.pairs_longer, i.max_increase), reverse=True)
+        return impacts
+
+
+def analyze_failures(model, links=True, devices=True, workers=1):
+    """便捷入口：由拓扑模型直接计算单点故障影响"""
+    return FailureAnalyzer(SPFEngine(model), workers).analyze(links, devices, workers)
+
+
+def format_impacts(impacts, limit=20):
+    """汇总：造成失联 / 绕远的场景数，并列出影响最大的前 limit 个场景"""
+    lost = [i for i in impacts if i.pairs_lost]
+    longer = [i for i in impacts if i.pairs_longer and not i.pairs_lost]
+    lines = [f"单点故障场景 {len(impacts)} 个: 造成失联 {len(lost)} 个, 只造成绕远 {len(longer)} 个, "
+             f"无影响 {len(impacts) - len(lost) - len(longer)} 个"]
+    for impact in impacts[:limit]:
+        if not (impact.pairs_lost or impact.pairs_longer):
+            break
+        tag = "链路" if impact.kind == LINK else "设备"
+        lines.append(f"  [{tag}] {impact.subject}: 失联 {impact.pairs_lost} 对, 绕远 {impact.pairs_longer} 对 "
+                     f"(最大增加 {impact.max_increase}), 受影响的源 {impact.sources} 台")
+        for src, dst, old, new in impact.examples[:2]:
+            lines.append(f"      {src} -> {dst}: {old} -> {'不可达' if new is None else new}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python -m utils.failure data/current_topo.json [--links | --devices] [--workers N] [--json]
+    # 默认同时分析链路与设备故障；--json 时每行输出一个场景
+    if len(sys.argv) < 2:
+        print("用法: python -m utils.failure <拓扑 JSON> [--links | --devices] [--workers N] [--json]")
+        sys.exit(1)
+    from models.topology import TopologyModel
+    args = sys.argv[2:]
+    workers = int(args[args.index("--workers") + 1]) if "--workers" in args else 1
+    only_links, only_devices = "--links" in args, "--devices" in args
+    start = time.perf_counter()
+    found = analyze_failures(TopologyModel.load_from_json(sys.argv[1]), links=not only_devices,
+                             devices=not only_links, workers=workers)
+    if "--json" in args:
+        for impact in found:
+            print(json.dumps(impact._asdict(), ensure_ascii=False))
+    else:
+        print(format_impacts(found))
+        print(f">>> 用时 {time.perf_counter() - start:.2f}s")
@@ -1,48 +1,332 @@
+import heapq
+import ipaddress
 import json
-import re
 import os
+from models.topology import TopologyModel
 
-def allocate_ips(json_path):
+# 默认地址规划：互联地址与 Loopback 使用独立的超网，均可通过参数覆盖
+DEFAULT_P2P_SUPERNET = "172.16.0.0/12"      # 约 26 万条 /30 互联链路
+DEFAULT_LOOPBACK_SUPERNET = "10.0.0.0/8"    # Loopback /32
+
+
+class AddressPoolExhausted(RuntimeError):
+    """地址池中已没有满足要求的空闲块"""
+
+
+class AddressPool:
+    """
+    基于伙伴算法 (buddy allocator) 的地址池
+    - 空闲空间按前缀长度分层记录：每层一个最小堆 (取最低地址) + 一个集合 (成员判断)
+    - 分配时从最接近的层取块并逐级对半拆分，释放时与伙伴块逐级合并
+    - 每次分配 / 释放 / 预留的代价为 O(层数 × log n)，顺序分配时每层只保留常数个空闲块
+    地址在内部以相对超网起始地址的整数偏移表示
+    """
+
+    def __init__(self, supernet):
+        net = ipaddress.ip_network(supernet)
+        if net.version != 4:
+            raise ValueError(f"仅支持 IPv4 超网: {supernet}")
+        self.supernet = net
+        self.base = int(net.network_address)
+        self.prefixlen = net.prefixlen
+        self._heaps = {p: [] for p in range(self.prefixlen, 33)}
+        self._free = {p: set() for p in range(self.prefixlen, 33)}
+        self._add_free(self.prefixlen, 0)
+
+    @staticmethod
+    def _size(prefixlen):
+        return 1 << (32 - prefixlen)
+
+    def _add_free(self, prefixlen, offset):
+        self._free[prefixlen].add(offset)
+        heapq.heappush(self._heaps[prefixlen], offset)
+
+    def _pop_free(self, prefixlen):
+        # 堆中可能残留已被合并 / 预留的块 (惰性删除)，以集合为准
+        heap, free = self._heaps[prefixlen], self._free[prefixlen]
+        while heap:
+            offset = heapq.heappop(heap)
+            if offset in free:
+                free.remove(offset)
+                return offset
+        return None
+
+    def _check_prefix(self, prefixlen):
+        if not self.prefixlen <= prefixlen <= 32:
+            raise ValueError(f"前缀 /{prefixlen} 超出地址池 {self.supernet} 的范围")
+
+    def allocate(self, prefixlen):
+        """分配一个 /prefixlen 的块，返回其网络地址 (整数)"""
+        self._check_prefix(prefixlen)
+        level = prefixlen
+        offset = None
+        while level >= self.prefixlen:
+            offset = self._pop_free(level)
+            if offset is not None:
+                break
+            level -= 1
+        if offset is None:
+            raise AddressPoolExhausted(f"地址池 {self.supernet} 已无可用的 /{prefixlen}")
+        # 逐级拆分，右半部分放回空闲层
+        while level < prefixlen:
+            level += 1
+            self._add_free(level, offset + self._size(level))
+        return self.base + offset
+
+    def reserve(self, address, prefixlen):
+        """预留指定的块 (用于保留已有的分配)，块已被占用时抛出 AddressPoolExhausted"""
+        self._check_prefix(prefixlen)
+        offset = int(address) - self.base
+        size = self._size(prefixlen)
+        if offset < 0 or offset + size > self._size(self.prefixlen) or offset % size:
+            raise ValueError(f"{ipaddress.IPv4Address(int(address))}/{prefixlen} 不是 {self.supernet} 内的对齐块")
+        # 自下而上查找包含该块的空闲祖先
+        level = prefixlen
+        while level >= self.prefixlen:
+            ancestor = offset & ~(self._size(level) - 1)
+            if ancestor in self._free[level]:
+                break
+            level -= 1
+        else:
+            raise AddressPoolExhausted(f"{ipaddress.IPv4Address(int(address))}/{prefixlen} 已被占用")
+        self._free[level].remove(ancestor)
+        # 自上而下拆分，保留不含目标块的一半
+        while level < prefixlen:
+            level += 1
+            half = self._size(level)
+            if offset < ancestor + half:
+                self._add_free(level, ancestor + half)
+            else:
+                self._add_free(level, ancestor)
+                ancestor += half
+        return int(address)
+
+    def state(self):
+        """导出空闲表 (每层的空闲偏移)，用于持久化；体积与空闲块数量成正比，而不是与已分配数量成正比"""
+        return {str(p): sorted(free) for p, free in self._free.items() if free}
+
+    @classmethod
+    def from_state(cls, supernet, state):
+        pool = cls(supernet)
+        pool._free[pool.prefixlen].clear()
+        pool._heaps[pool.prefixlen].clear()
+        for p, offsets in state.items():
+            p = int(p)
+            pool._check_prefix(p)
+            pool._free[p].update(offsets)
+            pool._heaps[p] = sorted(pool._free[p])  # 有序列表本身就是合法的最小堆
+        return pool
+
+    def release(self, address, prefixlen):
+        """归还一个块，并与空闲的伙伴块逐级合并"""
+        self._check_prefix(prefixlen)
+        offset = int(address) - self.base
+        level = prefixlen
+        while level > self.prefixlen:
+            buddy = offset ^ self._size(level)
+            if buddy not in self._free[level]:
+                break
+            self._free[level].remove(buddy)
+            offset = min(offset, buddy)
+            level -= 1
+        self._add_free(level, offset)
+
+
+def link_addresses(network, prefixlen):
+    """根据互联网段返回 (源端 IP, 目的端 IP)：/31 使用两个地址，/30 跳过网络地址"""
+    first = network if prefixlen == 31 else network + 1
+    return str(ipaddress.IPv4Address(first)), str(ipaddress.IPv4Address(first + 1))
+
+
+def link_key(link):
+    return f"{link.source}|{link.target}"
+
+
+def default_lease_path(json_path):
+    """data/current_topo.json -> data/current_topo.leases.json"""
+    return os.path.splitext(json_path)[0] + ".leases.json"
+
+
+class IPAllocator:
+    """
+    持久化的增量地址分配器
+    - 租约表: 链路 (source|target) -> 互联网段，设备 ID -> Loopback
+    - 与租约表一同保存两个地址池的空闲表，重新加载时无需逐条重放租约
+    - sync() 只为新增 / 未分配地址的链路和设备分配地址，释放已删除对象的租约，已有分配保持不变
+    - changed_leases 记录自上次保存以来变化的租约 ("link"/"loopback", 键)，供 SQLite 存储增量写入
+    """
+    LEASE_VERSION = 1
+
+    def __init__(self, supernet=DEFAULT_P2P_SUPERNET, prefixlen=30,
+                 loopback_supernet=DEFAULT_LOOPBACK_SUPERNET):
+        if prefixlen not in (30, 31):
+            raise ValueError("互联网段只支持 /30 或 /31")
+        self.supernet = supernet
+        self.prefixlen = prefixlen
+        self.loopback_supernet = loopback_supernet
+        self.link_leases = {}
+        self.loopback_leases = {}
+        self.changed_leases = set()
+        self.p2p_pool = AddressPool(supernet)
+        self.loop_pool = AddressPool(loopback_supernet)
+        self.loop_pool.reserve(self.loop_pool.base, 32)  # 不使用超网的网络地址作为 Loopback
+
+    def _settings(self):
+        return {"supernet": self.supernet, "prefixlen": self.prefixlen,
+                "loopback_supernet": self.loopback_supernet}
+
+    @classmethod
+    def load(cls, lease_path, **settings):
+        """读取租约文件；文件不存在或地址规划参数已改变时，返回空的分配器 (全部重新分配)"""
+        if not lease_path or not os.path.exists(lease_path):
+            return cls(**settings)
+        try:
+            with open(lease_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"警告: 租约文件 {lease_path} 无法读取 ({e})，将重新分配全部地址。")
+            return cls(**settings)
+        return cls.restore(saved, lease_path, **settings)
+
+    @classmethod
+    def restore(cls, saved, source, **settings):
+        """由 state() 格式的数据恢复分配器；版本或地址规划参数不一致时返回空的分配器"""
+        allocator = cls(**settings)
+        if saved.get("version") != cls.LEASE_VERSION or saved.get("settings") != allocator._settings():
+            print(f"警告: 租约 {source} 的地址规划与当前参数不一致，将重新分配全部地址。")
+            return allocator
+        allocator.link_leases = saved["links"]
+        allocator.loopback_leases = saved["loopbacks"]
+        allocator.p2p_pool = AddressPool.from_state(allocator.supernet, saved["pools"]["p2p"])
+        allocator.loop_pool = AddressPool.from_state(allocator.loopback_supernet, saved["pools"]["loopback"])
+        return allocator
+
+    def state(self, leases=True):
+        """导出持久化数据；leases=False 时不含逐条租约 (只有版本、参数与地址池空闲表)"""
+        data = {"version": self.LEASE_VERSION, "settings": self._settings()}
+        if leases:
+            data["links"] = self.link_leases
+            data["loopbacks"] = self.loopback_leases
+        data["pools"] = {"p2p": self.p2p_pool.state(), "loopback": self.loop_pool.state()}
+        return data
+
+    def save(self, lease_path):
+        tmp_path = lease_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state(), f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, lease_path)
+        self.changed_leases.clear()
+
+    def _adopt(self, pool, network, prefixlen):
+        """尝试把拓扑中已有的地址纳入租约 (例如手工指定的地址)，冲突或不在地址池内时返回 False"""
+        try:
+            pool.reserve(network, prefixlen)
+            return True
+        except (ValueError, AddressPoolExhausted):
+            return False
+
+    def sync(self, model, verbose=True):
+        """
+        使模型的地址与租约表一致，返回本次的变化统计
+        {"allocated": 新分配链路数, "released": 释放链路数, "loopbacks": 新分配 Loopback 数, ...}
+        """
+        stats = {"allocated": 0, "released": 0, "loopbacks": 0, "loopbacks_released": 0, "updated": 0}
+
+        # --- Loopback ---
+        for node in model.nodes.values():
+            leased = self.loopback_leases.get(node.id)
+            if leased is None:
+                address = None
+                if node.loopback:
+                    try:
+                        address = int(ipaddress.IPv4Address(node.loopback))
+                    except ValueError:
+                        address = None
+                if address is None or not self._adopt(self.loop_pool, address, 32):
+                    address = self.loop_pool.allocate(32)
+                leased = str(ipaddress.IPv4Address(address))
+                self.loopback_leases[node.id] = leased
+                self.changed_leases.add(("loopback", node.id))
+                stats["loopbacks"] += 1
+            if node.loopback != leased:
+                node.loopback = leased
+                model.touch_node(node.id)
+                stats["updated"] += 1
+        for n_id in [n for n in self.loopback_leases if n not in model.nodes]:
+            self.loop_pool.release(int(ipaddress.IPv4Address(self.loopback_leases.pop(n_id))), 32)
+            self.changed_leases.add(("loopback", n_id))
+            stats["loopbacks_released"] += 1
+
+        # --- 互联链路 ---
+        seen = set()
+        for link_id, link in model.iter_links():
+            key = link_key(link)
+            seen.add(key)
+            leased = self.link_leases.get(key)
+            if leased is None:
+                network = None
+                if link.network and link.network.upper() != 'TBD':
+                    try:
+                        net = ipaddress.IPv4Network(link.network)
+                        if net.prefixlen == self.prefixlen and self._adopt(self.p2p_pool, int(net.network_address), net.prefixlen):
+                            network = int(net.network_address)
+                    except ValueError:
+                        network = None
+                if network is None:
+                    network = self.p2p_pool.allocate(self.prefixlen)
+                leased = f"{ipaddress.IPv4Address(network)}/{self.prefixlen}"
+                self.link_leases[key] = leased
+                self.changed_leases.add(("link", key))
+                stats["allocated"] += 1
+                if verbose:
+                    print(f"  链路 {link.src_node} <-> {link.dst_node}: 子网 {leased}")
+            if link.network != leased or link.source_ip is None or link.target_ip is None:
+                network = int(ipaddress.IPv4Network(leased).network_address)
+                link.network = leased
+                link.source_ip, link.target_ip = link_addresses(network, self.prefixlen)
+                model.touch_link(link_id)
+                stats["updated"] += 1
+        for key in [k for k in self.link_leases if k not in seen]:
+            net = ipaddress.IPv4Network(self.link_leases.pop(key))
+            self.p2p_pool.release(int(net.network_address), net.prefixlen)
+            self.changed_leases.add(("link", key))
+            stats["released"] += 1
+            if verbose:
+                print(f"  释放 {key.replace('|', ' <-> ')}: 子网 {net}")
+
+        stats["changed"] = any(stats[k] for k in ("allocated", "released", "loopbacks", "loopbacks_released", "updated"))
+        return stats
+
+
+def allocate_ips(json_path, supernet=DEFAULT_P2P_SUPERNET, prefixlen=30,
+                 loopback_supernet=DEFAULT_LOOPBACK_SUPERNET, verbose=True, lease_path=None):
+    """
+    为链路分配互联网段 (/30 或 /31)，为设备分配 Loopback (/32)
+    租约保存在 lease_path (默认与拓扑文件同名的 .leases.json)，再次运行时只处理新增 / 删除的对象
+    有变化时才写回 JSON：链路的 network/source_ip/target_ip，节点的 loopback
+    """
     if not os.path.exists(json_path):
         print(f"错误: 找不到文件 {json_path}")
         return
 
-    with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    def get_node_info(node_id):
-        # 使用正则表达式提取 ID 中的数字，例如 "R1" -> 1, "FW7" -> 7
-        match = re.search(r'\d+', node_id)
-        return int(match.group()) if match else 0
-
-    print("\n[IP 分配启动] 正在根据设备 ID 计算 192.168.x.y/30 地址...")
-
-    for link in data.get('links', []):
-        # 提取源和目的节点 ID (例如 R1:Gi0/0 -> R1)
-        src_node = link['source'].split(':')[0]
-        dst_node = link['target'].split(':')[0]
-        
-        # 获取设备编号 (y1, y2)
-        y1 = get_node_info(src_node)
-        y2 = get_node_info(dst_node)
-        
-        # 按照规则 2 计算 x (两台设备代码组合，通常从小到大排序以保证子网一致)
-        # 例如 R1和R2连接，x = 12；R2和R1连接，x 依然是 12
-        ids = sorted([y1, y2])
-        x = int(f"{ids[0]}{ids[1]}")
-        
-        # 规则 1 & 3: 生成网络地址和具体的接口 IP
-        # 网络地址通常为 .0 (在 /30 中，这里我们简化处理，将 x 作为第三段)
-        link['network'] = f"192.168.{x}.0/30"
-        link['source_ip'] = f"192.168.{x}.{y1}"
-        link['target_ip'] = f"192.168.{x}.{y2}"
-        
-        print(f"  链路 {src_node} <-> {dst_node}: 子网 192.168.{x}.0/30 | {src_node}: .{y1} | {dst_node}: .{y2}")
+    lease_path = lease_path or default_lease_path(json_path)
+    allocator = IPAllocator.load(lease_path, supernet=supernet, prefixlen=prefixlen,
+                                 loopback_supernet=loopback_supernet)
+    model = TopologyModel.load_from_json(json_path)
+
+    print(f"\n[IP 分配启动] 正在从 {supernet} 分配 /{prefixlen} 互联地址，从 {loopback_supernet} 分配 Loopback...")
+    stats = allocator.sync(model, verbose=verbose)
+
+    if not stats["changed"]:
+        print("\n[成功] 地址分配无变化，JSON 文件保持不变。")
+        return stats
 
     # 写回文件
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4)
-    print("\n[成功] IP 地址已成功写入 JSON 文件。")
+    model.save_to_json(json_path)
+    allocator.save(lease_path)
+    print(f"\n[成功] 新分配 {stats['allocated']} 条链路、{stats['loopbacks']} 个 Loopback，"
+          f"释放 {stats['released']} 条链路，结果已写入 JSON 文件。")
+    return stats
 
 if __name__ == "__main__":
-    allocate_ips('data/current_topo.json')
\ No newline at end of file
+    allocate_ips('data/current_topo.json')
@@ -0,0 +1,144 @@
+import math
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 为可选依赖，缺失时只能使用层次布局
+    np = None
+
+# 超过该节点数时 auto 模式改用层次布局 (力导向的斥力计算为 O(n²))
+FORCE_LAYOUT_LIMIT = 3000
+
+
+def _graph_index(node_ids, edges):
+    """节点 ID -> 下标，并把边转换为下标对 (忽略自环和未知节点)"""
+    index = {n_id: i for i, n_id in enumerate(node_ids)}
+    pairs = [(index[u], index[v]) for u, v in edges if u in index and v in index and u != v]
+    return index, pairs
+
+
+def hierarchical_layout(node_ids, edges, spacing=200.0):
+    """
+    层次 (同心圆) 布局，纯 Python 实现，O(n + m)
+    每个连通分量以度数最大的节点为根做 BFS，按层数放在同心圆上，
+    同层节点按父节点的角度排序，减少连线交叉；多个连通分量横向排开
+    返回 {节点 ID: (x, y)}
+    """
+    node_ids = list(node_ids)
+    _, pairs = _graph_index(node_ids, edges)
+    n = len(node_ids)
+    neighbors = [[] for _ in range(n)]
+    for u, v in pairs:
+        neighbors[u].append(v)
+        neighbors[v].append(u)
+
+    order = sorted(range(n), key=lambda i: -len(neighbors[i]))
+    depth = [-1] * n
+    positions = {}
+    offset_x = 0.0
+    for root in order:
+        if depth[root] >= 0:
+            continue
+        # BFS 分层，记录父节点用于同层排序
+        depth[root] = 0
+        parent = {root: root}
+        layers = [[root]]
+        queue = deque([root])
+        while queue:
+            u = queue.popleft()
+            for v in neighbors[u]:
+                if depth[v] < 0:
+                    depth[v] = depth[u] + 1
+                    parent[v] = u
+                    if depth[v] == len(layers):
+                        layers.append([])
+                    layers[depth[v]].append(v)
+                    queue.append(v)
+
+        angle = {root: 0.0}
+        radius = spacing * (len(layers) - 1)
+        for members in layers[1:]:
+            members.sort(key=lambda i: angle[parent[i]])
+            step = 2 * math.pi / len(members)
+            for k, i in enumerate(members):
+                angle[i] = k * step
+        center_x = offset_x + radius
+        for level, members in enumerate(layers):
+            r = spacing * level
+            for i in members:
+                positions[node_ids[i]] = (center_x + r * math.cos(angle[i]), r * math.sin(angle[i]))
+        offset_x = center_x + radius + spacing * 2
+    return positions
+
+
+def force_layout(node_ids, edges, iterations=60, spring_length=200.0, seed=0, block=1024, initial=None):
+    """
+    NumPy 向量化的 Fruchterman-Reingold 力导向布局
+    - 斥力按 block 行分块计算，内存占用为 O(block × n)，不会生成完整的 n×n 矩阵
+    - 引力通过边数组一次性计算，np.add.at 累加到端点
+    - initial 为初始坐标 (默认使用层次布局，收敛更快)
+    返回 {节点 ID: (x, y)}
+    """
+    if np is None:
+        raise RuntimeError("力导向布局需要 NumPy，请先执行 pip install numpy")
+    node_ids = list(node_ids)
+    n = len(node_ids)
+    if n == 0:
+        return {}
+    _, pairs = _graph_index(node_ids, edges)
+
+    if initial is None:
+        initial = hierarchical_layout(node_ids, edges, spacing=spring_length)
+    rng = np.random.default_rng(seed)
+    pos = np.array([initial[n_id] for n_id in node_ids], dtype=np.float64)
+    pos += rng.normal(scale=spring_length * 0.05, size=pos.shape)  # 打破对称
+    src = np.array([u for u, _ in pairs], dtype=np.int64)
+    dst = np.array([v for _, v in pairs], dtype=np.int64)
+
+    k = float(spring_length)
+    temperature = k * math.sqrt(n)
+    cooling = (0.01) ** (1.0 / max(iterations, 1))
+    disp = np.empty_like(pos)
+    for _ in range(iterations):
+        disp.fill(0.0)
+        # 斥力: k² / d，方向沿两点连线
+        xs, ys = pos[:, 0], pos[:, 1]
+        for start in range(0, n, block):
+            end = min(start + block, n)
+            dx = xs[start:end, None] - xs[None, :]
+            dy = ys[start:end, None] - ys[None, :]
+            weight = dx * dx + dy * dy
+            np.maximum(weight, 1e-2, out=weight)
+            np.divide(k * k, weight, out=weight)
+            disp[start:end, 0] += (dx * weight).sum(axis=1)
+            disp[start:end, 1] += (dy * weight).sum(axis=1)
+        # 引力: d² / k
+        if len(src):
+            delta = pos[src] - pos[dst]
+            dist = np.sqrt(np.einsum('ij,ij->i', delta, delta))
+            force = delta * (dist / k)[:, None]
+            np.subtract.at(disp, src, force)
+            np.add.at(disp, dst, force)
+        # 按当前温度限制位移
+        length = np.sqrt(np.einsum('ij,ij->i', disp, disp))
+        np.maximum(length, 1e-9, out=length)
+        pos += disp * (np.minimum(length, temperature) / length)[:, None]
+        temperature *= cooling
+
+    pos -= pos.mean(axis=0)
+    return {n_id: (float(x), float(y)) for n_id, (x, y) in zip(node_ids, pos)}
+
+
+def compute_layout(node_ids, edges, method="auto", **kwargs):
+    """
+    method: force / hierarchical / auto
+    auto: 节点数不超过 FORCE_LAYOUT_LIMIT 且安装了 NumPy 时使用力导向，否则使用层次布局
+    """
+    node_ids = list(node_ids)
+    if method == "auto":
+        method = "force" if np is not None and len(node_ids) <= FORCE_LAYOUT_LIMIT else "hierarchical"
+    if method == "force":
+        return force_layout(node_ids, edges, **kwargs)
+    if method == "hierarchical":
+        return hierarchical_layout(node_ids, edges, spacing=kwargs.get("spring_length", 200.0))
+    raise ValueError(f"未知的布局方式: {method}")
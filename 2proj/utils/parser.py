@@ -1,28 +1,88 @@
 import re
+from collections import namedtuple
+
+# 解析结果记录 (lineno 为输入中的行号，从 1 开始)
+NodeRecord = namedtuple("NodeRecord", "lineno id brand type")
+LinkRecord = namedtuple("LinkRecord", "lineno source target")
+
+# 设备 ID 只允许字母、数字、下划线、'.' 与 '-'，接口名另外允许 '/' (如 Gi0/0、ethernet1/1、Gi0/0.100)
+_DEVICE = r"[\w.-]+"
+_INTERFACE = r"[\w/.-]+"
+# 端点格式 设备:接口，例如 R1:Gi0/0、SW3:Et1
+_ENDPOINT = rf"{_DEVICE}:{_INTERFACE}"
+# 所有连接符合并为一个分支：连接 / connect / - / <-> / to
+# 源端点使用非贪婪匹配，保证接口名中的 '-' 不会被误当作连接符
+_LINK = rf"(?P<src>{_ENDPOINT}?)\s*(?:<->|连接|-|\s(?:connect|to)\s)\s*(?P<dst>{_ENDPOINT})"
+# 设备格式 ID,品牌,类型，例如 R1,Cisco,Router
+_NODE = rf"(?P<id>{_DEVICE})\s*,\s*(?P<brand>[^,]+?)\s*,\s*(?P<type>[^,]+?)"
+
+LINE_RE = re.compile(rf"^\s*(?:{_LINK}|{_NODE})\s*$", re.IGNORECASE)
+LINK_RE = re.compile(rf"^\s*{_LINK}\s*$", re.IGNORECASE)
+NODE_RE = re.compile(rf"^\s*{_NODE}\s*$")
+
+
+class ParseError(ValueError):
+    """输入行无法识别，lineno 为出错的行号"""
+
+    def __init__(self, lineno, line, reason="无法识别的格式"):
+        super().__init__(f"第 {lineno} 行: {reason}: {line!r}")
+        self.lineno = lineno
+        self.line = line
+
 
 class InputParser:
+    """
+    统一的输入解析器
+    - 所有正则在模块加载时预编译，每行只做一次匹配，不再按连接符反复替换字符串
+    - iter_records() 接受任意可迭代的行 (列表 / 文件 / 生成器)，逐条产出 NodeRecord / LinkRecord
+    - 空行与 '#' 开头的注释行会被跳过；无法识别的行记入 errors (strict=True 时直接抛出 ParseError)
+    """
+
+    def __init__(self, strict=False):
+        self.strict = strict
+        self.errors = []
+
+    def iter_records(self, lines):
+        match = LINE_RE.match
+        for lineno, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line[0] == '#':
+                continue
+            m = match(line)
+            if m is None:
+                error = ParseError(lineno, line)
+                if self.strict:
+                    raise error
+                self.errors.append(error)
+                continue
+            src = m.group('src')
+            if src is not None:
+                yield LinkRecord(lineno, src, m.group('dst'))
+            else:
+                yield NodeRecord(lineno, m.group('id'), m.group('brand'), m.group('type'))
+
     @staticmethod
     def parse_device_info(input_str):
         """
         解析格式: 'R1, Cisco, Router' 或 'FW1, PaloAlto, Firewall'
         """
-        parts = [p.strip() for p in input_str.split(',')]
-        if len(parts) == 3:
-            return {"id": parts[0], "brand": parts[1].lower(), "type": parts[2].lower()}
+        m = NODE_RE.match(input_str)
+        if m:
+            return {"id": m.group('id'), "brand": m.group('brand').lower(), "type": m.group('type').lower()}
         return None
 
     @staticmethod
     def parse_link_info(input_str):
         """
         使用正则匹配连接关系
-        支持格式: 'R1:Gi0/0 连接 R2:Gi0/0' 或 'R1:G0/1 connect R2:G0/1'
+        支持格式: 'R1:Gi0/0 连接 R2:Gi0/0'、'R1:G0/1 connect R2:G0/1'、'R1:G0/1 - R2:G0/1'、
+                 'R1:G0/1 <-> R2:G0/1'、'R1:G0/1 to R2:G0/1'
         """
-        pattern = r"([\w-]+):([\w/]+)\s+(?:连接|connect)\s+([\w-]+):([\w/]+)"
-        match = re.search(pattern, input_str)
-        if match:
+        m = LINK_RE.match(input_str)
+        if m:
             return {
-                "source": f"{match.group(1)}:{match.group(2)}",
-                "target": f"{match.group(3)}:{match.group(4)}",
+                "source": m.group('src'),
+                "target": m.group('dst'),
                 "network": "TBD" # 初始网段设为待定
             }
-        return None
\ No newline at end of file
+        return None
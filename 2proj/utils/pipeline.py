@@ -0,0 +1,186 @@
+import os
+from models.topology import TopologyModel, Node, Link
+from utils.parser import InputParser, LinkRecord
+from utils.ip_allocator import IPAllocator, default_lease_path
+from utils.config_generator import generate_configs_from_model
+from utils.profiling import StageProfiler
+from utils.validator import validate_model
+
+
+class TopologyPipeline:
+    """
+    内存流水线：解析 -> 校验 -> 分配地址 -> 渲染 -> 生成配置
+    整个流程共用同一个 TopologyModel，各阶段不再各自读写 JSON；
+    只有调用 save() 时才写盘 (并且只在模型有改动时写)
+    每个阶段的耗时 / CPU / 数量 (以及可选的内存与 cProfile) 记录在 profiler 中
+    """
+
+    def __init__(self, json_path='data/current_topo.json', project_name="Network_Lab",
+                 output_html="topology_preview.html", config_dir='configs', layout="physics", group_by="site",
+                 compact_dir=None, compress=False, view="logical", render_cache=4, profiler=None,
+                 json_backend="auto", db_path=None):
+        self.json_path = json_path
+        self.lease_path = default_lease_path(json_path)
+        self.output_html = output_html
+        self.config_dir = config_dir
+        self.layout = layout
+        self.group_by = group_by
+        self.compact_dir = compact_dir  # 设置后渲染为 查看器页面 + 数据文件，而不是独立 HTML
+        self.compress = compress
+        self.view = view
+        self.render_cache = render_cache  # 渲染缓存保留的结果数，0 表示关闭
+        self.json_backend = json_backend  # 加载拓扑时使用的 JSON 流式解析后端 (见 utils/json_stream.py)
+        # 设置后拓扑与租约保存在 SQLite 中 (只写入改动)，json_path 仅用于首次导入
+        self.store = None
+        if db_path:
+            from utils.topology_store import TopologyStore
+            self.store = TopologyStore(db_path)
+        self.model = TopologyModel(project_name=project_name)
+        self.allocator = None
+        self.dirty = False
+        self._renderer = None
+        self.profiler = profiler or StageProfiler()
+        self.parse_errors = []
+        self.duplicate_nodes = []  # 输入中重复声明的设备 ID (含已有拓扑中的设备；模型中已被覆盖，只能在解析时发现)
+        self.violations = []
+
+    def stage_report(self):
+        """返回各阶段的数量与耗时汇总文本"""
+        return self.profiler.report()
+
+    # ---------- 数据来源 ----------
+    def has_saved(self):
+        """是否已有保存的拓扑 (数据库中的数据或 JSON 文件)"""
+        if self.store is not None and not self.store.is_empty():
+            return True
+        return os.path.exists(self.json_path)
+
+    def load(self):
+        """
+        加载已有拓扑：JSON 逐条流式读取；使用数据库时从数据库读取，
+        数据库为空而 JSON 存在时先把 JSON 导入数据库
+        """
+        with self.profiler.stage("load") as record:
+            if self.store is None:
+                self.model = TopologyModel.load_from_json(self.json_path, backend=self.json_backend)
+            elif self.store.is_empty() and os.path.exists(self.json_path):
+                self.model = self.store.import_json(self.json_path, backend=self.json_backend)
+                print(f">>> 已将 {self.json_path} 导入数据库 {self.store.path}")
+            else:
+                self.model = self.store.load_model(self.model.topology_name)
+            self.dirty = False
+            record.count = len(self.model.nodes) + self.model.link_count
+        return self.model
+
+    def parse(self, lines, strict=False):
+        """
+        解析设备 / 连接行并加入模型，lines 可以是任意可迭代对象 (如逐行读取的生成器)
+        无法识别的行记录在 self.parse_errors 中 (strict=True 时直接抛出 ParseError)
+        返回 (设备数, 链路数)
+        """
+        with self.profiler.stage("parse") as stage:
+            parser = InputParser(strict=strict)
+            nodes = links = 0
+            # 与模型中已有的设备比较：之前各批输入 / 已加载的拓扑中的设备被重新声明时同样会被覆盖
+            existing = self.model.nodes
+            reported = set(self.duplicate_nodes)
+            for record in parser.iter_records(lines):
+                if type(record) is LinkRecord:
+                    self.model.add_link(Link(record.source, record.target))
+                    links += 1
+                else:
+                    if record.id in existing and record.id not in reported:
+                        self.duplicate_nodes.append(record.id)
+                        reported.add(record.id)
+                    self.model.add_node(Node(record.id, record.brand, record.type))
+                    nodes += 1
+            self.parse_errors.extend(parser.errors)
+            if nodes or links:
+                self.dirty = True
+            stage.count = nodes + links
+        return nodes, links
+
+    # ---------- 处理阶段 ----------
+    def validate(self):
+        """
+        校验当前模型 (设备 / 接口 / 引用 / 地址重叠)，返回 Violation 列表，同时保存在 self.violations
+        应在分配地址与生成配置之前调用，错误输入不必等到后面的阶段才暴露
+        """
+        with self.profiler.stage("validate") as record:
+            self.violations = validate_model(self.model, self.duplicate_nodes)
+            record.count = len(self.model.nodes) + self.model.link_count
+        return self.violations
+
+    def allocate(self, verbose=True, **settings):
+        """在内存中分配地址，租约与拓扑一起在 save() 时落盘"""
+        with self.profiler.stage("allocate") as record:
+            if self.allocator is None and self.store is not None:
+                self.allocator = self.store.load_allocator(self.lease_path, **settings)
+            elif self.allocator is None:
+                self.allocator = IPAllocator.load(self.lease_path, **settings)
+            stats = self.allocator.sync(self.model, verbose=verbose)
+            if stats["changed"]:
+                self.dirty = True
+            record.count = stats["allocated"] + stats["loopbacks"]
+        return stats
+
+    def render(self, output_html=None, view=None):
+        """渲染拓扑图；拓扑与参数均未变化时直接复用渲染缓存，返回是否命中缓存"""
+        with self.profiler.stage("render") as record:
+            if self._renderer is None:
+                from utils.renderer import TopologyRenderer  # pyvis 只在渲染阶段需要
+                self._renderer = TopologyRenderer(self.json_path, layout=self.layout, group_by=self.group_by,
+                                                  view=self.view, cache_size=self.render_cache)
+            if self.compact_dir:
+                self._renderer.render_compact(self.model, self.compact_dir, compress=self.compress, view=view)
+            else:
+                self._renderer.render_model(self.model, output_html or self.output_html, view=view)
+            record.count = len(self.model.nodes) + self.model.link_count
+        return self._renderer.last_cached
+
+    def spf(self, workers=1):
+        """计算全部设备的最短路径树 (可达性 / 路由表)，返回 SPFEngine"""
+        from utils.spf import SPFEngine
+        with self.profiler.stage("spf") as record:
+            engine = SPFEngine(self.model)
+            record.count = engine.run_all(workers=workers)
+        return engine
+
+    def what_if(self, workers=1, links=True, devices=True):
+        """单点故障分析：依次断开每条链路 / 每台设备，返回 Impact 列表 (影响最大的在前)"""
+        from utils.spf import SPFEngine
+        from utils.failure import FailureAnalyzer
+        with self.profiler.stage("what_if") as record:
+            impacts = FailureAnalyzer(SPFEngine(self.model), workers).analyze(links, devices, workers)
+            record.count = len(impacts)
+        return impacts
+
+    def generate(self, **kwargs):
+        kwargs.setdefault('out_dir', self.config_dir)
+        with self.profiler.stage("generate") as record:
+            result = generate_configs_from_model(self.model, **kwargs)
+            record.count = len(result["written"])
+        return result
+
+    # ---------- 持久化 ----------
+    def save(self, force=False):
+        """
+        把模型 (以及租约表) 写入磁盘；未改动时跳过，返回是否实际写入
+        使用数据库时只写入改动的设备 / 链路 / 租约 (一个事务)，record.count 为实际写入的行数
+        """
+        if not (self.dirty or force):
+            return False
+        with self.profiler.stage("save") as record:
+            if self.store is not None:
+                record.count = self.store.save(self.model, self.allocator)
+                self.dirty = False
+                return True
+            directory = os.path.dirname(self.json_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self.model.save_to_json(self.json_path)
+            if self.allocator is not None:
+                self.allocator.save(self.lease_path)
+            self.dirty = False
+            record.count = len(self.model.nodes) + self.model.link_count
+        return True
@@ -0,0 +1,141 @@
+import os
+import time
+import cProfile
+import tracemalloc
+import unicodedata
+from contextlib import contextmanager
+
+PROFILE_ENV = "TOPO_PROFILE"              # 非空时开启 tracemalloc 内存统计
+PROFILE_STAGE_ENV = "TOPO_PROFILE_STAGE"  # 对该阶段启用 cProfile，结果写入 profile_<阶段>.prof
+
+
+def _cpu_seconds():
+    """本进程 + 已结束子进程 (如并行生成配置的工作进程) 的 CPU 时间"""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def _pad(text, width, align="<"):
+    """按显示宽度对齐 (中文字符占 2 列)"""
+    text = str(text)
+    fill = width - sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text)
+    if fill <= 0:
+        return text
+    return text + " " * fill if align == "<" else " " * fill + text
+
+
+class StageRecord:
+    """一次阶段执行的统计；peak_kb / net_kb 只在开启内存统计时有值"""
+    __slots__ = ("stage", "count", "wall", "cpu", "peak_kb", "net_kb")
+
+    def __init__(self, stage, count=0):
+        self.stage = stage
+        self.count = count
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_kb = None
+        self.net_kb = None
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class StageProfiler:
+    """
+    阶段级统计：墙钟时间、CPU 时间、处理数量，可选 tracemalloc 峰值 / 净增内存
+    profile_stage 指定的阶段额外用 cProfile 采样，每次执行后把累计结果写入 profile_<阶段>.prof
+    (用 python -m pstats 或 snakeviz 查看)
+    """
+
+    def __init__(self, trace_memory=False, profile_stage=None, profile_dir="."):
+        self.trace_memory = trace_memory
+        self.profile_stage = profile_stage
+        self.profile_dir = profile_dir
+        self.records = []
+        self._profile = None
+
+    @classmethod
+    def from_env(cls, trace_memory=False, profile_stage=None):
+        """命令行参数优先，未指定时读取环境变量 TOPO_PROFILE / TOPO_PROFILE_STAGE"""
+        return cls(trace_memory=trace_memory or bool(os.environ.get(PROFILE_ENV)),
+                   profile_stage=profile_stage or os.environ.get(PROFILE_STAGE_ENV) or None)
+
+    @property
+    def enabled(self):
+        return self.trace_memory or self.profile_stage is not None
+
+    def profile_path(self, stage):
+        return os.path.join(self.profile_dir, f"profile_{stage}.prof")
+
+    @contextmanager
+    def stage(self, name, count=0):
+        """
+        with profiler.stage("parse") as record:
+            ...
+            record.count = 处理数量
+        """
+        record = StageRecord(name, count)
+        tracing = self.trace_memory
+        if tracing:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        profile = None
+        if name == self.profile_stage:
+            if self._profile is None:
+                self._profile = cProfile.Profile()
+            profile = self._profile
+            profile.enable()
+        cpu_started = _cpu_seconds()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.wall = time.perf_counter() - started
+            record.cpu = _cpu_seconds() - cpu_started
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(self.profile_path(name))
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                record.peak_kb = max(peak - baseline, 0) // 1024
+                record.net_kb = (current - baseline) // 1024
+            self.records.append(record)
+
+    def totals(self):
+        """按阶段汇总 (同一阶段多次执行时累加)，保持首次出现的顺序"""
+        merged = {}
+        for record in self.records:
+            total = merged.get(record.stage)
+            if total is None:
+                total = merged[record.stage] = StageRecord(record.stage)
+            total.count += record.count
+            total.wall += record.wall
+            total.cpu += record.cpu
+            if record.peak_kb is not None:
+                total.peak_kb = max(total.peak_kb or 0, record.peak_kb)
+                total.net_kb = (total.net_kb or 0) + record.net_kb
+        return list(merged.values())
+
+    def report(self):
+        """返回各阶段汇总表文本"""
+        header = [("阶段", 10, "<"), ("次数", 6, ">"), ("数量", 10, ">"), ("耗时(s)", 10, ">"), ("CPU(s)", 10, ">")]
+        if self.trace_memory:
+            header += [("峰值(MB)", 11, ">"), ("净增(MB)", 11, ">")]
+        lines = ["".join(_pad(title, width, align) for title, width, align in header)]
+        calls = {}
+        for record in self.records:
+            calls[record.stage] = calls.get(record.stage, 0) + 1
+        totals = self.totals()
+        for total in totals:
+            row = [total.stage, calls[total.stage], total.count, f"{total.wall:.3f}", f"{total.cpu:.3f}"]
+            if self.trace_memory:
+                row += [f"{(total.peak_kb or 0) / 1024:.1f}", f"{(total.net_kb or 0) / 1024:.1f}"]
+            lines.append("".join(_pad(value, width, align) for value, (_, width, align) in zip(row, header)))
+        wall = sum(t.wall for t in totals)
+        cpu = sum(t.cpu for t in totals)
+        lines.append(_pad("合计", 10) + _pad("", 16) + _pad(f"{wall:.3f}", 10, ">") + _pad(f"{cpu:.3f}", 10, ">"))
+        if self._profile is not None:
+            lines.append(f"cProfile ({self.profile_stage}): {self.profile_path(self.profile_stage)}")
+        return "\n".join(lines)
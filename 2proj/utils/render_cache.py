@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import shutil
+
+RENDER_CACHE_VERSION = 1
+
+
+def content_key(topology, options):
+    """拓扑内容 + 渲染参数的规范化哈希 (键排序、紧凑分隔符，与字段顺序无关)"""
+    raw = json.dumps([RENDER_CACHE_VERSION, topology, options], sort_keys=True,
+                     ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _stamp(path):
+    """输出文件的 [大小, 修改时间 (ns)]，文件不存在时为 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+class RenderCache:
+    """
+    渲染结果缓存 (LRU)
+    - 每个条目保存一次渲染写出的全部文件 (HTML / 数据文件 / 分组数据)，以内容哈希为键
+    - outputs 记录每个输出位置当前对应的键；每个输出文件同时记录写出时的大小与修改时间，
+      键相同且文件未被改动 (大小、修改时间均一致) 时直接跳过，否则从缓存重新复制
+    - 键不同但命中缓存时 (例如在物理视图与逻辑视图之间切换) 只需把缓存文件复制回输出位置
+    - 超过 max_entries 时淘汰最久未使用的条目
+    """
+
+    INDEX_NAME = "index.json"
+
+    def __init__(self, cache_dir=".render_cache", max_entries=4):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._index = None
+
+    # ---------- 索引 ----------
+    def _load_index(self):
+        if self._index is None:
+            path = os.path.join(self.cache_dir, self.INDEX_NAME)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {"entries": [], "files": {}, "outputs": {}}
+        return self._index
+
+    def _save_index(self):
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        path = os.path.join(self.cache_dir, self.INDEX_NAME)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _touch(self, key):
+        entries = self._load_index()["entries"]
+        if key in entries:
+            entries.remove(key)
+        entries.append(key)
+
+    # ---------- 读写 ----------
+    def files(self, key):
+        """返回条目对应的输出文件路径列表"""
+        return [item[0] for item in self._load_index()["files"].get(key, [])]
+
+    def restore(self, key, target):
+        """
+        命中时把缓存文件恢复到原位置并返回 True；未命中返回 False
+        target 为本次渲染的输出位置 (HTML 路径或紧凑输出目录)
+        """
+        index = self._load_index()
+        files = index["files"].get(key)
+        if files is None:
+            return False
+        if index["outputs"].get(target) == key and all(item[2:] == [_stamp(item[0])] for item in files):
+            self._touch(key)
+            self._save_index()
+            return True
+        entry_dir = os.path.join(self.cache_dir, key)
+        if not all(os.path.exists(os.path.join(entry_dir, item[1])) for item in files):
+            self._evict(key)  # 缓存文件被外部删除，视为未命中
+            return False
+        for item in files:
+            path, name = item[0], item[1]
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            tmp_path = path + ".tmp"
+            shutil.copyfile(os.path.join(entry_dir, name), tmp_path)
+            os.replace(tmp_path, path)
+            item[2:] = [_stamp(path)]
+        index["outputs"][target] = key
+        self._touch(key)
+        self._save_index()
+        return True
+
+    def store(self, key, target, paths):
+        """保存一次渲染写出的文件，并按 LRU 淘汰多余的条目"""
+        index = self._load_index()
+        entry_dir = os.path.join(self.cache_dir, key)
+        if not os.path.exists(entry_dir):
+            os.makedirs(entry_dir)
+        files = []
+        for i, path in enumerate(paths):
+            name = f"{i}_{os.path.basename(path)}"
+            shutil.copyfile(path, os.path.join(entry_dir, name))
+            files.append([path, name, _stamp(path)])
+        index["files"][key] = files
+        index["outputs"][target] = key
+        self._touch(key)
+        while len(index["entries"]) > self.max_entries:
+            self._evict(index["entries"][0])
+        self._save_index()
+
+    def _evict(self, key):
+        index = self._load_index()
+        if key in index["entries"]:
+            index["entries"].remove(key)
+        index["files"].pop(key, None)
+        for target in [t for t, k in index["outputs"].items() if k == key]:
+            del index["outputs"][target]
+        shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
@@ -1,61 +1,130 @@
-import json
 import os
+import json
+import math
 from pyvis.network import Network
+from models.topology import TopologyModel, Node
+from utils.layout import compute_layout, hierarchical_layout
+from utils.clustering import group_nodes, write_cluster_data, super_node_size, CLUSTER_SCRIPT
+from utils.viewer import write_viewer, write_topology_data, write_page
+from utils.render_cache import RenderCache, content_key
+
+BRAND_CONFIG = {"cisco": "#2980b9", "arista": "#27ae60", "paloalto": "#c0392b", "default": "#7f8c8d"}
+LAYOUT_MODES = ("physics", "force", "hierarchical", "auto", "clustered")
+VIEW_MODES = ("logical", "physical")
+PRECOMPUTED_OPTIONS = {"physics": {"enabled": False}, "layout": {"improvedLayout": False},
+                       "edges": {"smooth": False}, "interaction": {"hideEdgesOnDrag": True}}
+
+def node_style(node):
+    """返回设备的 (形状, 颜色, 悬停提示)"""
+    raw_brand = str(node.brand or 'default').lower()
+    n_type = str(node.type or 'default').lower()
+    color = BRAND_CONFIG.get(raw_brand, BRAND_CONFIG["default"])
+
+    # 形状判断改进：使用 in 关键字适配 "Router/Switch" 等组合类型
+    if "router" in n_type or "rt" in n_type:
+        shape, t_label = "dot", "Router"
+    elif "switch" in n_type or "sw" in n_type:
+        shape, t_label = "box", "Switch"
+    elif "firewall" in n_type or "fw" in n_type:
+        shape, t_label = "diamond", "Firewall"
+    else:
+        shape, t_label = "ellipse", n_type.capitalize()
+    return shape, color, f"{raw_brand.upper()} - {t_label}"
+
+def link_labels(link, view="logical"):
+    """
+    返回链路两端的接口标签与子网标签，例如 ('Gi0/1(.1)', 'Et1(.2)', '[172.16.0.0/30]')
+    view="physical" 时只显示接口名，不显示 IP 与子网
+    """
+    if view == "physical":
+        return link.src_intf, link.dst_intf, ""
+    # IP 信息处理 (未分配时为空)
+    u_ip = link.source_ip or ''
+    v_ip = link.target_ip or ''
+    subnet = link.network or ''
+
+    u_suffix = f"(.{u_ip.split('.')[-1]})" if u_ip and '.' in u_ip else ""
+    v_suffix = f"(.{v_ip.split('.')[-1]})" if v_ip and '.' in v_ip else ""
+    subnet_label = f"[{subnet}]" if subnet and subnet.upper() != 'TBD' else ""
+    return f"{link.src_intf}{u_suffix}", f"{link.dst_intf}{v_suffix}", subnet_label
 
 class TopologyRenderer:
-    def __init__(self, json_path):
+    """
+    layout:
+      physics      - 浏览器端 barnesHut 物理引擎布局 (默认，适合小拓扑)
+      force        - Python 端 NumPy 力导向布局，坐标固定写入 HTML，关闭物理引擎
+      hierarchical - Python 端层次布局 (不依赖 NumPy，O(n + m))
+      auto         - 按规模自动选择 force / hierarchical
+      clustered    - 分组视图：设备按 group_by (site / brand / community) 折叠为分组节点，双击按需展开
+    view:
+      logical  - 链路标注接口 IP 与子网 (默认)
+      physical - 只标注接口名
+    cache_size: 渲染缓存保留的结果数 (LRU)，拓扑内容与渲染参数都未变化时直接复用，0 表示关闭缓存
+    """
+    def __init__(self, json_path, layout="physics", group_by="site", view="logical",
+                 cache_size=4, cache_dir=".render_cache"):
+        if layout not in LAYOUT_MODES:
+            raise ValueError(f"未知的布局方式: {layout}")
+        if view not in VIEW_MODES:
+            raise ValueError(f"未知的视图: {view}")
         self.json_path = json_path
+        self.layout = layout
+        self.group_by = group_by
+        self.view = view
+        self.cache = RenderCache(cache_dir, cache_size) if cache_size > 0 else None
+        self.last_cached = False  # 最近一次渲染是否直接复用了缓存
 
     def render(self, output_html="topology_preview.html"):
         """支持双重确认逻辑的渲染器"""
         if not os.path.exists(self.json_path):
             return
+        self.render_model(TopologyModel.load_from_json(self.json_path), output_html)
+
+    def render_model(self, model, output_html="topology_preview.html", view=None):
+        """直接渲染内存中的拓扑模型，无需经过 JSON 文件；view 为空时使用构造时的视图"""
+        view = view or self.view
+        if self.layout == "clustered":
+            render = lambda: self.render_clustered(model, output_html, view)
+        elif self.layout != "physics":
+            render = lambda: self._render_precomputed(model, output_html, view)
+        else:
+            render = lambda: self._render_physics(model, output_html, view)
+        return self._cached(model, output_html, {"view": view}, render)
 
-        with open(self.json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+    def _cached(self, model, target, options, render):
+        """
+        按 (拓扑内容, 渲染参数, 输出位置) 的哈希查找缓存，命中则跳过渲染
+        render() 返回本次写出的文件列表，渲染完成后存入缓存
+        """
+        self.last_cached = False
+        if self.cache is None:
+            return render()
+        options = dict(options, target=target, layout=self.layout, group_by=self.group_by)
+        key = content_key(model.to_dict(), options)
+        if self.cache.restore(key, target):
+            self.last_cached = True
+            return self.cache.files(key)
+        paths = render()
+        self.cache.store(key, target, paths)
+        return paths
 
+    def _render_physics(self, model, output_html, view):
         net = Network(height="800px", width="100%", bgcolor="#ffffff", font_color="#34495e")
-        BRAND_CONFIG = {"cisco": "#2980b9", "arista": "#27ae60", "paloalto": "#c0392b", "default": "#7f8c8d"}
 
         # 1. 渲染设备
-        for node in data.get('nodes', []):
-            n_id = node.get('id')
-            raw_brand = str(node.get('brand', 'default')).lower()
-            n_type = str(node.get('type', 'default')).lower()
-            color = BRAND_CONFIG.get(raw_brand, BRAND_CONFIG["default"])
-            
-            # 形状判断改进：使用 in 关键字适配 "Router/Switch" 等组合类型
-            if "router" in n_type or "rt" in n_type:
-                shape, t_label = "dot", "Router"
-            elif "switch" in n_type or "sw" in n_type:
-                shape, t_label = "box", "Switch"
-            elif "firewall" in n_type or "fw" in n_type:
-                shape, t_label = "diamond", "Firewall"
-            else:
-                shape, t_label = "ellipse", n_type.capitalize()
-
-            net.add_node(n_id, label=n_id, shape=shape, color=color, size=20, title=f"{raw_brand.upper()} - {t_label}")
+        for node in model.nodes.values():
+            shape, color, title = node_style(node)
+            net.add_node(node.id, label=node.id, shape=shape, color=color, size=20, title=title)
 
         # 2. 渲染连线与辅助点
-        for i, link in enumerate(data.get('links', [])):
-            u_full, v_full = link['source'], link['target']
-            u, v = u_full.split(':')[0], v_full.split(':')[0]
-            u_intf = u_full.split(':')[1] if ':' in u_full else ""
-            v_intf = v_full.split(':')[1] if ':' in v_full else ""
-            
-            # IP 信息处理 (KeyError 防御逻辑)
-            u_ip = link.get('source_ip', '')
-            v_ip = link.get('target_ip', '')
-            subnet = link.get('network', '')
-
-            u_suffix = f"(.{u_ip.split('.')[-1]})" if u_ip and '.' in u_ip else ""
-            v_suffix = f"(.{v_ip.split('.')[-1]})" if v_ip and '.' in v_ip else ""
-            subnet_label = f"[{subnet}]" if subnet and subnet.upper() != 'TBD' else ""
+        for i, (_, link) in enumerate(model.iter_links()):
+            u, v = link.src_node, link.dst_node
+            u_label, v_label, subnet_label = link_labels(link, view)
 
             # 辅助点定位
             anchor_u, anchor_v = f"anchor_{i}_u", f"anchor_{i}_v"
-            net.add_node(anchor_u, label=f"{u_intf}{u_suffix}", shape="dot", size=1, color="rgba(0,0,0,0)", font={'size': 10, 'vadjust': -15})
-            net.add_node(anchor_v, label=f"{v_intf}{v_suffix}", shape="dot", size=1, color="rgba(0,0,0,0)", font={'size': 10, 'vadjust': -15})
+            net.add_node(anchor_u, label=u_label, shape="dot", size=1, color="rgba(0,0,0,0)", font={'size': 10, 'vadjust': -15})
+            net.add_node(anchor_v, label=v_label, shape="dot", size=1, color="rgba(0,0,0,0)", font={'size': 10, 'vadjust': -15})
 
             net.add_edge(u, anchor_u, length=25, color="rgba(0,0,0,0)", physics=True)
             net.add_edge(v, anchor_v, length=25, color="rgba(0,0,0,0)", physics=True)
@@ -67,4 +136,139 @@ class TopologyRenderer:
                          smooth={'enabled': False})
 
         net.set_options('{"physics":{"enabled":true,"barnesHut":{"gravitationalConstant":-5000,"springLength":280}}}')
-        net.save_graph(output_html)
\ No newline at end of file
+        net.save_graph(output_html)
+        return [output_html]
+
+    def _precomputed_elements(self, model, view="logical"):
+        """
+        坐标在 Python 端计算，返回 (节点列表, 边列表, vis 选项)
+        每条链路只生成一条边，接口标签直接写在边标签上，不再使用辅助点
+        """
+        node_ids = list(model.nodes)
+        # 只出现在链路中、未声明的设备也参与布局，以默认样式显示
+        for n_id in model.adjacency:
+            if n_id not in model.nodes:
+                node_ids.append(n_id)
+        edges = [(link.src_node, link.dst_node) for _, link in model.iter_links()]
+        method = self.layout if self.layout in ("force", "hierarchical") else "auto"
+        positions = compute_layout(node_ids, edges, method=method, spring_length=280.0)
+
+        vis_nodes = []
+        for n_id in node_ids:
+            node = model.nodes.get(n_id) or Node(n_id)
+            shape, color, title = node_style(node)
+            x, y = positions[n_id]
+            vis_nodes.append({"id": n_id, "label": n_id, "shape": shape, "color": color, "size": 20,
+                              "title": title, "x": round(x, 1), "y": round(y, 1), "physics": False})
+
+        vis_edges = []
+        for link_id, link in model.iter_links():
+            u_label, v_label, subnet_label = link_labels(link, view)
+            label = "  ".join(part for part in (u_label, subnet_label, v_label) if part)
+            vis_edges.append({"id": link_id, "from": link.src_node, "to": link.dst_node, "label": label,
+                              "title": f"{link.source} <-> {link.target} {subnet_label}",
+                              "color": "#bdc3c7", "width": 1.5,
+                              "font": {'size': 10, 'align': 'horizontal', 'background': '#ffffff'}})
+        return vis_nodes, vis_edges, dict(PRECOMPUTED_OPTIONS)
+
+    def _render_precomputed(self, model, output_html, view="logical"):
+        """
+        坐标固定写入 HTML，浏览器无需物理模拟即可直接显示
+        页面由查看器模板生成 (见 viewer.write_page)，不经过 pyvis 的 add_node/add_edge 线性查重
+        """
+        vis_nodes, vis_edges, options = self._precomputed_elements(model, view)
+        return [write_page(output_html, vis_nodes, vis_edges, options)]
+
+    def render_compact(self, model, out_dir="topology_view", compress=False, view=None):
+        """
+        紧凑输出：静态查看器页面 viewer.html (只写一次) + 数据文件 (topology_data.js 或 .json.gz)
+        重新生成时只重写数据文件，浏览器刷新时也只需重新下载数据
+        返回数据文件路径
+        """
+        view = view or self.view
+
+        def render():
+            vis_nodes, vis_edges, options = self._precomputed_elements(model, view)
+            return [write_topology_data(out_dir, vis_nodes, vis_edges, options, compress=compress)]
+
+        write_viewer(out_dir)
+        return self._cached(model, out_dir, {"view": view, "compress": compress}, render)[0]
+
+    def render_clustered(self, model, output_html="topology_preview.html", view="logical"):
+        """
+        分组视图：页面只包含分组节点与分组间的聚合链路 (标注链路条数)，
+        每个分组的设备与链路写入单独的数据文件 (<页面名>_clusters/<编号>.js)，双击分组时才加载，
+        因此页面体积与浏览器内存只与分组数量和已展开的分组有关，与拓扑总规模无关
+        """
+        groups = group_nodes(model, self.group_by)
+        names = sorted(set(groups.values()), key=lambda name: (len(name), name))  # C2 排在 C10 之前
+        index = {name: i for i, name in enumerate(names)}
+        members = [[] for _ in names]
+        for n_id, name in groups.items():
+            members[index[name]].append(n_id)
+
+        # 统计分组内 / 分组间的链路
+        internal = [[] for _ in names]
+        external = [[] for _ in names]
+        between = {}
+        for link_id, link in model.iter_links():
+            a, b = index[groups[link.src_node]], index[groups[link.dst_node]]
+            if a == b:
+                internal[a].append(link_id)
+                continue
+            between[(min(a, b), max(a, b))] = between.get((min(a, b), max(a, b)), 0) + 1
+            subnet_label = link_labels(link, view)[2]
+            title = f"{link.source} <-> {link.target} {subnet_label}"
+            external[a].append([link_id, link.src_node, link.dst_node, b, title])
+            external[b].append([link_id, link.dst_node, link.src_node, a, title])
+
+        spacing = 400.0
+        centers = compute_layout([f"cluster:{i}" for i in range(len(names))],
+                                 [(f"cluster:{a}", f"cluster:{b}") for a, b in between],
+                                 method="auto", spring_length=spacing)
+
+        data_dir = os.path.splitext(output_html)[0] + "_clusters"
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        for stale in os.listdir(data_dir):  # 清理上一次渲染遗留的分组文件
+            if stale.endswith(".js"):
+                os.remove(os.path.join(data_dir, stale))
+
+        vis_nodes, vis_edges = [], []
+        written = [output_html]
+        for i, name in enumerate(names):
+            count = len(members[i])
+            x, y = centers[f"cluster:{i}"]
+            super_node = {"id": f"cluster:{i}", "label": f"{name}\n{count} 台", "shape": "dot",
+                          "size": super_node_size(count), "color": "#8e44ad", "clusterIndex": i,
+                          "title": f"{name}: {count} 台设备, 内部链路 {len(internal[i])} 条 (双击展开)"}
+            vis_nodes.append(dict(super_node, x=round(x, 1), y=round(y, 1), physics=False))
+
+            # 分组内部布局 (以分组中心为原点)，写入按需加载的数据文件
+            member_edges = [(model.links[l].src_node, model.links[l].dst_node) for l in internal[i]]
+            local = hierarchical_layout(members[i], member_edges, spacing=120.0)
+            mx = sum(p[0] for p in local.values()) / max(len(local), 1)
+            my = sum(p[1] for p in local.values()) / max(len(local), 1)
+            payload = {"super": super_node, "nodes": [], "edges": [], "external": external[i]}
+            for n_id in members[i]:
+                shape, color, title = node_style(model.nodes.get(n_id) or Node(n_id))
+                px, py = local[n_id]
+                payload["nodes"].append({"id": n_id, "label": n_id, "shape": shape, "color": color, "size": 20,
+                                         "title": f"{title} ({name})", "x": round(px - mx, 1), "y": round(py - my, 1)})
+            for link_id in internal[i]:
+                link = model.links[link_id]
+                u_label, v_label, subnet_label = link_labels(link, view)
+                payload["edges"].append({"id": f"e{link_id}", "from": link.src_node, "to": link.dst_node,
+                                         "label": "  ".join(p for p in (u_label, subnet_label, v_label) if p),
+                                         "color": "#bdc3c7", "width": 1.5, "font": {"size": 10}})
+            written.append(write_cluster_data(data_dir, i, payload))
+
+        for (a, b), count in between.items():
+            vis_edges.append({"id": f"agg:{a}:{b}", "from": f"cluster:{a}", "to": f"cluster:{b}", "agg": True,
+                              "a": a, "b": b, "label": str(count), "title": f"{names[a]} <-> {names[b]}: {count} 条链路",
+                              "width": 1 + math.log2(count), "color": "#95a5a6"})
+
+        # 展开 / 折叠脚本随页面一起生成，放在内联数据之后
+        script = CLUSTER_SCRIPT % {"data_dir": json.dumps(os.path.basename(data_dir))}
+        write_page(output_html, vis_nodes, vis_edges, PRECOMPUTED_OPTIONS, scripts=script)
+        return written
@@ -0,0 +1,398 @@
+import os
+import sys
+import time
+import heapq
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+# 最短路径 (SPF) 与可达性计算
+# 邻接关系压缩为 CSR 数组 (array 模块，不依赖第三方库)：
+#   offsets[i] .. offsets[i + 1] 为设备 i 的出边 (半边) 区间，targets / costs / edge_links / edge_src / edge_reverse 按半边存放
+#   每条链路对应两条半边，开销按本端接口取值 (可以不对称)；断开的链路开销记为 DOWN，图结构保持不变
+# 所有开销相同时 (默认情况，均为 1) 用 BFS 代替 Dijkstra
+# 链路状态 / 开销变化时只重算最短路径树可能受影响的源设备
+INF = 0x7FFFFFFF
+DOWN = -1
+DEFAULT_COST = 1
+
+# kind: loopback (设备的 Loopback) / connected (直连网段) / network (远端互联网段)
+Route = namedtuple("Route", "prefix cost next_hop interface kind")
+
+
+def _spf(offsets, targets, costs, source, uniform):
+    """
+    单源最短路径，返回 (dist, pred)
+    dist[v]: 开销 (不可达为 INF)；pred[v]: 最短路径树中进入 v 的半边 (source 自身与不可达为 -1)
+    uniform 为所有有效半边的共同开销 (0 表示开销不一致，使用 Dijkstra)
+    等价路径时保留先找到的一条，结果只取决于当前的图；不在树上的半边断开 / 变差不会改变结果
+    """
+    n = len(offsets) - 1
+    dist = array('i', [INF]) * n
+    pred = array('i', [-1]) * n
+    dist[source] = 0
+    if uniform:
+        order = [source]
+        for u in order:  # 遍历过程中向列表追加即为 BFS 队列
+            du = dist[u] + uniform
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                if dist[v] == INF and costs[e] != DOWN:
+                    dist[v] = du
+                    pred[v] = e
+                    order.append(v)
+        return dist, pred
+
+    heap = [(0, source)]
+    heappop, heappush = heapq.heappop, heapq.heappush
+    while heap:
+        d, u = heappop(heap)
+        if d > dist[u]:
+            continue
+        for e in range(offsets[u], offsets[u + 1]):
+            c = costs[e]
+            if c == DOWN:
+                continue
+            v = targets[e]
+            nd = d + c
+            if nd < dist[v]:
+                dist[v] = nd
+                pred[v] = e
+                heappush(heap, (nd, v))
+    return dist, pred
+
+
+def _spf_chunk(offsets, targets, costs, sources, uniform):
+    """子进程入口：一次计算一批源设备"""
+    return [_spf(offsets, targets, costs, s, uniform) for s in sources]
+
+
+class SPFEngine:
+    """
+    基于拓扑模型的 SPF 引擎
+    - build():        由模型生成 CSR 邻接数组 (模型结构变化后需重新调用)
+    - spf() / run_all(): 单源 / 全部源的最短路径树 (结果按源缓存)
+    - routing_table(): 设备的路由表；reachable() / components(): 可达性
+    - update_link():  单条链路 up/down 或开销变化后的增量重算
+    链路开销取值顺序：本端接口数据中的 cost -> 链路记录中的 cost -> default_cost
+    链路状态：链路记录或任一端接口数据中的 status 为 down 时视为断开
+    """
+
+    def __init__(self, model, default_cost=DEFAULT_COST):
+        self.model = model
+        self.default_cost = default_cost
+        self.build()
+
+    # ---------- 构建 ----------
+    def _cost(self, link, node_id, intf):
+        entry = self.model.interfaces.get((node_id, intf))
+        info = entry.info if entry is not None else None
+        cost = (info or {}).get("cost") or (link.extra or {}).get("cost") or self.default_cost
+        return max(1, int(cost))
+
+    def _is_down(self, link):
+        if str((link.extra or {}).get("status", "up")).lower() == "down":
+            return True
+        for key in ((link.src_node, link.src_intf), (link.dst_node, link.dst_intf)):
+            entry = self.model.interfaces.get(key)
+            if entry is not None and entry.info and str(entry.info.get("status", "up")).lower() == "down":
+                return True
+        return False
+
+    def build(self):
+        model = self.model
+        self.ids = list(model.nodes)
+        index = self.index = {n_id: i for i, n_id in enumerate(self.ids)}
+        n = len(self.ids)
+
+        # 第一遍：统计度数 (两端都是已声明设备的非自环链路)
+        degree = array('l', [0]) * (n + 1)
+        live = []
+        for link_id, link in model.iter_links():
+            u, v = index.get(link.src_node), index.get(link.dst_node)
+            if u is None or v is None or u == v:
+                continue
+            live.append((link_id, link, u, v))
+            degree[u + 1] += 1
+            degree[v + 1] += 1
+        for i in range(n):
+            degree[i + 1] += degree[i]
+        self.offsets = degree
+
+        # 第二遍：按设备填入半边
+        size = degree[n]
+        self.targets = array('i', [0]) * size
+        self.costs = array('i', [0]) * size
+        self.edge_links = array('l', [0]) * size
+        self.edge_src = array('i', [0]) * size
+        self.edge_reverse = array('i', [0]) * size  # 同一链路反方向的半边
+        self.link_edges = {}  # 链路 ID -> (源端半边, 目的端半边)
+        self.link_costs = {}  # 链路 ID -> 配置的 (源端开销, 目的端开销)，链路恢复时使用
+        pos = array('l', degree)
+        for link_id, link, u, v in live:
+            forward, backward = pos[u], pos[v]
+            pos[u] += 1
+            pos[v] += 1
+            costs = (self._cost(link, link.src_node, link.src_intf), self._cost(link, link.dst_node, link.dst_intf))
+            down = self._is_down(link)
+            self.targets[forward], self.targets[backward] = v, u
+            self.edge_src[forward], self.edge_src[backward] = u, v
+            self.edge_reverse[forward], self.edge_reverse[backward] = backward, forward
+            self.costs[forward] = DOWN if down else costs[0]
+            self.costs[backward] = DOWN if down else costs[1]
+            self.edge_links[forward] = self.edge_links[backward] = link_id
+            self.link_edges[link_id] = (forward, backward)
+            self.link_costs[link_id] = costs
+
+        self._cost_counts = {}
+        for c in self.costs:
+            if c != DOWN:
+                self._cost_counts[c] = self._cost_counts.get(c, 0) + 1
+        self.uniform = self._uniform()
+        self._results = {}       # 源设备下标 -> (dist, pred)
+        self._components = None  # 设备下标 -> 连通分量编号
+
+    def _uniform(self):
+        if len(self._cost_counts) > 1:
+            return 0
+        return next(iter(self._cost_counts), self.default_cost)
+
+    # ---------- 计算 ----------
+    def _source(self, node_id):
+        i = self.index.get(node_id)
+        if i is None:
+            raise KeyError(f"未知设备: {node_id}")
+        return i
+
+    def spf(self, node_id):
+        """返回以 node_id 为源的 (dist, pred)，已计算过的直接取缓存"""
+        s = self._source(node_id)
+        result = self._results.get(s)
+        if result is None:
+            result = self._results[s] = _spf(self.offsets, self.targets, self.costs, s, self.uniform)
+        return result
+
+    def run_all(self, workers=1, chunksize=None):
+        """
+        计算全部源设备的最短路径树 (已缓存的跳过)，返回本次计算的源数
+        workers: 并行进程数，1 为串行；None 或 0 表示使用全部 CPU 核心
+        内存约为 设备数² × 8 字节 (每个源两条 int32 数组)
+        """
+        pending = [s for s in range(len(self.ids)) if s not in self._results]
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(pending) <= 1:
+            for s in pending:
+                self._results[s] = _spf(self.offsets, self.targets, self.costs, s, self.uniform)
+            return len(pending)
+        if not chunksize:
+            chunksize = max(1, len(pending) // (workers * 4))
+        chunks = [pending[i:i + chunksize] for i in range(0, len(pending), chunksize)]
+        count = len(chunks)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk, results in zip(chunks, pool.map(_spf_chunk, [self.offsets] * count, [self.targets] * count,
+                                                       [self.costs] * count, chunks, [self.uniform] * count)):
+                self._results.update(zip(chunk, results))
+        return len(pending)
+
+    # ---------- 增量更新 ----------
+    def _affected(self, result, edges, old, new):
+        """
+        判断某个源的最短路径树是否受这条链路变化影响：
+        树上的半边断开 / 变差，或新的 / 变好的半边能提供不差于现有的路径 (等价时保守地重算)
+        不在树上的半边断开 / 变差不影响结果，ECMP 较多的拓扑中大部分源因此无需重算
+        """
+        dist, pred = result
+        targets = self.targets
+        for e, c_old, c_new in ((edges[0], old[0], new[0]), (edges[1], old[1], new[1])):
+            if c_old == c_new:
+                continue
+            du, v = dist[self.edge_src[e]], targets[e]
+            if du == INF:
+                continue
+            if pred[v] == e and (c_new == DOWN or c_new > c_old):
+                return True
+            if c_new != DOWN and du + c_new <= dist[v]:
+                return True
+        return False
+
+    def update_link(self, link_id, up=True, cost=None):
+        """
+        链路 up/down 或开销变化 (cost 为两个方向的新开销，None 表示沿用配置中的开销)
+        只修改引擎内的开销数组，不修改拓扑模型；返回重新计算的源设备数
+        链路不在当前图中 (新增链路 / 端点未声明) 时需先调用 build()
+        """
+        edges = self.link_edges.get(link_id)
+        if edges is None:
+            raise KeyError(f"链路 {link_id} 不在当前 SPF 图中，请先调用 build()")
+        configured = self.link_costs[link_id]
+        old = (self.costs[edges[0]], self.costs[edges[1]])
+        if not up:
+            new = (DOWN, DOWN)
+        elif cost is not None:
+            new = (max(1, int(cost)),) * 2
+        else:
+            new = configured
+        if old == new:
+            return 0
+
+        for e, c_old, c_new in zip(edges, old, new):
+            self.costs[e] = c_new
+            if c_old != DOWN:
+                self._cost_counts[c_old] -= 1
+                if not self._cost_counts[c_old]:
+                    del self._cost_counts[c_old]
+            if c_new != DOWN:
+                self._cost_counts[c_new] = self._cost_counts.get(c_new, 0) + 1
+        if (DOWN in old) != (DOWN in new):
+            self._components = None
+
+        uniform = self._uniform()
+        if uniform != self.uniform:
+            # 算法 (BFS / Dijkstra) 切换时等价路径的取舍可能不同，全部重算以保证与重新构建的结果一致
+            self.uniform = uniform
+            affected = list(self._results)
+        else:
+            affected = [s for s, result in self._results.items() if self._affected(result, edges, old, new)]
+        for s in affected:
+            self._results[s] = _spf(self.offsets, self.targets, self.costs, s, self.uniform)
+        return len(affected)
+
+    # ---------- 查询 ----------
+    def distance(self, src, dst):
+        """最短路径开销，不可达时返回 None"""
+        d = self.spf(src)[0][self._source(dst)]
+        return None if d == INF else d
+
+    def _first_hops(self, s, pred):
+        """由 pred 求每个目的设备的第一条半边 (沿树向上查找并记忆，总计 O(设备数))"""
+        first = array('i', [-1]) * len(pred)
+        edge_src = self.edge_src
+        for v in range(len(pred)):
+            if first[v] >= 0 or pred[v] < 0:
+                continue
+            chain = []
+            x = v
+            while x != s and first[x] < 0:
+                chain.append(x)
+                x = edge_src[pred[x]]
+            hop = first[x] if x != s else pred[chain[-1]]
+            for y in chain:
+                first[y] = hop
+        return first
+
+    def _via(self, node_id, e):
+        """半边 -> (下一跳设备 ID, 本端出接口)"""
+        return self.ids[self.targets[e]], self.model.links[self.edge_links[e]].side_of(node_id)[0]
+
+    def path(self, src, dst):
+        """最短路径上的设备 (含两端)，不可达时返回 None"""
+        s, t = self._source(src), self._source(dst)
+        pred = self.spf(src)[1]
+        if s != t and pred[t] < 0:
+            return None
+        hops = [t]
+        while hops[-1] != s:
+            hops.append(self.edge_src[pred[hops[-1]]])
+        return [self.ids[i] for i in reversed(hops)]
+
+    def next_hop(self, src, dst):
+        """返回 (下一跳设备 ID, 本端出接口)，src == dst 或不可达时返回 None"""
+        hops = self.path(src, dst)
+        if hops is None or len(hops) < 2:
+            return None
+        return self._via(src, self.spf(src)[1][self.index[hops[1]]])
+
+    def routing_table(self, node_id):
+        """
+        设备的路由表 (Route 列表)：其他设备的 Loopback (/32) 与全部互联网段
+        远端网段的开销 = 到较近一端设备的开销 + 该端接口开销，与 OSPF 对点到点网段的计算一致
+        """
+        s = self._source(node_id)
+        dist, pred = self.spf(node_id)
+        first = self._first_hops(s, pred)
+        model, ids, targets, costs = self.model, self.ids, self.targets, self.costs
+
+        routes = []
+        for i, n_id in enumerate(ids):
+            node = model.nodes[n_id]
+            loopback = node.loopback or (node.extra or {}).get("router_id")  # 1testcodes 格式只有 router_id
+            if i == s or not loopback or dist[i] == INF:
+                continue
+            routes.append(Route(f"{loopback}/32", dist[i], *self._via(node_id, first[i]), "loopback"))
+        for link_id, (forward, backward) in self.link_edges.items():
+            link = model.links[link_id]
+            if not link.network or str(link.network).upper() == "TBD" or costs[forward] == DOWN:
+                continue
+            u, v = targets[backward], targets[forward]
+            if s in (u, v):
+                routes.append(Route(link.network, 0, None, link.side_of(node_id)[0], "connected"))
+                continue
+            # 从较近的一端进入该网段
+            cost_u = dist[u] + costs[forward] if dist[u] != INF else INF
+            cost_v = dist[v] + costs[backward] if dist[v] != INF else INF
+            if min(cost_u, cost_v) != INF:
+                best = u if cost_u <= cost_v else v
+                routes.append(Route(link.network, min(cost_u, cost_v), *self._via(node_id, first[best]), "network"))
+        return routes
+
+    def components(self):
+        """按有效链路划分的连通分量 (设备 ID 列表，按规模从大到小)，与 SPF 结果无关，O(设备 + 链路)"""
+        if self._components is None:
+            comp = array('l', [-1]) * len(self.ids)
+            offsets, targets, costs = self.offsets, self.targets, self.costs
+            count = 0
+            for start in range(len(self.ids)):
+                if comp[start] >= 0:
+                    continue
+                comp[start] = count
+                order = [start]
+                for u in order:
+                    for e in range(offsets[u], offsets[u + 1]):
+                        v = targets[e]
+                        if comp[v] < 0 and costs[e] != DOWN:
+                            comp[v] = count
+                            order.append(v)
+                count += 1
+            self._components = comp
+        groups = {}
+        for i, c in enumerate(self._components):
+            groups.setdefault(c, []).append(self.ids[i])
+        return sorted(groups.values(), key=len, reverse=True)
+
+    def reachable(self, src, dst):
+        if self._components is None:
+            self.components()
+        return self._components[self._source(src)] == self._components[self._source(dst)]
+
+    def summary(self):
+        """设备数、链路数、断开链路数、连通分量数、不可达的设备对数；已计算全部源时附带最大开销"""
+        sizes = [len(group) for group in self.components()]
+        n = len(self.ids)
+        down = sum(1 for forward, _ in self.link_edges.values() if self.costs[forward] == DOWN)
+        result = {"devices": n, "links": len(self.link_edges), "down_links": down, "components": len(sizes),
+                  "unreachable_pairs": (n * (n - 1) - sum(k * (k - 1) for k in sizes)) // 2}
+        if n and len(self._results) == n:
+            result["max_cost"] = max((d for dist, _ in self._results.values() for d in dist if d != INF), default=0)
+        return result
+
+
+if __name__ == "__main__":
+    # python -m utils.spf data/current_topo.json [设备 ID] [--workers N]
+    # 计算全部设备的最短路径并输出汇总；指定设备 ID 时打印其路由表
+    if len(sys.argv) < 2:
+        print("用法: python -m utils.spf <拓扑 JSON> [设备 ID] [--workers N]")
+        sys.exit(1)
+    from models.topology import TopologyModel
+    args = sys.argv[2:]
+    workers = 1
+    if "--workers" in args:
+        workers = int(args[args.index("--workers") + 1])
+        del args[args.index("--workers"):args.index("--workers") + 2]
+    start = time.perf_counter()
+    engine = SPFEngine(TopologyModel.load_from_json(sys.argv[1]))
+    engine.run_all(workers=workers)
+    print(f">>> SPF 完成，用时 {time.perf_counter() - start:.2f}s: {engine.summary()}")
+    if args:
+        print(f"\n{'前缀':<18}{'开销':>4}  {'下一跳':<9}{'出接口':<11}类型")  # 中文表头按 2 列宽度折算
+        for route in engine.routing_table(args[0]):
+            print(f"{route.prefix:<20}{route.cost:>6}  {route.next_hop or '-':<12}{route.interface:<14}{route.kind}")
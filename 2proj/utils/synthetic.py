@@ -0,0 +1,79 @@
+import random
+from collections import defaultdict
+
+SHAPES = ("leaf-spine", "ring", "mesh", "hub-spoke")
+BRANDS = ("cisco", "arista", "paloalto")
+# 各品牌的接口命名方式
+INTERFACE_FORMAT = {"cisco": "Gi0/{}", "arista": "Et{}", "paloalto": "ethernet1/{}"}
+SITE_SIZE = 64      # 每个站点的设备数，设备 ID 形如 S3-LEAF201 (分组视图按站点折叠)
+MESH_DEGREE = 3     # mesh 中每台设备额外连接的随机对端数
+HUB_LIMIT = 32      # hub-spoke 中心设备数上限 (中心之间全互联，链路数为其平方级)
+
+
+def _shape_links(shape, count, rng):
+    """按拓扑形状返回 (角色列表, 连接列表)，设备用下标表示"""
+    if shape == "leaf-spine":
+        spines = min(4, max(2, count // 10))
+        roles = ["SPINE"] * spines + ["LEAF"] * (count - spines)
+        pairs = [(leaf, spine) for leaf in range(spines, count) for spine in range(spines)]
+    elif shape == "ring":
+        roles = ["R"] * count
+        pairs = [(i, (i + 1) % count) for i in range(count)] if count > 2 else [(0, 1)]
+    elif shape == "mesh":
+        # 部分网状：环保证连通，再为每台设备连接若干随机对端 (不重复)
+        roles = ["R"] * count
+        seen = set()
+        pairs = []
+        for i in range(count):
+            candidates = [(i + 1) % count] + [rng.randrange(count) for _ in range(MESH_DEGREE)]
+            for j in candidates:
+                key = (min(i, j), max(i, j))
+                if i != j and key not in seen:
+                    seen.add(key)
+                    pairs.append((i, j))
+    elif shape == "hub-spoke":
+        # 每 50 台分支对应一台中心 (最多 HUB_LIMIT 台)，中心之间全互联，分支双归到相邻两台中心
+        hubs = max(1, min(count // 50, HUB_LIMIT))
+        roles = ["HUB"] * hubs + ["SPOKE"] * (count - hubs)
+        pairs = [(a, b) for a in range(hubs) for b in range(a + 1, hubs)]
+        for spoke in range(hubs, count):
+            home = spoke % hubs
+            pairs.append((spoke, home))
+            if hubs > 1:
+                pairs.append((spoke, (home + 1) % hubs))
+    else:
+        raise ValueError(f"未知的拓扑形状: {shape}")
+    return roles, pairs
+
+
+def synthetic_lines(shape, count, seed=0):
+    """
+    生成指定形状与规模的拓扑输入行 (与交互 / 批处理输入相同的格式)，相同 seed 结果完全一致
+    先输出全部设备行 "ID,品牌,类型"，再输出连接行 "A:接口 <-> B:接口"
+    """
+    if count < 2:
+        raise ValueError("设备数至少为 2")
+    rng = random.Random(seed)
+    roles, pairs = _shape_links(shape, count, rng)
+
+    ids = []
+    brands = []
+    for i, role in enumerate(roles):
+        ids.append(f"S{i // SITE_SIZE}-{role}{i}")
+        if role in ("SPINE", "HUB"):
+            brand, n_type = rng.choice(("cisco", "arista")), "Router"
+        elif role == "LEAF":
+            brand, n_type = rng.choice(("cisco", "arista")), "Switch"
+        else:
+            brand = rng.choice(BRANDS)
+            n_type = "Firewall" if brand == "paloalto" else "Router"
+        brands.append(brand)
+        yield f"{ids[i]},{brand},{n_type}"
+
+    next_port = defaultdict(int)
+    for a, b in pairs:
+        next_port[a] += 1
+        next_port[b] += 1
+        intf_a = INTERFACE_FORMAT[brands[a]].format(next_port[a])
+        intf_b = INTERFACE_FORMAT[brands[b]].format(next_port[b])
+        yield f"{ids[a]}:{intf_a} <-> {ids[b]}:{intf_b}"
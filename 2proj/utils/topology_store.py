@@ -0,0 +1,346 @@
+import os
+import sys
+import json
+import sqlite3
+from contextlib import contextmanager
+from models.topology import TopologyModel, Node, Link
+from utils.ip_allocator import IPAllocator, default_lease_path
+from utils.json_stream import write_topology
+
+# SQLite 拓扑存储 (JSON 文件的替代后端)
+# - 设备 / 链路 / 接口 各一张表并建立索引，租约逐条保存在 leases 表中
+# - 保存时只写入模型中记录的改动 (TopologyModel.changed_* / IPAllocator.changed_leases)，
+#   代价与改动量成正比而不是与拓扑规模成正比；所有写入在同一个事务中完成
+# - WAL 模式：渲染器等读取方始终看到上一次提交的完整状态，不会读到写了一半的文件
+# - import_json / export_json 与原有的 JSON 格式互相转换
+SCHEMA_VERSION = 1
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    seq   INTEGER PRIMARY KEY,
+    key   TEXT NOT NULL UNIQUE,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    seq      INTEGER PRIMARY KEY,
+    id       TEXT NOT NULL UNIQUE,
+    brand    TEXT,
+    type     TEXT,
+    loopback TEXT,
+    extra    TEXT
+);
+CREATE TABLE IF NOT EXISTS links (
+    id        INTEGER PRIMARY KEY,
+    source    TEXT NOT NULL,
+    target    TEXT NOT NULL,
+    src_node  TEXT NOT NULL,
+    src_intf  TEXT NOT NULL,
+    dst_node  TEXT NOT NULL,
+    dst_intf  TEXT NOT NULL,
+    network   TEXT,
+    source_ip TEXT,
+    target_ip TEXT,
+    extra     TEXT
+);
+CREATE INDEX IF NOT EXISTS links_src ON links (src_node);
+CREATE INDEX IF NOT EXISTS links_dst ON links (dst_node);
+CREATE TABLE IF NOT EXISTS interfaces (
+    node_id TEXT NOT NULL,
+    name    TEXT NOT NULL,
+    link_id INTEGER NOT NULL,
+    info    TEXT,
+    PRIMARY KEY (node_id, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS interfaces_link ON interfaces (link_id);
+CREATE TABLE IF NOT EXISTS leases (
+    kind  TEXT NOT NULL,
+    key   TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS allocator (
+    id    INTEGER PRIMARY KEY CHECK (id = 1),
+    state TEXT NOT NULL
+);
+"""
+_LINK_COLUMNS = "id, source, target, src_node, src_intf, dst_node, dst_intf, network, source_ip, target_ip, extra"
+_UPSERT_NODE = ("INSERT INTO nodes (id, brand, type, loopback, extra) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET brand = excluded.brand, type = excluded.type, "
+                "loopback = excluded.loopback, extra = excluded.extra")
+_UPSERT_LINK = f"INSERT OR REPLACE INTO links ({_LINK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+_UPSERT_INTERFACE = "INSERT OR REPLACE INTO interfaces (node_id, name, link_id, info) VALUES (?, ?, ?, ?)"
+_UPSERT_LEASE = "INSERT OR REPLACE INTO leases (kind, key, value) VALUES (?, ?, ?)"
+
+
+def _dump(value):
+    return None if value is None else json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _load(text):
+    return None if text is None else json.loads(text)
+
+
+def _node_row(node):
+    return node.id, node.brand, node.type, node.loopback, _dump(node.extra or None)
+
+
+def _link_row(link_id, link):
+    return (link_id, link.source, link.target, link.src_node, link.src_intf, link.dst_node, link.dst_intf,
+            link.network, link.source_ip, link.target_ip, _dump(link.extra or None))
+
+
+def _row_link(row):
+    return Link(row[1], row[2], row[7], row[8], row[9], _load(row[10]))
+
+
+def _row_node_dict(row):
+    return Node(row[0], row[1], row[2], _load(row[4]), row[3]).to_dict()
+
+
+class TopologyStore:
+    """
+    SQLite 拓扑存储
+    save() 对 load_model() / 上一次 save() 得到的同一个模型只写入其改动记录，
+    对其他模型 (例如从 JSON 新建的) 则在一个事务中整体替换
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        # isolation_level=None: 由 transaction() 显式控制事务边界
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            self.conn.close()
+            raise ValueError(f"不支持的拓扑数据库版本 {version}: {path}")
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._model = None      # 与数据库内容同步的模型 (之后只需写入其改动)
+        self._allocator = None  # 同上，针对租约
+
+    @contextmanager
+    def transaction(self):
+        """写事务：全部成功才提交，出错时回滚，读取方看不到中间状态"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    @contextmanager
+    def snapshot(self):
+        """读事务：期间看到的是同一个已提交版本 (WAL 下不阻塞写入方)"""
+        self.conn.execute("BEGIN")
+        try:
+            yield self.conn
+        finally:
+            self.conn.execute("COMMIT")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ---------- 拓扑 ----------
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM meta LIMIT 1").fetchone() is None
+
+    def _meta(self, conn):
+        """返回 (topology_name, 其他顶层字段)"""
+        meta = {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM meta ORDER BY seq")}
+        return meta.pop("topology_name", ""), meta
+
+    def load_model(self, project_name=""):
+        """读取完整模型；链路 ID 与数据库中的 id 一致 (已删除的 id 以 None 占位)"""
+        with self.snapshot() as conn:
+            name, meta = self._meta(conn)
+            model = TopologyModel(name or project_name)
+            model.meta = meta
+            for row in conn.execute("SELECT id, brand, type, loopback, extra FROM nodes ORDER BY seq"):
+                model.add_node(Node(row[0], row[1], row[2], _load(row[4]), row[3]))
+            for row in conn.execute(f"SELECT {_LINK_COLUMNS} FROM links ORDER BY id"):
+                while len(model.links) < row[0]:
+                    model.links.append(None)
+                model.add_link(_row_link(row))
+        model.clear_changes()
+        self._model = model
+        return model
+
+    def _write_meta(self, conn, model):
+        # 顶层字段数量很少，每次整体重写
+        conn.execute("DELETE FROM meta")
+        conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                         [("topology_name", _dump(model.topology_name))] +
+                         [(key, _dump(value)) for key, value in model.meta.items()])
+
+    def _write_all(self, conn, model):
+        for table in ("nodes", "links", "interfaces"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.executemany(_UPSERT_NODE, (_node_row(n) for n in model.nodes.values()))
+        conn.executemany(_UPSERT_LINK, (_link_row(i, l) for i, l in model.iter_links()))
+        conn.executemany(_UPSERT_INTERFACE, ((e.node, e.name, e.link_id, _dump(e.info))
+                                             for e in model.interfaces.values()))
+        return len(model.nodes) + model.link_count
+
+    def _write_changes(self, conn, model):
+        rows = 0
+        for n_id in model.changed_nodes:
+            node = model.nodes.get(n_id)
+            if node is None:
+                conn.execute("DELETE FROM nodes WHERE id = ?", (n_id,))
+            else:
+                conn.execute(_UPSERT_NODE, _node_row(node))
+            rows += 1
+        for link_id in model.changed_links:
+            link = model.links[link_id]
+            if link is None:
+                conn.execute("DELETE FROM links WHERE id = ?", (link_id,))
+            else:
+                conn.execute(_UPSERT_LINK, _link_row(link_id, link))
+            rows += 1
+        for key in model.changed_interfaces:
+            entry = model.interfaces.get(key)
+            if entry is None:
+                conn.execute("DELETE FROM interfaces WHERE node_id = ? AND name = ?", key)
+            else:
+                conn.execute(_UPSERT_INTERFACE, (entry.node, entry.name, entry.link_id, _dump(entry.info)))
+        return rows
+
+    # ---------- 租约 ----------
+    def load_allocator(self, lease_path=None, **settings):
+        """
+        读取租约与地址池状态；数据库中还没有租约时读取 lease_path (原 JSON 租约文件，用于导入)，
+        两者都没有或地址规划参数不一致时返回空的分配器
+        """
+        with self.snapshot() as conn:
+            row = conn.execute("SELECT state FROM allocator WHERE id = 1").fetchone()
+            if row is None:
+                allocator = IPAllocator.load(lease_path, **settings)
+            else:
+                saved = json.loads(row[0])
+                saved["links"], saved["loopbacks"] = {}, {}
+                for kind, key, value in conn.execute("SELECT kind, key, value FROM leases"):
+                    saved["links" if kind == "link" else "loopbacks"][key] = value
+                allocator = IPAllocator.restore(saved, self.path, **settings)
+                # 参数不一致时 restore 返回的是新分配器：不标记为已同步，保存时整体替换旧租约
+                if allocator.link_leases is saved["links"]:
+                    self._allocator = allocator
+        return allocator
+
+    def _write_leases(self, conn, allocator):
+        conn.execute("INSERT OR REPLACE INTO allocator (id, state) VALUES (1, ?)",
+                     (_dump(allocator.state(leases=False)),))
+        if allocator is not self._allocator:
+            conn.execute("DELETE FROM leases")
+            conn.executemany(_UPSERT_LEASE, [("link", k, v) for k, v in allocator.link_leases.items()] +
+                             [("loopback", k, v) for k, v in allocator.loopback_leases.items()])
+            return
+        for kind, key in allocator.changed_leases:
+            value = (allocator.link_leases if kind == "link" else allocator.loopback_leases).get(key)
+            if value is None:
+                conn.execute("DELETE FROM leases WHERE kind = ? AND key = ?", (kind, key))
+            else:
+                conn.execute(_UPSERT_LEASE, (kind, key, value))
+
+    # ---------- 保存 ----------
+    def save(self, model, allocator=None):
+        """
+        在一个事务中保存模型 (以及可选的租约)，返回写入的设备 + 链路行数
+        对已同步的模型只写改动；对其他模型整体替换数据库中的拓扑
+        """
+        with self.transaction() as conn:
+            self._write_meta(conn, model)
+            if model is self._model:
+                rows = self._write_changes(conn, model)
+            else:
+                rows = self._write_all(conn, model)
+            if allocator is not None:
+                self._write_leases(conn, allocator)
+        model.clear_changes()
+        self._model = model
+        if allocator is not None:
+            allocator.changed_leases.clear()
+            self._allocator = allocator
+        return rows
+
+    # ---------- 查询 (供其他读取方直接使用，无需加载整个模型) ----------
+    def links_of(self, node_id):
+        rows = self.conn.execute(f"SELECT {_LINK_COLUMNS} FROM links WHERE src_node = ? "
+                                 f"UNION SELECT {_LINK_COLUMNS} FROM links WHERE dst_node = ? ORDER BY id",
+                                 (node_id, node_id))
+        return [_row_link(row) for row in rows]
+
+    def get_interface(self, node_id, intf_name):
+        """返回 {"link_id": 占用的链路 ID (-1 为未占用), "info": 节点中声明的接口数据}，不存在时返回 None"""
+        row = self.conn.execute("SELECT link_id, info FROM interfaces WHERE node_id = ? AND name = ?",
+                                (node_id, intf_name)).fetchone()
+        return None if row is None else {"link_id": row[0], "info": _load(row[1])}
+
+    # ---------- JSON 兼容 ----------
+    def import_json(self, json_path, backend="auto", lease_path=None):
+        """
+        把 JSON 拓扑整体导入数据库 (替换原有拓扑)，返回导入后的模型
+        lease_path (默认为 JSON 旁边的租约文件) 存在时同时导入租约，之后数据库即为租约的唯一来源
+        """
+        model = TopologyModel.load_from_json(json_path, backend)
+        self.save(model)
+        self.import_leases(lease_path or default_lease_path(json_path))
+        return model
+
+    def import_leases(self, lease_path):
+        """
+        把 JSON 租约文件原样写入数据库 (替换原有租约)，返回导入的租约数；文件不存在时返回 0
+        地址规划参数不在这里检查，由 load_allocator() 按当前参数判断是否可用
+        """
+        if not os.path.exists(lease_path):
+            return 0
+        with open(lease_path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        links, loopbacks = saved.pop("links", {}), saved.pop("loopbacks", {})
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO allocator (id, state) VALUES (1, ?)", (_dump(saved),))
+            conn.execute("DELETE FROM leases")
+            conn.executemany(_UPSERT_LEASE, [("link", k, v) for k, v in links.items()] +
+                             [("loopback", k, v) for k, v in loopbacks.items()])
+        self._allocator = None
+        return len(links) + len(loopbacks)
+
+    def export_json(self, json_path):
+        """
+        从同一个已提交版本逐行导出为 JSON (格式与 save_to_json 相同)，不需要先构建模型
+        先写临时文件再替换，读取 JSON 的程序同样不会看到写了一半的文件
+        """
+        tmp_path = json_path + ".tmp"
+        with self.snapshot() as conn:
+            name, meta = self._meta(conn)
+            nodes = (_row_node_dict(row) for row in
+                     conn.execute("SELECT id, brand, type, loopback, extra FROM nodes ORDER BY seq"))
+            links = (_row_link(row).to_dict() for row in
+                     conn.execute(f"SELECT {_LINK_COLUMNS} FROM links ORDER BY id"))
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                write_topology(f, name, meta, nodes, links)
+        os.replace(tmp_path, json_path)
+
+
+if __name__ == "__main__":
+    # python -m utils.topology_store import data/current_topo.db data/current_topo.json
+    # python -m utils.topology_store export data/current_topo.db data/current_topo.json
+    if len(sys.argv) != 4 or sys.argv[1] not in ("import", "export"):
+        print("用法: python -m utils.topology_store import|export <数据库> <JSON 文件>")
+        sys.exit(1)
+    with TopologyStore(sys.argv[2]) as store:
+        if sys.argv[1] == "import":
+            model = store.import_json(sys.argv[3])
+            print(f"[成功] 已导入 {len(model.nodes)} 台设备、{model.link_count} 条链路到 {sys.argv[2]}")
+        else:
+            store.export_json(sys.argv[3])
+            print(f"[成功] 已导出到 {sys.argv[3]}")
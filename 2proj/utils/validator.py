@@ -0,0 +1,274 @@
+import sys
+import json
+from socket import inet_pton, AF_INET
+from models.topology import Node, Link, split_endpoint
+
+# 拓扑校验：在分配地址 / 渲染 / 生成配置之前一次性找出所有问题
+# 只扫描一遍记录，同时建立 设备 / 接口 / 地址 三个哈希索引：
+# - 设备 ID 重复、链路引用了不存在的设备、同一接口被多条链路使用、设备自环
+# - 地址重叠：所有互联网段与 Loopback (/32) 放入 {(网络地址, 前缀长度): 来源} 索引，
+#   每个前缀只需按位查找自己的各级祖先 (最多 32 次哈希查找)，不做两两比较
+# - 接口地址：链路两端的 IP 放入 {地址: 端点} 索引，查找重复使用的地址，并检查是否位于链路网段内
+ERROR = "error"
+WARNING = "warning"
+
+DUPLICATE_NODE = "duplicate_node"            # 设备 ID 重复 (后出现的覆盖前面的)
+UNKNOWN_DEVICE = "unknown_device"            # 链路端点的设备未声明
+DUPLICATE_INTERFACE = "duplicate_interface"  # 同一接口出现在多条链路上
+SELF_LINK = "self_link"                      # 链路两端是同一台设备
+INVALID_ADDRESS = "invalid_address"          # 网段 / Loopback 不是合法的 IPv4 地址
+ADDRESS_OVERLAP = "address_overlap"          # 网段 / Loopback 与其他对象重叠
+DUPLICATE_IP = "duplicate_ip"                # 接口地址被多个端点 (或 Loopback) 使用
+IP_OUTSIDE_NETWORK = "ip_outside_network"    # 接口地址不在所属链路的网段内
+
+SEVERITY = {
+    DUPLICATE_NODE: WARNING,
+    UNKNOWN_DEVICE: ERROR,
+    DUPLICATE_INTERFACE: ERROR,
+    SELF_LINK: WARNING,
+    INVALID_ADDRESS: ERROR,
+    ADDRESS_OVERLAP: ERROR,
+    DUPLICATE_IP: ERROR,
+    IP_OUTSIDE_NETWORK: ERROR,
+}
+_MASKS = [(0xFFFFFFFF << (32 - plen)) & 0xFFFFFFFF for plen in range(33)]
+
+
+class Violation:
+    """一条校验结果：code 为问题类型，subject 为出问题的对象 (设备 ID / 端点 / 链路)"""
+    __slots__ = ("code", "severity", "subject", "message")
+
+    def __init__(self, code, subject, message):
+        self.code = code
+        self.severity = SEVERITY[code]
+        self.subject = subject
+        self.message = message
+
+    def to_dict(self):
+        return {"code": self.code, "severity": self.severity, "subject": self.subject, "message": self.message}
+
+    def __str__(self):
+        return f"[{self.severity}] {self.code}: {self.message}"
+
+
+def _parse_prefix(text, host=False):
+    """
+    'a.b.c.d/n' (host=True 时为 'a.b.c.d'，即 /32) -> 索引键 (网络地址 << 6 | n)，
+    格式错误或主机位不为 0 时返回 None；地址由 inet_pton 解析 (只接受标准点分十进制)，
+    比 ipaddress.IPv4Network 快一个数量级，大拓扑上每条链路都要解析一次
+    """
+    if host:
+        address, plen = text, 32
+    else:
+        address, sep, plen = text.partition('/')
+        if not sep or not plen.isdigit() or len(plen) > 2 or int(plen) > 32:
+            return None
+        plen = int(plen)
+    try:
+        value = int.from_bytes(inet_pton(AF_INET, address), 'big')
+    except (OSError, ValueError):
+        return None
+    if value & ~_MASKS[plen]:
+        return None
+    return (value << 6) | plen
+
+
+def _address_text(value):
+    return f"{(value >> 24) & 255}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+
+def _prefix_text(key):
+    return f"{_address_text(key >> 6)}/{key & 63}"
+
+
+def _link_name(link):
+    return f"{link.source} <-> {link.target}"
+
+
+def _owner(obj):
+    """地址的来源描述：Node 为其 Loopback，Link 为链路本身"""
+    if isinstance(obj, Node):
+        return f"{obj.id} Loopback"
+    return f"链路 {_link_name(obj)}"
+
+
+class TopologyValidator:
+    """
+    增量校验器：依次调用 add_node() / add_link()，最后调用 finish() 取得全部结果
+    链路可以先于设备出现，引用检查与地址重叠检查在 finish() 中统一完成
+    索引中只保存对象引用，描述文字只在发现问题时才生成
+    """
+
+    def __init__(self):
+        self.violations = []
+        self.nodes = set()
+        self.interfaces = {}  # (设备 ID, 接口名) -> 首次使用该接口的 Link
+        self.prefixes = {}    # 网络地址 << 6 | 前缀长度 -> 使用该地址的 Node / Link
+        self.hosts = {}       # 接口地址 (整数) -> 首次使用该地址的端点
+        self.links = []
+        self.min_prefixlen = 33
+
+    def _report(self, code, subject, message):
+        self.violations.append(Violation(code, subject, message))
+
+    def report_duplicate(self, n_id):
+        """记录一个在输入阶段发现的重复设备 ID (模型中的设备已去重，见 validate_model)"""
+        self._report(DUPLICATE_NODE, n_id, f"设备 {n_id} 重复声明，后面的定义会覆盖前面的")
+
+    def _add_prefix(self, text, owner, host=False):
+        """
+        把地址加入索引并返回其索引键 (不合法时为 None)；
+        完全相同的前缀在这里直接报告，包含关系在 finish() 中查找
+        """
+        key = _parse_prefix(text, host) if type(text) is str else None
+        if key is None:
+            name = _owner(owner)
+            self._report(INVALID_ADDRESS, name, f"{name} 的地址 {text!r} 不是合法的 IPv4 {'地址' if host else '网段'}")
+            return None
+        first = self.prefixes.setdefault(key, owner)
+        if first is not owner:
+            name = _owner(owner)
+            self._report(ADDRESS_OVERLAP, name, f"{name} 的 {_prefix_text(key)} 与 {_owner(first)} 重复")
+            return key
+        if key & 63 < self.min_prefixlen:
+            self.min_prefixlen = key & 63
+        return key
+
+    def _add_host(self, text, endpoint, link, network_key):
+        """把接口地址加入索引；重复使用的地址与不在链路网段内的地址在这里直接报告"""
+        key = _parse_prefix(text, host=True) if type(text) is str else None
+        if key is None:
+            self._report(INVALID_ADDRESS, endpoint, f"接口 {endpoint} 的地址 {text!r} 不是合法的 IPv4 地址")
+            return
+        value = key >> 6
+        if network_key is not None:
+            plen = network_key & 63
+            if value & _MASKS[plen] != network_key >> 6:
+                self._report(IP_OUTSIDE_NETWORK, endpoint, f"接口 {endpoint} 的地址 {text} 不在链路 "
+                                                           f"{_link_name(link)} 的网段 {_prefix_text(network_key)} 内")
+        first = self.hosts.setdefault(value, endpoint)
+        if first != endpoint:
+            self._report(DUPLICATE_IP, endpoint, f"接口 {endpoint} 的地址 {text} 与接口 {first} 重复")
+
+    def _duplicate_interface(self, endpoint, link):
+        first = self.interfaces[split_endpoint(endpoint)]
+        self._report(DUPLICATE_INTERFACE, endpoint,
+                     f"接口 {endpoint} 同时用于链路 {_link_name(first)} 和 {_link_name(link)}")
+
+    def add_node(self, node):
+        if not isinstance(node, Node):
+            node = Node.from_dict(node)
+        if node.id in self.nodes:
+            self.report_duplicate(node.id)
+        self.nodes.add(node.id)
+        if node.loopback:
+            self._add_prefix(node.loopback, node, host=True)
+
+    def add_link(self, link):
+        if not isinstance(link, Link):
+            link = Link.from_dict(link)
+        self.links.append(link)
+        if link.src_node == link.dst_node:
+            name = _link_name(link)
+            self._report(SELF_LINK, name, f"链路 {name} 两端是同一台设备 {link.src_node}")
+        interfaces = self.interfaces
+        if link.src_intf and interfaces.setdefault((link.src_node, link.src_intf), link) is not link:
+            self._duplicate_interface(link.source, link)
+        if link.dst_intf and interfaces.setdefault((link.dst_node, link.dst_intf), link) is not link:
+            self._duplicate_interface(link.target, link)
+        network = link.network
+        network_key = None
+        if network and str(network).upper() != "TBD":
+            network_key = self._add_prefix(network, link)
+        if link.source_ip is not None:
+            self._add_host(link.source_ip, link.source, link, network_key)
+        if link.target_ip is not None:
+            self._add_host(link.target_ip, link.target, link, network_key)
+
+    def finish(self):
+        """完成引用与包含关系检查，返回全部 Violation (按发现顺序)"""
+        nodes = self.nodes
+        for link in self.links:
+            for n_id in (link.src_node, link.dst_node) if link.src_node != link.dst_node else (link.src_node,):
+                if n_id not in nodes:
+                    self._report(UNKNOWN_DEVICE, n_id, f"链路 {_link_name(link)} 引用了未声明的设备 {n_id}")
+        # 接口地址与 Loopback 相同 (设备可能在链路之后才出现，因此在这里统一检查)
+        prefixes = self.prefixes
+        for value, endpoint in self.hosts.items():
+            owner = prefixes.get((value << 6) | 32)
+            if isinstance(owner, Node):
+                self._report(DUPLICATE_IP, endpoint, f"接口 {endpoint} 的地址 {_address_text(value)} "
+                                                     f"与 {_owner(owner)} 重复")
+        # 每个前缀逐级查找更短的祖先前缀，命中即为包含 (CIDR 块之间只有包含或不相交两种关系)
+        ancestors = [[(_MASKS[p] << 6, p) for p in range(plen - 1, self.min_prefixlen - 1, -1)] for plen in range(33)]
+        for key, owner in prefixes.items():
+            for mask, plen in ancestors[key & 63]:
+                parent_key = (key & mask) | plen
+                parent = prefixes.get(parent_key)
+                if parent is not None:
+                    name = _owner(owner)
+                    self._report(ADDRESS_OVERLAP, name, f"{name} ({_prefix_text(key)}) 位于 "
+                                                       f"{_owner(parent)} ({_prefix_text(parent_key)}) 之内")
+                    break
+        self.links = []
+        return self.violations
+
+
+def validate_model(model, duplicate_nodes=()):
+    """
+    校验内存中的拓扑模型；模型中的设备 ID 已去重，
+    输入阶段发现的重复 ID 通过 duplicate_nodes 传入
+    """
+    validator = TopologyValidator()
+    for n_id in duplicate_nodes:
+        validator.report_duplicate(n_id)
+    for node in model.nodes.values():
+        validator.add_node(node)
+    for _, link in model.iter_links():
+        validator.add_link(link)
+    return validator.finish()
+
+
+def validate_records(records):
+    """校验 iter_topology() 产出的记录流 (可以发现文件中重复的设备 ID)"""
+    validator = TopologyValidator()
+    for kind, item in records:
+        if kind == "node":
+            validator.add_node(item)
+        elif kind == "link":
+            validator.add_link(item)
+    return validator.finish()
+
+
+def has_errors(violations):
+    return any(v.severity == ERROR for v in violations)
+
+
+def format_violations(violations, limit=20):
+    """按问题类型汇总并列出前 limit 条"""
+    if not violations:
+        return "校验通过，未发现问题。"
+    counts = {}
+    for v in violations:
+        counts[v.code] = counts.get(v.code, 0) + 1
+    lines = [f"发现 {len(violations)} 个问题: " + ", ".join(f"{code} {n}" for code, n in counts.items())]
+    lines.extend(f"  {v}" for v in violations[:limit])
+    if len(violations) > limit:
+        lines.append(f"  ... 其余 {len(violations) - limit} 个省略")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python -m utils.validator data/current_topo.json [--json]
+    # --json: 每行输出一条 JSON 格式的结果，便于其他工具处理；存在 error 时退出码为 1
+    if len(sys.argv) < 2:
+        print("用法: python -m utils.validator <拓扑 JSON> [--json]")
+        sys.exit(1)
+    from utils.json_stream import iter_topology
+    found = validate_records(iter_topology(sys.argv[1]))
+    if "--json" in sys.argv[2:]:
+        for v in found:
+            print(json.dumps(v.to_dict(), ensure_ascii=False))
+    else:
+        print(format_violations(found))
+    sys.exit(1 if has_errors(found) else 0)
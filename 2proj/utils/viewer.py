@@ -0,0 +1,148 @@
+import gzip
+import json
+import os
+
+VIEWER_NAME = "viewer.html"
+DATA_JS_NAME = "topology_data.js"
+DATA_GZ_NAME = "topology_data.json.gz"
+
+# 静态查看器页面：只写一次，拓扑数据通过单独的数据文件加载
+# - 默认加载 topology_data.js (JSONP 形式，file:// 直接打开即可)
+# - ?data=topology_data.json.gz 时通过 fetch + DecompressionStream 加载压缩数据 (需通过 HTTP 访问)
+# - ?refresh=5 时每 5 秒重新加载数据，并在原有画布上增量更新节点 / 边，保留当前布局
+# 单文件页面 (write_page) 使用相同的页面头部与公共脚本，数据直接内联
+_PAGE_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Topology Viewer</title>
+<script src="https://cdnjs.cloudflare.com/ajax/libs/vis-network/9.1.2/dist/vis-network.min.js"></script>
+<style>html, body { margin: 0; height: 100%; } #mynetwork { width: 100%; height: 100%; }</style>
+</head>
+<body>
+<div id="mynetwork"></div>
+<script type="text/javascript">
+"""
+# 页面公共脚本：DataSet 与 renderTopology(数据)，数据为 write_topology_data 写出的列式格式
+_PAGE_CORE = """  var nodes = new vis.DataSet([]), edges = new vis.DataSet([]);
+  var network = null;
+
+  function expand(fields, rows) {
+    return rows.map(function (row) {
+      var item = {};
+      for (var i = 0; i < fields.length; i++) {
+        if (row[i] !== null && row[i] !== undefined) { item[fields[i]] = row[i]; }
+      }
+      return item;
+    });
+  }
+  function sync(dataset, items) {
+    var keep = {};
+    items.forEach(function (item) { keep[item.id] = true; });
+    dataset.remove(dataset.getIds({filter: function (item) { return !keep[item.id]; }}));
+    dataset.update(items);
+  }
+  function renderTopology(data) {
+    sync(nodes, expand(data.node_fields, data.nodes));
+    sync(edges, expand(data.edge_fields, data.edges));
+    if (network === null) {
+      network = new vis.Network(document.getElementById("mynetwork"), {nodes: nodes, edges: edges}, data.options || {});
+    }
+  }
+"""
+VIEWER_HTML = _PAGE_HEAD + """  var params = new URLSearchParams(location.search);
+  var dataSrc = params.get("data") || "topology_data.js";
+  var refresh = parseFloat(params.get("refresh") || "0");
+""" + _PAGE_CORE + """  function loadData() {
+    if (/\\.js$/.test(dataSrc)) {
+      var s = document.createElement("script");
+      s.src = dataSrc + "?t=" + Date.now();
+      s.onload = function () { s.remove(); };
+      document.body.appendChild(s);
+    } else {
+      fetch(dataSrc, {cache: "no-store"}).then(function (resp) {
+        var body = /\\.gz$/.test(dataSrc) ? resp.body.pipeThrough(new DecompressionStream("gzip")) : resp.body;
+        return new Response(body).json();
+      }).then(renderTopology);
+    }
+  }
+  loadData();
+  if (refresh > 0) { setInterval(loadData, refresh * 1000); }
+</script>
+</body>
+</html>
+"""
+
+
+def _columns(items):
+    """把字典列表转换为 字段表 + 行数组，省去每条记录重复的键名"""
+    fields = []
+    seen = set()
+    for item in items:
+        for key in item:
+            if key not in seen:
+                seen.add(key)
+                fields.append(key)
+    return fields, [[item.get(key) for key in fields] for item in items]
+
+
+def _payload(nodes, edges, options):
+    node_fields, node_rows = _columns(nodes)
+    edge_fields, edge_rows = _columns(edges)
+    return json.dumps({"node_fields": node_fields, "nodes": node_rows,
+                       "edge_fields": edge_fields, "edges": edge_rows,
+                       "options": options or {}},
+                      ensure_ascii=False, separators=(',', ':'))
+
+
+def _replace_file(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)  # 原子替换，浏览器不会读到写了一半的文件
+
+
+def write_viewer(out_dir):
+    """写入静态查看器页面；内容未变化时不重写，浏览器缓存可以一直命中"""
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    path = os.path.join(out_dir, VIEWER_NAME)
+    content = VIEWER_HTML.encode('utf-8')
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            if f.read() == content:
+                return path
+    _replace_file(path, content)
+    return path
+
+
+def write_topology_data(out_dir, nodes, edges, options=None, compress=False):
+    """
+    写入紧凑的拓扑数据文件，返回文件路径
+    compress=False: topology_data.js (renderTopology({...}) 形式)
+    compress=True:  topology_data.json.gz (查看器需加 ?data=topology_data.json.gz)
+    """
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    payload = _payload(nodes, edges, options)
+    if compress:
+        path = os.path.join(out_dir, DATA_GZ_NAME)
+        _replace_file(path, gzip.compress(payload.encode('utf-8'), compresslevel=6, mtime=0))
+    else:
+        path = os.path.join(out_dir, DATA_JS_NAME)
+        _replace_file(path, f"renderTopology({payload});\n".encode('utf-8'))
+    return path
+
+
+def write_page(path, nodes, edges, options=None, scripts=""):
+    """
+    写入单文件页面：查看器的页面与脚本 + 内联的拓扑数据，不依赖 pyvis，返回文件路径
+    scripts: 追加在数据之后的 <script> 片段 (此时 network / nodes / edges 均已创建)
+    """
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    payload = _payload(nodes, edges, options).replace("</", "<\\/")  # 数据中的 "</script>" 不会提前结束脚本
+    page = _PAGE_HEAD + _PAGE_CORE + f"  renderTopology({payload});\n</script>\n{scripts}</body>\n</html>\n"
+    _replace_file(path, page.encode('utf-8'))
+    return path